@@ -0,0 +1,88 @@
+"""
+Per-tick cost of the aggregate simulator against the swarm size.
+
+Generates one map per drone count (same hubs and links, see
+src/parser/map_generator.py) and runs AggregateSimulator on drone counts
+only, then RoutingSimulator without congestion term, which follows the
+same rules with one Drone object per drone. Prints the turns of both
+(they must match) and the time per tick; the per-drone engine is skipped
+above --max-per-drone drones:
+
+    python benchmarks/aggregate_simulator.py --drones 100 10000 1000000
+"""
+from typing import Tuple
+import argparse
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(
+    __file__))))
+from src.parser.map_parser import MapParser  # noqa: E402
+from src.parser.map_generator import MapGenerator  # noqa: E402
+from src.simulator.path_finder import DepthFirstSearch  # noqa: E402
+from src.simulator.routing_simulator import RoutingSimulator  # noqa: E402
+from src.simulator.aggregate_simulator import (  # noqa: E402
+    AggregateSimulator)
+from src.simulator.helpers import (  # noqa: E402
+    create_valid_graph, sort_map_by_priority)
+
+
+def run(path: str, aggregate: bool) -> Tuple[int, float]:
+    """
+    Runs one engine on a freshly parsed map.
+
+    Returns:
+        Tuple[int, float]: Turns and simulation time, in seconds.
+    """
+    map_parser = MapParser()
+    with contextlib.redirect_stdout(io.StringIO()):
+        map_parser.parse(path)
+    graph = map_parser.get_map()
+    drones = map_parser.get_drone_num()
+    if graph is None or drones is None:
+        raise ValueError(f"{path}: {map_parser.error}")
+    finder = DepthFirstSearch(graph, prune=True)
+    paths = list(finder.iter_paths(max_paths=1000))
+    valid_map = create_valid_graph(finder.names, paths, graph)
+    valid_map = sort_map_by_priority(valid_map, graph)
+    sim = AggregateSimulator(graph, paths, drones) if aggregate else \
+        RoutingSimulator(graph, paths, drones, congestion=0.0)
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        turns = sim.start_simulation(valid_map)
+    return turns, time.perf_counter() - start
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    arg_parser.add_argument("--topology", default="layered",
+                            choices=["grid", "layered", "random"])
+    arg_parser.add_argument("--hubs", type=int, default=200)
+    arg_parser.add_argument("--drones", type=int, nargs="+",
+                            default=[100, 1000, 10000, 100000])
+    arg_parser.add_argument("--max-per-drone", type=int, default=1000,
+                            help="largest swarm run by the per-drone engine")
+    args = arg_parser.parse_args()
+
+    print(f"{'drones':>8} {'turns':>6} {'aggregate':>12} "
+          f"{'per-drone':>12} {'turns':>6}")
+    with tempfile.TemporaryDirectory() as directory:
+        for drones in args.drones:
+            path = os.path.join(directory, f"{drones}.txt")
+            MapGenerator(args.hubs, drones, seed=1).generate(
+                args.topology).write(path)
+            turns, seconds = run(path, aggregate=True)
+            line = f"{drones:>8} {turns:>6} " \
+                   f"{seconds / max(turns, 1) * 1e6:>8.1f}us/t"
+            if drones <= args.max_per_drone:
+                reference, spent = run(path, aggregate=False)
+                line += f" {spent / max(reference, 1) * 1e6:>8.1f}us/t " \
+                        f"{reference:>6}"
+            print(line)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Memory footprint of the simulation objects.
+
+Measures, with tracemalloc, how many bytes one Drone (including its
+coordinate buffers) and one hub (Zone plus one outgoing Link and its
+index entries) cost, and optionally fails when a budget is exceeded so
+regressions are caught:
+
+    python benchmarks/memory_usage.py --drones 100000 --max-drone-bytes 400
+"""
+from typing import Callable, List
+import argparse
+import os
+import sys
+import tracemalloc
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(
+    __file__))))
+from src.parser.map_constructor import Zone, StartZone  # noqa: E402
+from src.simulator.simulation_engine import Drone  # noqa: E402
+
+
+def measure(build: Callable[[], List[object]]) -> int:
+    """Returns the bytes still allocated by the objects 'build' returns."""
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    objects = build()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del objects
+    return after - before
+
+
+def build_drones(count: int) -> Callable[[], List[object]]:
+    """Returns a builder of 'count' drones waiting in one start hub."""
+    start = StartZone("start", 0, 0, count)
+
+    def build() -> List[object]:
+        return [Drone(i, start) for i in range(1, count + 1)]
+    return build
+
+
+def build_hubs(count: int) -> Callable[[], List[object]]:
+    """Returns a builder of a chain of 'count' hubs."""
+    def build() -> List[object]:
+        hubs: List[object] = []
+        last: Zone | None = None
+        for i in range(count):
+            zone = Zone(f"hub{i}", i, i % 7)
+            if last is not None:
+                last.add_link(zone, 2)
+            hubs.append(zone)
+            last = zone
+        return hubs
+    return build
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    arg_parser.add_argument("--drones", type=int, default=100000)
+    arg_parser.add_argument("--hubs", type=int, default=100000)
+    arg_parser.add_argument("--max-drone-bytes", type=float, default=None)
+    arg_parser.add_argument("--max-hub-bytes", type=float, default=None)
+    args = arg_parser.parse_args()
+
+    drone_bytes = measure(build_drones(args.drones)) / args.drones
+    hub_bytes = measure(build_hubs(args.hubs)) / args.hubs
+    print(f"bytes per drone: {drone_bytes:.1f} ({args.drones} drones)")
+    print(f"bytes per hub:   {hub_bytes:.1f} ({args.hubs} hubs)")
+
+    failed = False
+    if args.max_drone_bytes is not None and \
+            drone_bytes > args.max_drone_bytes:
+        print(f"Error: drones use more than {args.max_drone_bytes} bytes",
+              file=sys.stderr)
+        failed = True
+    if args.max_hub_bytes is not None and hub_bytes > args.max_hub_bytes:
+        print(f"Error: hubs use more than {args.max_hub_bytes} bytes",
+              file=sys.stderr)
+        failed = True
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
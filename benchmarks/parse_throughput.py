@@ -0,0 +1,63 @@
+"""
+Parse throughput of MapParser on generated maps.
+
+Writes random maps of increasing size (about four connections per hub,
+see src/parser/map_generator.py) to a temporary directory
+and times MapParser.parse on each. With linear scaling the time per
+connection stays flat as the map grows:
+
+    python benchmarks/parse_throughput.py --sizes 25000 50000 100000
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(
+    __file__))))
+from src.parser.map_parser import MapParser  # noqa: E402
+from src.parser.map_generator import MapGenerator  # noqa: E402
+
+
+def generate_map(path: str, connections: int, seed: int = 42) -> int:
+    """
+    Writes a random map with about the given number of connections.
+
+    Returns:
+        int: The exact number of connections written.
+    """
+    game = MapGenerator(max(2, connections // 4), 100, density=3.0,
+                        seed=seed).generate("random")
+    game.write(path)
+    return len(game.connections)
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    arg_parser.add_argument("--sizes", type=int, nargs="+",
+                            default=[25000, 50000, 100000],
+                            help="connection counts of the generated maps")
+    args = arg_parser.parse_args()
+
+    print(f"{'connections':>12} {'seconds':>9} {'us/connection':>14} "
+          f"{'lines/s':>10}")
+    with tempfile.TemporaryDirectory() as directory:
+        for size in args.sizes:
+            path = os.path.join(directory, f"map_{size}.txt")
+            size = generate_map(path, size)
+            with open(path) as file:
+                lines = sum(1 for _ in file)
+            start = time.perf_counter()
+            map_parser = MapParser()
+            map_parser.parse(path)
+            elapsed = time.perf_counter() - start
+            if map_parser.get_map() is None:
+                print(f"Error: generated map {path} was rejected",
+                      file=sys.stderr)
+                sys.exit(1)
+            print(f"{size:>12} {elapsed:>9.3f} "
+                  f"{elapsed / size * 1e6:>14.2f} {lines / elapsed:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
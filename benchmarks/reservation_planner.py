@@ -0,0 +1,98 @@
+"""
+Turn count and planning time of the reservation planner.
+
+Runs AdvanceSimulator and ReservationSimulator (windowed cooperative A*,
+see src/simulator/reservation_planner.py) on every bundled map and
+prints the turns each one needs, the time AdvanceSimulator takes to
+simulate, and the time ReservationSimulator takes to plan (construction)
+and to play its plan back. Times are the best of --repeat runs:
+
+    python benchmarks/reservation_planner.py --window 16
+"""
+from typing import Dict, List, Tuple, Type
+import argparse
+import contextlib
+import glob
+import io
+import os
+import sys
+import time
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(
+    __file__))))
+from src.parser.map_parser import MapParser  # noqa: E402
+from src.parser.map_constructor import Zone  # noqa: E402
+from src.simulator.path_finder import DepthFirstSearch, Path  # noqa: E402
+from src.simulator.simulation_engine import (  # noqa: E402
+    Simulator, AdvanceSimulator)
+from src.simulator.reservation_planner import (  # noqa: E402
+    ReservationSimulator)
+from src.simulator.helpers import (  # noqa: E402
+    create_valid_graph, sort_map_by_priority)
+
+
+def load(path: str) -> Tuple[Dict[str, Zone], int, List[Path],
+                             Dict[str, List]]:
+    """Parses a map and builds its paths and prioritized next hops."""
+    map_parser = MapParser()
+    with contextlib.redirect_stdout(io.StringIO()):
+        map_parser.parse(path)
+    graph = map_parser.get_map()
+    drones = map_parser.get_drone_num()
+    if graph is None or drones is None:
+        raise ValueError(f"{path}: {map_parser.error}")
+    paths = DepthFirstSearch(graph).find_valid_paths()
+    valid_map = create_valid_graph(list(graph.keys()), paths, graph)
+    return graph, drones, paths, sort_map_by_priority(valid_map, graph)
+
+
+def run(path: str, engine: Type[Simulator],
+        repeat: int, **options: int) -> Tuple[int, float, float]:
+    """
+    Runs one engine on a freshly parsed map 'repeat' times.
+
+    Returns:
+        Tuple[int, float, float]: Turns, best construction time and best
+        simulation time, in seconds.
+    """
+    turns = 0
+    build = simulate = float("inf")
+    for _ in range(repeat):
+        graph, drones, paths, valid_map = load(path)
+        start = time.perf_counter()
+        sim = engine(graph, paths, drones, **options)
+        built = time.perf_counter()
+        turns = sim.start_simulation(valid_map, io.StringIO())
+        build = min(build, built - start)
+        simulate = min(simulate, time.perf_counter() - built)
+    return turns, build, simulate
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    arg_parser.add_argument("maps", nargs="*",
+                            help="maps to run (default: every bundled map)")
+    arg_parser.add_argument("--window", type=int, default=8,
+                            help="ticks covered by the reservations")
+    arg_parser.add_argument("--repeat", type=int, default=3,
+                            help="runs per engine, the best time is kept")
+    args = arg_parser.parse_args()
+    os.chdir(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    maps = args.maps or sorted(glob.glob("maps/*/*.txt"))
+
+    print(f"{'map':<45} {'advance':>8} {'whca':>5} {'simulate':>10} "
+          f"{'plan':>10} {'playback':>10}")
+    totals = [0, 0]
+    for path in maps:
+        turns, _, simulate = run(path, AdvanceSimulator, args.repeat)
+        planned, plan, playback = run(path, ReservationSimulator,
+                                      args.repeat, window=args.window)
+        totals[0] += turns
+        totals[1] += planned
+        print(f"{path:<45} {turns:>8} {planned:>5} "
+              f"{simulate * 1000:>8.2f}ms {plan * 1000:>8.2f}ms "
+              f"{playback * 1000:>8.2f}ms")
+    print(f"{'total':<45} {totals[0]:>8} {totals[1]:>5}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,333 @@
+"""
+End-to-end benchmark suite with recorded baselines.
+
+Times every stage of a headless run (MapParser.parse, prune_graph, DFS,
+create_valid_graph + sort_map_by_priority, AdvanceSimulator) on the
+bundled maps and on generated large maps, plus the pure-buffer rendering
+primitives (ImageScaler.process, ShapeGenerator.connect_two_square,
+TxtToImage.print_txt) on in-memory images, so no window or mlx install
+is needed. Results are written as JSON with the machine description and
+can be compared against a stored baseline, failing when a stage got
+slower than the threshold allows.
+
+Before timing anything, the schedule of every engine (the -s names of
+flyin.py) on every bundled map is recorded and replayed against the
+hub capacities, link capacities and the two-turn restricted hubs (see
+Schedule.check); the suite fails on any violation:
+
+    python benchmarks/suite.py --baseline benchmarks/baseline.json
+    python benchmarks/suite.py --update-baseline benchmarks/baseline.json
+"""
+from typing import Any, Callable, Dict, List, TYPE_CHECKING, cast
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(
+    __file__))))
+from flyin import SIMULATORS, load_simulator  # noqa: E402
+from src.parser.map_parser import MapParser  # noqa: E402
+from src.parser.map_generator import MapGenerator  # noqa: E402
+from src.simulator.path_finder import DepthFirstSearch  # noqa: E402
+from src.simulator.graph_pruning import prune_graph  # noqa: E402
+from src.simulator.simulation_engine import AdvanceSimulator  # noqa: E402
+from src.simulator.schedule import Schedule  # noqa: E402
+from src.simulator.helpers import (  # noqa: E402
+    create_valid_graph, sort_map_by_priority)
+from src.visualizer.mlx_tools.image_operations import (  # noqa: E402
+    ImgData, ImageScaler, TxtColorChanger, TxtToImage)
+from src.visualizer.mlx_tools.shape_maker import ShapeGenerator  # noqa: E402
+if TYPE_CHECKING:
+    from src.visualizer.mlx_tools.base_mlx import MlxVar
+
+BUNDLED_MAPS = [
+    "maps/easy/01_linear_path.txt",
+    "maps/easy/02_simple_fork.txt",
+    "maps/easy/03_basic_capacity.txt",
+    "maps/medium/01_dead_end_trap.txt",
+    "maps/medium/02_circular_loop.txt",
+    "maps/medium/03_priority_puzzle.txt",
+    "maps/hard/01_maze_nightmare.txt",
+    "maps/hard/02_capacity_hell.txt",
+    "maps/hard/03_ultimate_challenge.txt",
+    "maps/challenger/01_the_impossible_dream.txt",
+]
+
+# (name, topology, hubs, drones, density): large enough to dominate the
+# fixed costs, sparse enough for the exhaustive DFS to finish
+GENERATED_MAPS = [
+    ("generated/layered_2000", "layered", 2000, 200, 0.0),
+    ("generated/random_5000", "random", 5000, 100, 0.0),
+    ("generated/grid_64", "grid", 64, 50, 0.3),
+]
+
+Timings = Dict[str, Dict[str, float]]
+
+
+class BufferMlx:
+    """
+    Headless stand-in for the MLX state container.
+
+    Provides the two MLX calls the rendering primitives use
+    (mlx_new_image and mlx_get_data_addr) on plain bytearrays, with the
+    32 bits per pixel layout of the real library, plus the static
+    background TxtToImage wraps text against.
+    """
+    def __init__(self, w: int, h: int) -> None:
+        self.mlx = self
+        self.mlx_ptr = None
+        self.static_bg = self.new_image(w, h)
+
+    def mlx_new_image(self, mlx_ptr: Any, w: int, h: int) -> Any:
+        return bytearray(w * h * 4), w
+
+    def mlx_get_data_addr(self, img: Any) -> Any:
+        return memoryview(img[0]), 32, img[1] * 4, 0
+
+    def new_image(self, w: int, h: int) -> ImgData:
+        img = ImgData()
+        img.w, img.h = w, h
+        img.img = self.mlx_new_image(None, w, h)
+        img.data, img.bpp, img.sl, img.iformat = \
+            self.mlx_get_data_addr(img.img)
+        return img
+
+
+def best_of(repeat: int, stage: Callable[[], Any]) -> float:
+    """Returns the fastest of 'repeat' runs of a stage, in seconds."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        stage()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def bench_map(path: str, repeat: int) -> Dict[str, float]:
+    """
+    Times the headless pipeline stages on one map.
+
+    Every repetition runs the whole pipeline on a freshly parsed map (the
+    simulation mutates the zones), timing each stage on its own; the
+    best time of every stage is kept.
+    """
+    best: Dict[str, float] = {}
+
+    def record(stage: str, seconds: float) -> None:
+        best[stage] = min(best.get(stage, float("inf")), seconds)
+
+    for _ in range(repeat):
+        start = time.perf_counter()
+        map_parser = MapParser()
+        with contextlib.redirect_stdout(io.StringIO()):
+            map_parser.parse(path)
+        record("parse", time.perf_counter() - start)
+        graph = map_parser.get_map()
+        drones = map_parser.get_drone_num()
+        if graph is None or drones is None:
+            raise ValueError(f"{path}: {map_parser.error}")
+
+        start = time.perf_counter()
+        prune_graph(graph)
+        record("prune", time.perf_counter() - start)
+
+        start = time.perf_counter()
+        paths = DepthFirstSearch(graph).find_valid_paths()
+        record("dfs", time.perf_counter() - start)
+        if len(paths) == 0:
+            raise ValueError(f"{path}: no valid path")
+
+        start = time.perf_counter()
+        valid_map = create_valid_graph(list(graph.keys()), paths, graph)
+        valid_map = sort_map_by_priority(valid_map, graph)
+        record("graph", time.perf_counter() - start)
+
+        start = time.perf_counter()
+        sim = AdvanceSimulator(graph, paths, drones)
+        sim.start_simulation(valid_map, io.StringIO())
+        record("simulate", time.perf_counter() - start)
+    return best
+
+
+def check_schedules(maps: List[str]) -> List[str]:
+    """
+    Records every engine on every map and lists the rule violations of
+    the schedules, prefixed with the engine and the map.
+    """
+    violations: List[str] = []
+    for path in maps:
+        for simulator in SIMULATORS:
+            map_parser = MapParser()
+            with contextlib.redirect_stdout(io.StringIO()):
+                map_parser.parse(path)
+            graph = map_parser.get_map()
+            drones = map_parser.get_drone_num()
+            if graph is None or drones is None:
+                raise ValueError(f"{path}: {map_parser.error}")
+            finder = DepthFirstSearch(graph, prune=True)
+            paths = list(finder.iter_paths())
+            valid_map = create_valid_graph(finder.names, paths, graph)
+            valid_map = sort_map_by_priority(valid_map, graph)
+            sim = load_simulator(simulator)(graph, paths, drones)
+            with contextlib.redirect_stderr(io.StringIO()):
+                schedule = Schedule.record(sim, valid_map, drones)
+            violations.extend(f"{simulator} {path}: {error}"
+                              for error in schedule.check(sim.compiled))
+        print(f"{path:<45} schedules checked")
+    return violations
+
+
+def bench_rendering(repeat: int) -> Dict[str, float]:
+    """Times the rendering primitives on in-memory image buffers."""
+    buffers = BufferMlx(800, 600)
+    mlx = cast("MlxVar", buffers)
+    sprite = buffers.new_image(120, 120)
+    for pos in range(0, len(sprite.data or b""), 12):
+        if sprite.data is not None:
+            sprite.data[pos:pos + 4] = (0xFF00FF00).to_bytes(4, "little")
+    glyphs = {}
+    for letter in "ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789:- ":
+        glyph = buffers.new_image(10, 14)
+        if glyph.data is not None:
+            glyph.data[4 * ord(letter) % len(glyph.data):][:4] = \
+                b"\xff\xff\xff\xff"
+        glyphs[letter] = glyph
+    canvas = buffers.new_image(800, 600)
+
+    def print_label() -> None:
+        renderer = TxtToImage(glyphs, {})
+        renderer.add_stages(ImageScaler())
+        renderer.add_stages(TxtColorChanger())
+        renderer.print_txt(mlx, canvas, "TOTAL TURNS: 42 D12-HUB7",
+                           (10, 10), 1.5, 0xFFFFFF00, 0xFF000000)
+
+    return {
+        "image_scaler": best_of(repeat, lambda: ImageScaler().process(
+            mlx, sprite, 2.0)),
+        "connect_two_square": best_of(
+            repeat, lambda: ShapeGenerator.connect_two_square(
+                mlx, canvas, (60, 60), (460, 360), 20)),
+        "print_txt": best_of(repeat, print_label),
+    }
+
+
+def machine_info() -> Dict[str, Any]:
+    """Describes the machine and interpreter the results come from."""
+    return {
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "processor": platform.processor(),
+        "cpus": os.cpu_count(),
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+    }
+
+
+def run_suite(repeat: int) -> Timings:
+    """Runs every benchmark and returns the timings per group and stage."""
+    results: Timings = {}
+    for path in BUNDLED_MAPS:
+        results[path] = bench_map(path, repeat)
+        print_group(path, results[path])
+    with tempfile.TemporaryDirectory() as directory:
+        for name, topology, hubs, drones, density in GENERATED_MAPS:
+            path = os.path.join(directory, os.path.basename(name) + ".txt")
+            MapGenerator(hubs, drones, density, seed=1).generate(
+                topology).write(path)
+            results[name] = bench_map(path, repeat)
+            print_group(name, results[name])
+    results["rendering"] = bench_rendering(repeat)
+    print_group("rendering", results["rendering"])
+    return results
+
+
+def print_group(group: str, timings: Dict[str, float]) -> None:
+    stages = " ".join(f"{stage}={seconds * 1000:.2f}ms"
+                      for stage, seconds in timings.items())
+    print(f"{group:<45} {stages}")
+
+
+def compare(results: Timings, baseline: Timings, threshold: float,
+            floor: float) -> List[str]:
+    """
+    Lists the stages slower than their baseline.
+
+    A stage regresses when it takes more than (1 + threshold) times its
+    baseline time and at least 'floor' seconds more, so timer noise on
+    sub-millisecond stages is ignored. Stages missing from either side
+    are skipped.
+    """
+    regressions = []
+    for group, timings in results.items():
+        for stage, seconds in timings.items():
+            reference = baseline.get(group, {}).get(stage)
+            if reference is None:
+                continue
+            if seconds > reference * (1 + threshold) and \
+                    seconds - reference >= floor:
+                regressions.append(
+                    f"{group} {stage}: {seconds * 1000:.2f}ms "
+                    f"(baseline {reference * 1000:.2f}ms, "
+                    f"+{(seconds / reference - 1) * 100:.0f}%)")
+    return regressions
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    arg_parser.add_argument("-o", "--output", metavar="FILE",
+                            help="write the results as JSON to FILE")
+    arg_parser.add_argument("--baseline", metavar="FILE",
+                            help="fail when a stage regresses against the "
+                            "results stored in FILE")
+    arg_parser.add_argument("--update-baseline", metavar="FILE",
+                            help="store the results as the new baseline")
+    arg_parser.add_argument("--threshold", type=float, default=0.5,
+                            help="allowed slowdown ratio (0.5 = +50%%)")
+    arg_parser.add_argument("--floor", type=float, default=0.002,
+                            help="ignore slowdowns under this many seconds")
+    arg_parser.add_argument("--repeat", type=int, default=5,
+                            help="runs per stage, the best one is kept")
+    arg_parser.add_argument("--skip-check", action="store_true",
+                            help="do not check the engine schedules")
+    args = arg_parser.parse_args()
+    os.chdir(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+    if not args.skip_check:
+        violations = check_schedules(["default_map.txt"] + BUNDLED_MAPS)
+        for violation in violations:
+            print(f"Invalid schedule: {violation}", file=sys.stderr)
+        if len(violations) > 0:
+            sys.exit(1)
+
+    report = {"machine": machine_info(),
+              "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+              "repeat": args.repeat,
+              "results": run_suite(args.repeat)}
+    for path in (args.output, args.update_baseline):
+        if path is not None:
+            with open(path, "w") as output:
+                json.dump(report, output, indent=2)
+                output.write("\n")
+
+    if args.baseline is not None:
+        with open(args.baseline) as file:
+            baseline = json.load(file)
+        regressions = compare(report["results"], baseline["results"],
+                              args.threshold, args.floor)
+        if baseline["machine"] != report["machine"]:
+            print("Warning: the baseline was recorded on another machine",
+                  file=sys.stderr)
+        for regression in regressions:
+            print(f"Regression: {regression}", file=sys.stderr)
+        if len(regressions) > 0:
+            sys.exit(1)
+        print("No regression against the baseline", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
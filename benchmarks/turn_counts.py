@@ -0,0 +1,112 @@
+"""
+Turn counts of the simulation engines on the bundled maps.
+
+Runs every selected engine (the -s names of flyin.py) headless on
+default_map.txt and every bundled map (or on the given maps) and prints
+the turns each one needs. The counts can be stored and compared against
+a stored baseline, showing the turns won or lost per map and failing
+when an engine needs more turns on any of them:
+
+    python benchmarks/turn_counts.py --baseline benchmarks/turns.json
+    python benchmarks/turn_counts.py --update-baseline benchmarks/turns.json
+"""
+from typing import Dict, List
+import argparse
+import contextlib
+import glob
+import io
+import json
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(
+    __file__))))
+from flyin import SIMULATORS, load_simulator  # noqa: E402
+from src.parser.map_parser import MapParser  # noqa: E402
+from src.simulator.path_finder import DepthFirstSearch  # noqa: E402
+from src.simulator.helpers import (  # noqa: E402
+    create_valid_graph, sort_map_by_priority)
+
+Turns = Dict[str, Dict[str, int]]
+
+
+def count_turns(path: str, simulator: str) -> int:
+    """Runs one engine on a freshly parsed map and returns its turns."""
+    map_parser = MapParser()
+    with contextlib.redirect_stdout(io.StringIO()):
+        map_parser.parse(path)
+    graph = map_parser.get_map()
+    drones = map_parser.get_drone_num()
+    if graph is None or drones is None:
+        raise ValueError(f"{path}: {map_parser.error}")
+    finder = DepthFirstSearch(graph, prune=True)
+    paths = list(finder.iter_paths())
+    valid_map = create_valid_graph(finder.names, paths, graph)
+    valid_map = sort_map_by_priority(valid_map, graph)
+    sim = load_simulator(simulator)(graph, paths, drones)
+    with contextlib.redirect_stderr(io.StringIO()):
+        return sim.start_simulation(valid_map, io.StringIO())
+
+
+def compare(results: Turns, baseline: Turns) -> List[str]:
+    """Lists the maps an engine needs more turns on than its baseline."""
+    regressions = []
+    for simulator, turns in results.items():
+        for path, count in turns.items():
+            reference = baseline.get(simulator, {}).get(path)
+            if reference is not None and count > reference:
+                regressions.append(f"{simulator} {path}: {count} turns "
+                                   f"(baseline {reference})")
+    return regressions
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    arg_parser.add_argument("maps", nargs="*",
+                            help="maps to run (default: default_map.txt "
+                            "and every bundled map)")
+    arg_parser.add_argument("-s", "--simulators", nargs="+",
+                            choices=SIMULATORS, default=SIMULATORS)
+    arg_parser.add_argument("--baseline", metavar="FILE",
+                            help="show the difference with the turns "
+                            "stored in FILE, fail on any increase")
+    arg_parser.add_argument("--update-baseline", metavar="FILE",
+                            help="store the turns as the new baseline")
+    args = arg_parser.parse_args()
+    os.chdir(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+    baseline: Turns = {}
+    if args.baseline is not None:
+        with open(args.baseline) as file:
+            baseline = json.load(file)
+    results: Turns = {}
+    maps = args.maps or \
+        ["default_map.txt"] + sorted(glob.glob("maps/*/*.txt"))
+    print(f"{'map':<45} " + " ".join(f"{name:>12}"
+                                     for name in args.simulators))
+    for path in maps:
+        cells = []
+        for simulator in args.simulators:
+            turns = count_turns(path, simulator)
+            results.setdefault(simulator, {})[path] = turns
+            reference = baseline.get(simulator, {}).get(path)
+            cell = str(turns)
+            if reference is not None and reference != turns:
+                cell += f" ({turns - reference:+d})"
+            cells.append(f"{cell:>12}")
+        print(f"{path:<45} " + " ".join(cells))
+    print(f"{'total':<45} " + " ".join(
+        f"{sum(results[name].values()):>12}" for name in args.simulators))
+
+    if args.update_baseline is not None:
+        with open(args.update_baseline, "w") as output:
+            json.dump(results, output, indent=2)
+            output.write("\n")
+    regressions = compare(results, baseline)
+    for regression in regressions:
+        print(f"Regression: {regression}", file=sys.stderr)
+    if len(regressions) > 0:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
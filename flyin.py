@@ -1,13 +1,14 @@
-from typing import List
+from typing import Dict, List, Type
+import argparse
 import sys
+from src.parser.map_constructor import Zone
 from src.parser.map_parser import MapParser
-from src.simulator.path_finder import DepthFirstSearch
-from src.simulator.simulation_engine import AdvanceSimulator
-from src.visualizer.map_visualizer import ConstantParameters, GraphVisualizer
-from src.visualizer.mlx_tools.image_operations import (
-    ImageScaler, ImageOperations)
+from src.simulator.path_finder import (
+    Path, PathFinder, DepthFirstSearch, KShortestPaths)
+from src.simulator.simulation_engine import Simulator, AdvanceSimulator
+from src.simulator.schedule import (
+    Schedule, ScheduledSimulator, compile_schedule)
 from src.simulator.helpers import (
-    format_valid_paths_into_list,
     create_valid_graph,
     sort_map_by_priority,
     get_min_max_coordinates_from_map,
@@ -43,43 +44,271 @@ def all_map_paths(path_no: int) -> str:
     return paths[path_no]
 
 
+SIMULATORS = ["advance", "event", "vector", "flow", "routing",
+              "reservation", "aggregate"]
+
+
+def load_simulator(name: str) -> Type[Simulator]:
+    """Returns the simulation engine class matching a --simulator name."""
+    if name == "event":
+        from src.simulator.event_simulator import EventSimulator
+        return EventSimulator
+    if name == "vector":
+        # imported here so numpy is only loaded by the engine needing it
+        from src.simulator.vector_simulator import VectorSimulator
+        return VectorSimulator
+    if name == "flow":
+        from src.simulator.flow_planner import FlowSimulator
+        return FlowSimulator
+    if name == "routing":
+        from src.simulator.routing_simulator import RoutingSimulator
+        return RoutingSimulator
+    if name == "reservation":
+        from src.simulator.reservation_planner import ReservationSimulator
+        return ReservationSimulator
+    if name == "aggregate":
+        from src.simulator.aggregate_simulator import AggregateSimulator
+        return AggregateSimulator
+    return AdvanceSimulator
+
+
+def parse_arguments() -> argparse.Namespace:
+    """Parses the command line options of the simulator."""
+    arg_parser = argparse.ArgumentParser(
+        description="FLYIN drone swarm simulator")
+    arg_parser.add_argument("map", nargs="?", default="default_map.txt",
+                            help="path of the map file ('-' reads stdin, "
+                            ".gz/.xz/.bz2 files are decompressed on the fly)")
+    arg_parser.add_argument("-k", "--k-paths", type=int, default=None,
+                            help="only use the K cheapest paths "
+                            "(k-shortest paths search instead of DFS)")
+    arg_parser.add_argument("--max-paths", type=int, default=None,
+                            help="stop the path search after N routes")
+    arg_parser.add_argument("--max-cost", type=float, default=None,
+                            help="ignore routes costing more than COST")
+    arg_parser.add_argument("--time-budget", type=float, default=None,
+                            metavar="SECONDS",
+                            help="stop the path search after SECONDS and "
+                            "use the routes found so far")
+    arg_parser.add_argument("-s", "--simulator", choices=SIMULATORS,
+                            default="advance",
+                            help="simulation engine moving the drones "
+                            "('aggregate' follows the 'routing' rules "
+                            "without congestion term, so its turn counts "
+                            "match that engine, not 'advance')")
+    arg_parser.add_argument("--window", type=window_ticks, default=8,
+                            metavar="TICKS",
+                            help="ticks every drone reserves ahead with "
+                            "-s reservation (default: 8)")
+    arg_parser.add_argument("--headless", action="store_true",
+                            help="run the simulation without visualizer and "
+                            "print the moves of every turn to stdout")
+    arg_parser.add_argument("--save-schedule", metavar="FILE",
+                            help="write the computed move schedule to FILE")
+    arg_parser.add_argument("--schedule", metavar="FILE",
+                            help="replay a schedule saved with "
+                            "--save-schedule instead of simulating")
+    arg_parser.add_argument("--cache", action="store_true",
+                            help="load the map from its compiled .flyc "
+                            "cache when up to date, write it otherwise")
+    arg_parser.add_argument("--cache-dir", metavar="DIR", default=None,
+                            help="store the map caches in DIR instead of "
+                            "next to the maps (implies --cache)")
+    return arg_parser.parse_args()
+
+
+def positive_int(value: str) -> int:
+    """argparse type accepting integers of at least 1."""
+    try:
+        number = int(value)
+    except ValueError:
+        number = 0
+    if number < 1:
+        raise argparse.ArgumentTypeError(
+            f"expected a positive integer, got '{value}'")
+    return number
+
+
+def window_ticks(value: str) -> int:
+    """argparse type accepting reservation windows of at least 2 ticks."""
+    number = positive_int(value)
+    if number < 2:
+        raise argparse.ArgumentTypeError(
+            f"the window must cover at least 2 ticks, got '{value}'")
+    return number
+
+
+def positive_float(value: str) -> float:
+    """argparse type accepting finite numbers above 0."""
+    try:
+        number = float(value)
+    except ValueError:
+        number = 0.0
+    if not 0 < number < float("inf"):
+        raise argparse.ArgumentTypeError(
+            f"expected a positive number, got '{value}'")
+    return number
+
+
+def parse_validate_arguments(argv: List[str]) -> argparse.Namespace:
+    """Parses the options of 'flyin.py validate DIR'."""
+    arg_parser = argparse.ArgumentParser(
+        prog="flyin.py validate",
+        description="Validate every map of a directory in parallel")
+    arg_parser.add_argument("directory", help="directory searched "
+                            "recursively for .txt/.gz/.xz/.bz2 maps")
+    arg_parser.add_argument("-o", "--output", metavar="FILE", default=None,
+                            help="write the report to FILE instead of "
+                            "stdout")
+    arg_parser.add_argument("-f", "--format", choices=["json", "csv"],
+                            default=None, help="report format (default: "
+                            "from the output extension, else json)")
+    arg_parser.add_argument("-t", "--timeout", type=positive_float,
+                            default=30.0, help="seconds allowed per map")
+    arg_parser.add_argument("-j", "--jobs", type=positive_int, default=None,
+                            help="worker processes (default: all cores)")
+    return arg_parser.parse_args(argv)
+
+
+def run_validate(args: argparse.Namespace) -> None:
+    """
+    Validates all maps of a directory over a process pool and writes a
+    JSON or CSV report; a summary line goes to stderr.
+    """
+    # imported here so the simulator never loads multiprocessing
+    from src.parser.map_validator import (
+        find_maps, validate_maps, summarize, write_report)
+    maps = find_maps(args.directory)
+    if len(maps) == 0:
+        print(f"Error: no map found in '{args.directory}'", file=sys.stderr)
+        return
+    results = validate_maps(maps, args.timeout, args.jobs)
+    report_format = args.format
+    if report_format is None:
+        report_format = "csv" if args.output is not None and \
+            args.output.endswith(".csv") else "json"
+    if args.output is None:
+        write_report(results, sys.stdout, report_format)
+    else:
+        with open(args.output, "w", newline="") as output:
+            write_report(results, output, report_format)
+    summary = summarize(results)
+    print(f"{summary['maps']} maps: {summary['valid']} valid, "
+          f"{summary['invalid']} invalid, {summary['timeout']} timed out",
+          file=sys.stderr)
+
+
+def build_simulator(args: argparse.Namespace, map: Dict[str, Zone],
+                    paths: List[Path], valid_map: Dict[str, List],
+                    drones: int) -> Simulator:
+    """
+    Creates the simulator selected on the command line.
+
+    The visualizer (and --save-schedule) get a ScheduledSimulator: the
+    selected engine is run to completion first and its moves are only
+    replayed while rendering. --schedule replays a saved schedule
+    without running any engine.
+    """
+    if args.schedule is not None:
+        return ScheduledSimulator(map, paths, drones,
+                                  Schedule.load(args.schedule))
+    sim: Simulator
+    if args.simulator == "reservation":
+        from src.simulator.reservation_planner import ReservationSimulator
+        sim = ReservationSimulator(map, paths, drones, window=args.window)
+    else:
+        sim = load_simulator(args.simulator)(
+            graph=map, valid_paths=paths, drones=drones)
+    if args.headless and args.save_schedule is None:
+        return sim
+    schedule, player = compile_schedule(sim, valid_map, drones)
+    if args.save_schedule is not None:
+        schedule.save(args.save_schedule)
+    return player
+
+
+def run_headless(sim: Simulator, valid_map: Dict[str, List]) -> None:
+    """
+    Runs the simulation to completion without any graphical dependency.
+
+    The moves of every turn are streamed to stdout through a large write
+    buffer; the summary (turn count and per-drone cost) goes to stderr so
+    stdout only contains move lines.
+    """
+    sys.stdout.flush()
+    with open(sys.stdout.fileno(), "w", buffering=1 << 16,
+              closefd=False) as output:
+        turns = sim.start_simulation(valid_map, output)
+    costs = " ".join(f"{drone.name}:{drone.total_moves}"
+                     for drone in sim.get_drones())
+    print(f"Total turns: {turns}", file=sys.stderr)
+    print(f"Cost per drone: {costs}", file=sys.stderr)
+
+
+def run_visualizer(file_path: str, map: Dict[str, Zone],
+                   valid_map: Dict[str, List], sim: Simulator) -> None:
+    """Opens the MLX window and animates the simulation."""
+    # imported here so the headless mode never loads mlx
+    from src.visualizer.map_visualizer import (
+        ConstantParameters, GraphVisualizer)
+    from src.visualizer.mlx_tools.image_operations import (
+        ImageScaler, ImageOperations)
+    drones = sim.get_drones()
+    const = ConstantParameters()
+    w, h = calculate_window_size(
+        const, get_min_max_coordinates_from_map(map))
+    graph_visual = GraphVisualizer(file_path, map, w, h, valid_map,
+                                   sim, drones, const)
+
+    my_mlx = graph_visual.get_mlx()
+    raw_img = ImageOperations.xmp_to_img(
+        my_mlx, "images/drone2.xpm")
+    drone_img_scaler = ImageScaler()
+    img = drone_img_scaler.process(my_mlx, raw_img, 0.05)
+    my_mlx.mlx.mlx_destroy_image(my_mlx.mlx_ptr, raw_img.img)
+    if img is not None:
+        graph_visual.set_drone_image(img)
+    graph_visual.generate_header()
+    graph_visual.generate_map(valid_map)
+    graph_visual.start_mlx()
+    graph_visual.clean_mlx()
+
+
 def main() -> None:
+    if len(sys.argv) > 1 and sys.argv[1] == "validate":
+        run_validate(parse_validate_arguments(sys.argv[2:]))
+        return
+    args = parse_arguments()
     try:
-        file_path = sys.argv[1] if len(sys.argv) > 1 else "default_map.txt"
+        file_path = args.map
         map_parser = MapParser()
-        map_parser.parse(file_path)
+        map_parser.parse(file_path,
+                         use_cache=args.cache or args.cache_dir is not None,
+                         cache_dir=args.cache_dir)
         # map_parser.show_map()
         drone_counts = map_parser.get_drone_num()
         map = map_parser.get_map()
         if map is not None and drone_counts is not None:
-            dfs = DepthFirstSearch(map)
-            paths = dfs.find_valid_paths()
+            path_finder: PathFinder
+            if args.k_paths is not None:
+                path_finder = KShortestPaths(map, prune=True, k=args.k_paths)
+            else:
+                path_finder = DepthFirstSearch(map, prune=True)
+            print(path_finder.pruning, file=sys.stderr)
+            paths = list(path_finder.iter_paths(
+                args.max_paths, args.max_cost, args.time_budget))
+            if path_finder.stop_reason is not None:
+                print(f"Path search stopped ({path_finder.stop_reason}) "
+                      f"after {len(paths)} routes", file=sys.stderr)
             if len(paths) > 0:
-                new_paths = format_valid_paths_into_list(paths)
-                hubs_name = list(map.keys())
-                valid_map = create_valid_graph(hubs_name, new_paths)
+                valid_map = create_valid_graph(path_finder.names, paths, map)
                 valid_map = sort_map_by_priority(valid_map, map)
-                sim = AdvanceSimulator(graph=map, valid_paths=paths,
-                                       drones=drone_counts)
-                drones = sim.get_drones()
-                const = ConstantParameters()
-                w, h = calculate_window_size(
-                    const, get_min_max_coordinates_from_map(map))
-                graph_visual = GraphVisualizer(file_path, map, w, h, valid_map,
-                                               sim, drones, const)
-
-                my_mlx = graph_visual.get_mlx()
-                raw_img = ImageOperations.xmp_to_img(
-                    my_mlx, "images/drone2.xpm")
-                drone_img_scaler = ImageScaler()
-                img = drone_img_scaler.process(my_mlx, raw_img, 0.05)
-                my_mlx.mlx.mlx_destroy_image(my_mlx.mlx_ptr, raw_img.img)
-                if img is not None:
-                    graph_visual.set_drone_image(img)
-                graph_visual.generate_header()
-                graph_visual.generate_map(valid_map)
-                graph_visual.start_mlx()
-                graph_visual.clean_mlx()
+                sim = build_simulator(args, map, paths, valid_map,
+                                      drone_counts)
+                if args.headless:
+                    run_headless(sim, valid_map)
+                else:
+                    run_visualizer(file_path, map, valid_map, sim)
             else:
                 print("Error: There is no valid path to reach from "
                       "start to goal")
@@ -0,0 +1,149 @@
+from typing import Dict, List, Tuple
+from array import array
+import heapq
+from src.parser.map_constructor import Zone, Link, ZoneTypes
+
+
+# Integer codes used in CompiledGraph.zone_type
+NORMAL = 0
+PRIORITY = 1
+RESTRICTED = 2
+BLOCKED = 3
+
+ZONE_CODES: Dict[ZoneTypes, int] = {
+    ZoneTypes.normal: NORMAL,
+    ZoneTypes.priority: PRIORITY,
+    ZoneTypes.restricted: RESTRICTED,
+    ZoneTypes.blocked: BLOCKED,
+}
+
+
+class CompiledGraph:
+    """
+    Integer-indexed, read-only snapshot of the parsed hub graph.
+
+    Hub names are interned to consecutive ids (in map declaration order)
+    and the outgoing links are stored in CSR form: the links of hub 'u'
+    are the edge indices 'offsets[u]' to 'offsets[u + 1]', and
+    'targets[e]' is the destination hub id of edge 'e'. All per-hub and
+    per-link attributes live in flat arrays so hot loops only do integer
+    indexing. The id of every hub is also written to 'Zone.idx', so code
+    holding a Zone object can reach its row without a dictionary lookup.
+
+    Attributes:
+        names (List[str]): Hub name of every id.
+        ids (Dict[str, int]): Hub name to id lookup.
+        zones (List[Zone]): Zone object of every id.
+        links (List[Link]): Link object of every edge index.
+        offsets (array): CSR row offsets, one more entry than hubs.
+        targets (array): Destination hub id of every edge.
+        link_capacity (array): 'max_link_capacity' of every edge.
+        zone_cost (array): Turns needed to enter every hub.
+        zone_type (array): ZONE_CODES value of every hub.
+        hub_capacity (array): 'max_drones' of every hub.
+        start (int): Id of the start hub (-1 if missing).
+        end (int): Id of the end hub (-1 if missing).
+    """
+    def __init__(self, graph: Dict[str, Zone]) -> None:
+        self.names: List[str] = list(graph.keys())
+        self.ids: Dict[str, int] = {}
+        self.zones: List[Zone] = []
+        self.links: List[Link] = []
+        self.offsets = array("i", [0])
+        self.targets = array("i")
+        self.link_capacity = array("i")
+        self.zone_cost = array("i")
+        self.zone_type = array("b")
+        self.hub_capacity = array("i")
+        self.start = -1
+        self.end = -1
+        self._edges: Dict[int, int] = {}
+
+        for idx, name in enumerate(self.names):
+            zone = graph[name]
+            zone.idx = idx
+            self.ids[name] = idx
+            self.zones.append(zone)
+            self.zone_cost.append(zone.cost)
+            self.zone_type.append(ZONE_CODES[zone.zone_type])
+            self.hub_capacity.append(zone.capacity)
+            if zone.hub_type.value == "start":
+                self.start = idx
+            elif zone.hub_type.value == "end":
+                self.end = idx
+
+        for idx, zone in enumerate(self.zones):
+            for link in zone.links:
+                target = self.ids[link.target.name]
+                self._edges[idx * len(self.names) + target] = \
+                    len(self.targets)
+                self.targets.append(target)
+                self.link_capacity.append(link.capacity)
+                self.links.append(link)
+            self.offsets.append(len(self.targets))
+
+    def __len__(self) -> int:
+        """Returns the number of hubs."""
+        return len(self.names)
+
+    def neighbours(self, hub: int) -> range:
+        """Returns the edge indices of the outgoing links of a hub."""
+        return range(self.offsets[hub], self.offsets[hub + 1])
+
+    def edge_index(self, source: int, target: int) -> int:
+        """Returns the edge index of the source->target link, or -1."""
+        return self._edges.get(source * len(self.names) + target, -1)
+
+    def is_blocked(self, hub: int) -> bool:
+        """Checks whether a hub can never be entered."""
+        return self.zone_type[hub] == BLOCKED
+
+    def travel_times(self, forward: bool) -> List[float]:
+        """
+        Returns the minimum number of ticks from the start hub to every
+        hub (forward) or from every hub to the end hub (backward),
+        ignoring capacities. Blocked hubs are unreachable.
+        """
+        origin = self.start if forward else self.end
+        times: List[float] = [float("inf")] * len(self)
+        if origin < 0:
+            return times
+        times[origin] = 0
+        queue: List[Tuple[float, int]] = [(0, origin)]
+        while queue:
+            t, hub = heapq.heappop(queue)
+            if t > times[hub]:
+                continue
+            if forward:
+                steps = [(self.targets[edge], self.targets[edge])
+                         for edge in self.neighbours(hub)]
+            else:
+                steps = [(self.ids[prev], hub)
+                         for prev in self.zones[hub].incoming]
+            for nxt, entered in steps:
+                if self.is_blocked(nxt) or self.is_blocked(entered):
+                    continue
+                nt = t + self.zone_cost[entered]
+                if nt < times[nxt]:
+                    times[nxt] = nt
+                    heapq.heappush(queue, (nt, nxt))
+        return times
+
+    def next_hop_links(self,
+                       valid_map: Dict[str, List[str]]) -> List[List[Link]]:
+        """
+        Resolves a prioritized next-hop map into Link objects per hub id.
+
+        Entries without a matching link are dropped, which mirrors how the
+        simulators skip them when they look a hub name up in
+        'Zone.link_index'.
+        """
+        hops: List[List[Link]] = [[] for _ in self.names]
+        for name, next_hubs in valid_map.items():
+            source = self.ids[name]
+            zone = self.zones[source]
+            for hub_name in next_hubs:
+                link = zone.get_link(hub_name)
+                if link is not None:
+                    hops[source].append(link)
+        return hops
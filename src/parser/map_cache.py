@@ -0,0 +1,181 @@
+from typing import Dict, List, Tuple
+import hashlib
+import mmap
+import os
+import struct
+import sys
+from array import array
+from src.parser.map_constructor import Zone, StartZone, EndZone
+from src.parser.compiled_graph import ZONE_CODES
+
+
+CACHE_SUFFIX = ".flyc"
+MAGIC = b"FLYC"
+VERSION = 1
+# magic, version, sha256 of the map file, drones, hubs, links, text size
+HEADER = struct.Struct("<4sH32sIIII")
+# x, y, hub kind, zone code, capacity, name offset/size, color offset/size
+HUB = struct.Struct("<iiBBxxiIIII")
+NO_COLOR = 0xFFFFFFFF
+
+HUB_KINDS = ("middle", "start", "end")
+ZONE_NAMES = {code: zone_type.value for zone_type, code in ZONE_CODES.items()}
+
+
+def map_digest(path: str) -> bytes:
+    """Returns the SHA-256 digest of a map file, read in blocks."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for block in iter(lambda: file.read(1 << 16), b""):
+            digest.update(block)
+    return digest.digest()
+
+
+def cache_path(path: str, digest: bytes,
+               cache_dir: str | None = None) -> str:
+    """
+    Returns where the compiled cache of a map lives.
+
+    Next to the map ('map.txt.flyc') by default, or '<sha256>.flyc'
+    inside 'cache_dir' when one is given, so maps sharing a file name
+    never evict each other.
+    """
+    if cache_dir is None:
+        return path + CACHE_SUFFIX
+    return os.path.join(cache_dir, digest.hex() + CACHE_SUFFIX)
+
+
+def save_map_cache(file_path: str, digest: bytes, drones: int,
+                   hubs: Dict[str, Zone]) -> None:
+    """
+    Writes a validated graph in the compact binary layout.
+
+    The file holds a header, one fixed-size record per hub, the links in
+    CSR form (row offsets, target hub ids, capacities) and a text block
+    with the hub names and colors. It is written to a temporary file
+    first and renamed, so a reader never sees a partial cache.
+
+    Args:
+        file_path (str): Destination of the cache.
+        digest (bytes): SHA-256 of the map file the graph comes from.
+        drones (int): Number of drones of the map.
+        hubs (Dict[str, Zone]): The validated hub graph.
+    """
+    ids = {name: idx for idx, name in enumerate(hubs)}
+    text = bytearray()
+    records = bytearray()
+    offsets = array("I", [0])
+    targets = array("I")
+    capacities = array("I")
+    for zone in hubs.values():
+        name = zone.name.encode("utf-8")
+        name_offset = len(text)
+        text += name
+        color_offset, color_size = NO_COLOR, 0
+        if zone.color is not None:
+            color = zone.color.encode("utf-8")
+            color_offset, color_size = len(text), len(color)
+            text += color
+        records += HUB.pack(zone.coordinates[0], zone.coordinates[1],
+                            HUB_KINDS.index(zone.hub_type.value),
+                            ZONE_CODES[zone.zone_type], zone.capacity,
+                            name_offset, len(name), color_offset,
+                            color_size)
+        for link in zone.links:
+            targets.append(ids[link.target.name])
+            capacities.append(link.capacity)
+        offsets.append(len(targets))
+
+    columns = [offsets, targets, capacities]
+    if sys.byteorder != "little":
+        for column in columns:
+            column.byteswap()
+    directory = os.path.dirname(file_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    temp_path = f"{file_path}.{os.getpid()}.tmp"
+    with open(temp_path, "wb") as file:
+        file.write(HEADER.pack(MAGIC, VERSION, digest, drones, len(hubs),
+                               len(targets), len(text)))
+        file.write(records)
+        for column in columns:
+            file.write(column.tobytes())
+        file.write(text)
+    os.replace(temp_path, file_path)
+
+
+def load_map_cache(file_path: str, digest: bytes
+                   ) -> Tuple[int, Dict[str, Zone]] | None:
+    """
+    Rebuilds the graph stored by save_map_cache, without any validation.
+
+    The file is memory-mapped and decoded in place. A missing, corrupt or
+    outdated cache (written for another version of the map file) is
+    ignored.
+
+    Returns:
+        Tuple[int, Dict[str, Zone]] | None: The drone count and the hub
+        graph, or None if the cache can not be used.
+    """
+    try:
+        with open(file_path, "rb") as file:
+            if os.fstat(file.fileno()).st_size < HEADER.size:
+                return None
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                return _decode(mm, digest)
+    except (OSError, ValueError, IndexError, KeyError, struct.error):
+        return None
+
+
+def _decode(mm: mmap.mmap, digest: bytes
+            ) -> Tuple[int, Dict[str, Zone]] | None:
+    """Decodes a mapped cache file, or returns None if it is stale."""
+    magic, version, sha, drones, hub_count, link_count, text_size = \
+        HEADER.unpack_from(mm, 0)
+    if magic != MAGIC or version != VERSION or sha != digest:
+        return None
+    records_at = HEADER.size
+    offsets_at = records_at + hub_count * HUB.size
+    targets_at = offsets_at + (hub_count + 1) * 4
+    capacities_at = targets_at + link_count * 4
+    text_at = capacities_at + link_count * 4
+    if text_at + text_size != len(mm):
+        return None
+
+    columns: List[array] = []
+    for start, count in ((offsets_at, hub_count + 1),
+                         (targets_at, link_count),
+                         (capacities_at, link_count)):
+        column = array("I")
+        column.frombytes(mm[start:start + count * 4])
+        if sys.byteorder != "little":
+            column.byteswap()
+        columns.append(column)
+    offsets, targets, capacities = columns
+    text = mm[text_at:text_at + text_size]
+
+    zones: List[Zone] = []
+    hubs: Dict[str, Zone] = {}
+    for (x, y, kind, zone_code, capacity, name_offset, name_size,
+         color_offset, color_size) in HUB.iter_unpack(
+            mm[records_at:offsets_at]):
+        name = text[name_offset:name_offset + name_size].decode("utf-8")
+        color = None
+        if color_offset != NO_COLOR:
+            color = text[color_offset:color_offset + color_size].decode(
+                "utf-8")
+        zone_type = ZONE_NAMES[zone_code]
+        zone: Zone
+        if HUB_KINDS[kind] == "start":
+            zone = StartZone(name, x, y, drones, zone_type, color)
+        elif HUB_KINDS[kind] == "end":
+            zone = EndZone(name, x, y, drones, zone_type, color)
+        else:
+            zone = Zone(name, x, y, zone_type, color, capacity)
+        zone.capacity = capacity
+        zones.append(zone)
+        hubs[name] = zone
+    for idx, zone in enumerate(zones):
+        for edge in range(offsets[idx], offsets[idx + 1]):
+            zone.add_link(zones[targets[edge]], capacities[edge])
+    return drones, hubs
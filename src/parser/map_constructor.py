@@ -1,4 +1,4 @@
-from typing import List, Optional
+from typing import Dict, List, Optional
 from enum import Enum
 from abc import ABC
 
@@ -26,6 +26,8 @@ class Link:
         simultaneously.
         occupancy (int): Current number of drones traversing this link.
     """
+    __slots__ = ("target", "capacity", "occupancy")
+
     def __init__(self, link: "Zone", link_capacity: int) -> None:
         self.target = link
         self.capacity = link_capacity
@@ -56,10 +58,20 @@ class Zone(ABC):
         etc.).
         cost (int): The time/turn weight required to traverse this hub.
         links (List[Link]): List of outgoing connections from this hub.
+        link_index (Dict[str, Link]): Outgoing link of every target hub
+        name.
+        incoming (Dict[str, Link]): Link of every source hub name leading
+        to this hub.
         occupancy (int): Current count of drones residing at or reserved for
         this hub.
         capacity (int): Total drone capacity allowed at this hub.
+        idx (int): Integer id assigned by CompiledGraph (-1 until the
+        graph is compiled).
     """
+    __slots__ = ("name", "coordinates", "hub_type", "zone_type", "color",
+                 "cost", "moves", "links", "link_index", "incoming",
+                 "occupancy", "is_movable", "capacity", "idx")
+
     def __init__(self, name: str, x: int, y: int,
                  zone_type: str = "normal",
                  color: Optional[str] = None,
@@ -72,9 +84,12 @@ class Zone(ABC):
         self.cost = 2 if zone_type == "restricted" else 1
         self.moves = 0
         self.links: List[Link] = []
+        self.link_index: Dict[str, Link] = {}
+        self.incoming: Dict[str, Link] = {}
         self.occupancy = 0
         self.is_movable = False
         self.capacity = capacity
+        self.idx = -1
 
     def update_color(self, color: str) -> None:
         """Update the color of the zone"""
@@ -104,7 +119,14 @@ class Zone(ABC):
 
     def add_link(self, link: 'Zone', link_capacity: int = 1) -> None:
         """Creates a new directed Link from this hub to a target hub."""
-        self.links.append(Link(link, link_capacity))
+        new_link = Link(link, link_capacity)
+        self.links.append(new_link)
+        self.link_index[link.name] = new_link
+        link.incoming[self.name] = new_link
+
+    def get_link(self, target_name: str) -> Link | None:
+        """Returns the outgoing link to a hub name in O(1), or None."""
+        return self.link_index.get(target_name)
 
 
 class StartZone(Zone):
@@ -114,6 +136,8 @@ class StartZone(Zone):
     The capacity is automatically set to the total number of drones
     to accommodate the entire swarm at t=0.
     """
+    __slots__ = ("zone_occupancy",)
+
     def __init__(self, name: str, x: int, y: int,
                  total_drones: int, zone: str = "normal",
                  color: str | None = None) -> None:
@@ -131,6 +155,8 @@ class EndZone(Zone):
     Acts as a sink for drones. The simulation typically terminates
     when the occupancy of this zone equals the total drone count.
     """
+    __slots__ = ()
+
     def __init__(self, name: str, x: int, y: int,
                  total_drones: int, zone: str = "normal",
                  color: str | None = None) -> None:
@@ -0,0 +1,325 @@
+from typing import Dict, Iterator, List, Set, Tuple
+from dataclasses import dataclass, field
+import argparse
+import random
+from src.parser.map_input import create_map
+
+
+TOPOLOGIES = ["grid", "layered", "random"]
+
+
+@dataclass
+class HubSpec:
+    """
+    One hub line of a generated map.
+
+    Attributes:
+        name (str): Hub name (never contains '-' or spaces).
+        x (int): Non-negative x coordinate.
+        y (int): y coordinate.
+        kind (str): 'start_hub', 'end_hub' or 'hub'.
+        zone (str): Zone type.
+        capacity (int): 'max_drones' (ignored for the start and end hubs).
+    """
+    name: str
+    x: int
+    y: int
+    kind: str = "hub"
+    zone: str = "normal"
+    capacity: int = 1
+
+    def line(self) -> str:
+        """Returns the map line declaring the hub."""
+        if self.kind != "hub":
+            return f"{self.kind}: {self.name} {self.x} {self.y}"
+        return f"hub: {self.name} {self.x} {self.y} " \
+               f"[zone={self.zone} max_drones={self.capacity}]"
+
+
+@dataclass
+class GeneratedMap:
+    """
+    A generated map: hubs in declaration order and directed connections
+    (source index, target index, link capacity).
+    """
+    drones: int
+    hubs: List[HubSpec] = field(default_factory=list)
+    connections: List[Tuple[int, int, int]] = field(default_factory=list)
+
+    def lines(self) -> Iterator[str]:
+        """Yields the lines of the map file, in the bundled maps' order."""
+        yield f"nb_drones: {self.drones}"
+        for hub in self.hubs:
+            yield hub.line()
+        for source, target, capacity in self.connections:
+            yield f"connection: {self.hubs[source].name}-" \
+                  f"{self.hubs[target].name} [max_link_capacity={capacity}]"
+
+    def write(self, path: str) -> None:
+        """Writes the map ('-' for stdout, compressed by extension)."""
+        with create_map(path) as output:
+            for line in self.lines():
+                output.write(line + "\n")
+
+
+class MapGenerator:
+    """
+    Deterministic generator of large valid maps.
+
+    Every map has a backbone path from the start to the end hub made of
+    forward connections through non-blocked hubs, so it always has a
+    solution; the rest of the graph adds alternatives, cycles, dead ends
+    and bottlenecks around it. The same parameters and seed always give
+    the same file.
+
+    Attributes:
+        hub_count (int): Approximate number of hubs (start/end included).
+        drones (int): Drone count of the map.
+        density (float): Extra connections per hub, relative to the
+        topology (0 gives the sparsest map).
+        seed (int): Seed of the random generator.
+        restricted (float): Share of middle hubs that are restricted.
+        priority (float): Share of middle hubs that are priority.
+        blocked (float): Share of off-backbone hubs that are blocked.
+        dead_ends (float): Share of hubs given a dead-end spur.
+        bottlenecks (int): Backbone hubs forced to capacity 1 (with
+        capacity-1 links into them).
+        max_capacity (int): Largest hub 'max_drones' and link capacity.
+    """
+    def __init__(self, hub_count: int, drones: int, density: float = 0.5,
+                 seed: int = 0, restricted: float = 0.1,
+                 priority: float = 0.1, blocked: float = 0.05,
+                 dead_ends: float = 0.05, bottlenecks: int = 1,
+                 max_capacity: int = 3) -> None:
+        if hub_count < 2:
+            raise ValueError("A map needs at least 2 hubs")
+        if drones < 1:
+            raise ValueError("A map needs at least 1 drone")
+        self.hub_count = hub_count
+        self.drones = drones
+        self.density = density
+        self.seed = seed
+        self.restricted = restricted
+        self.priority = priority
+        self.blocked = blocked
+        self.dead_ends = dead_ends
+        self.bottlenecks = bottlenecks
+        self.max_capacity = max_capacity
+        self.rng = random.Random(seed)
+        self._edges: Set[Tuple[int, int]] = set()
+        self._width = len(str(hub_count * 2))
+
+    def _name(self, prefix: str, *numbers: int) -> str:
+        """
+        Builds a hub name from zero-padded numbers.
+
+        All names of a map have the same shape, so no name is ever a
+        substring of a path written with the other names.
+        """
+        return prefix + "_".join(f"{number:0{self._width}d}"
+                                 for number in numbers)
+
+    def generate(self, topology: str) -> GeneratedMap:
+        """Builds a map of one of the TOPOLOGIES."""
+        self.rng = random.Random(f"{topology}:{self.seed}")
+        self._edges = set()
+        if topology == "grid":
+            return self.grid()
+        if topology == "layered":
+            return self.layered()
+        if topology == "random":
+            return self.random_graph()
+        raise ValueError(f"Unknown topology '{topology}'")
+
+    def grid(self) -> GeneratedMap:
+        """
+        Square-ish grid from the top-left to the bottom-right corner.
+
+        Right and down connections lead to the goal; with probability
+        'density' / 2 a connection points backwards instead, creating
+        cycles and dead ends. The top row and the last column stay
+        forward and form the backbone.
+        """
+        width = max(2, int(self.hub_count ** 0.5))
+        height = max(1, -(-self.hub_count // width))
+        game = GeneratedMap(self.drones)
+        for y in range(height):
+            for x in range(width):
+                game.hubs.append(HubSpec(self._name("g", x, y), x, y))
+        backbone = [x for x in range(width)] + \
+            [y * width + width - 1 for y in range(1, height)]
+        for y in range(height):
+            for x in range(width):
+                hub = y * width + x
+                for nxt, forced in ((hub + 1 if x + 1 < width else -1,
+                                     y == 0),
+                                    (hub + width if y + 1 < height else -1,
+                                     x == width - 1)):
+                    if nxt < 0:
+                        continue
+                    if not forced and self.rng.random() < self.density / 2:
+                        self._connect(game, nxt, hub)
+                    else:
+                        self._connect(game, hub, nxt)
+        return self._finish(game, backbone)
+
+    def layered(self) -> GeneratedMap:
+        """
+        Layered DAG: start, layers of parallel hubs, end.
+
+        Every hub links to 1 + density * 2 random hubs of the next layer
+        (the first hub of each layer always links to the next first
+        hub, which is the backbone).
+        """
+        width = max(1, int((self.hub_count - 2) ** 0.5))
+        depth = max(1, (self.hub_count - 2) // width)
+        game = GeneratedMap(self.drones)
+        game.hubs.append(HubSpec("start", 0, 0))
+        layers: List[List[int]] = []
+        for layer in range(depth):
+            layers.append([])
+            for row in range(width):
+                layers[-1].append(len(game.hubs))
+                game.hubs.append(HubSpec(self._name("l", layer, row),
+                                         layer + 1, row))
+        end = len(game.hubs)
+        game.hubs.append(HubSpec("goal", depth + 1, 0))
+        for hub in layers[0]:
+            self._connect(game, 0, hub)
+        fan_out = 1 + int(self.density * 2)
+        for current, following in zip(layers, layers[1:]):
+            self._connect(game, current[0], following[0])
+            for hub in current:
+                for nxt in self.rng.sample(following,
+                                           min(fan_out, len(following))):
+                    self._connect(game, hub, nxt)
+        for hub in layers[-1]:
+            self._connect(game, hub, end)
+        backbone = [0] + [layer[0] for layer in layers] + [end]
+        return self._finish(game, backbone)
+
+    def random_graph(self) -> GeneratedMap:
+        """
+        Random sparse graph with cycles.
+
+        A shuffled chain through a sixth of the hubs is the backbone;
+        every other hub hangs off a random earlier hub, and
+        'density' * hubs extra connections in random directions close
+        cycles between any two hubs.
+        """
+        side = max(2, int(self.hub_count ** 0.5))
+        game = GeneratedMap(self.drones)
+        for idx in range(self.hub_count):
+            game.hubs.append(HubSpec(self._name("r", idx),
+                                     idx % side, idx // side))
+        order = list(range(1, self.hub_count - 1))
+        self.rng.shuffle(order)
+        chain = max(0, min(len(order), self.hub_count // 6))
+        backbone = [0] + order[:chain] + [self.hub_count - 1]
+        for hub, nxt in zip(backbone, backbone[1:]):
+            self._connect(game, hub, nxt)
+        placed = list(backbone)
+        for hub in order[chain:]:
+            self._connect(game, self.rng.choice(placed), hub)
+            placed.append(hub)
+        for _ in range(int(self.density * self.hub_count)):
+            source = self.rng.randrange(self.hub_count)
+            target = self.rng.randrange(self.hub_count)
+            if source != target:
+                self._connect(game, source, target)
+        return self._finish(game, backbone)
+
+    def _connect(self, game: GeneratedMap, source: int, target: int,
+                 capacity: int = 0) -> bool:
+        """Adds a source->target connection unless the hubs are already
+        connected in either direction. Returns True if it was added."""
+        edge = (min(source, target), max(source, target))
+        if edge in self._edges:
+            return False
+        self._edges.add(edge)
+        if capacity <= 0:
+            capacity = self.rng.randint(1, self.max_capacity)
+        game.connections.append((source, target, capacity))
+        return True
+
+    def _finish(self, game: GeneratedMap,
+                backbone: List[int]) -> GeneratedMap:
+        """
+        Turns the first and last backbone hubs into the start and end,
+        assigns zones and capacities, then adds dead-end spurs and
+        bottlenecks. Connections leaving the end hub are reversed: like
+        in the bundled maps, the goal only has incoming connections.
+        """
+        start, end = backbone[0], backbone[-1]
+        game.hubs[start].kind = "start_hub"
+        game.hubs[end].kind = "end_hub"
+        game.connections = [(target, source, capacity)
+                            if source == end else (source, target, capacity)
+                            for source, target, capacity in game.connections]
+        on_backbone = set(backbone)
+        for idx, hub in enumerate(game.hubs):
+            if hub.kind != "hub":
+                continue
+            hub.capacity = self.rng.randint(1, self.max_capacity)
+            roll = self.rng.random()
+            if idx not in on_backbone and roll < self.blocked:
+                hub.zone = "blocked"
+            elif roll < self.blocked + self.restricted:
+                hub.zone = "restricted"
+            elif roll < self.blocked + self.restricted + self.priority:
+                hub.zone = "priority"
+
+        spurs = int(self.dead_ends * len(game.hubs))
+        x_max = max(hub.x for hub in game.hubs)
+        for spur in range(spurs):
+            anchor = self.rng.randrange(len(game.hubs) - 1)
+            anchor += anchor >= end
+            idx = len(game.hubs)
+            game.hubs.append(HubSpec(self._name("d", spur),
+                                     x_max + 1 + spur % 7,
+                                     spur // 7,
+                                     capacity=self.rng.randint(
+                                         1, self.max_capacity)))
+            self._connect(game, anchor, idx)
+
+        middle = backbone[1:-1]
+        incoming: Dict[int, List[int]] = {}
+        for position, (source, target, _) in enumerate(game.connections):
+            incoming.setdefault(target, []).append(position)
+        for narrow in self.rng.sample(middle, min(self.bottlenecks,
+                                                  len(middle))):
+            game.hubs[narrow].capacity = 1
+            for position in incoming.get(narrow, []):
+                source, target, _ = game.connections[position]
+                game.connections[position] = (source, target, 1)
+        return game
+
+
+def parse_arguments() -> argparse.Namespace:
+    """Parses the command line options of the generator."""
+    arg_parser = argparse.ArgumentParser(
+        description="Generate a large valid FLYIN map")
+    arg_parser.add_argument("topology", choices=TOPOLOGIES)
+    arg_parser.add_argument("-o", "--output", default="-",
+                            help="map file ('-' for stdout, .gz/.xz/.bz2 "
+                            "compressed)")
+    arg_parser.add_argument("--hubs", type=int, default=1000)
+    arg_parser.add_argument("--drones", type=int, default=100)
+    arg_parser.add_argument("--density", type=float, default=0.5)
+    arg_parser.add_argument("--seed", type=int, default=0)
+    arg_parser.add_argument("--restricted", type=float, default=0.1)
+    arg_parser.add_argument("--priority", type=float, default=0.1)
+    arg_parser.add_argument("--blocked", type=float, default=0.05)
+    arg_parser.add_argument("--dead-ends", type=float, default=0.05)
+    arg_parser.add_argument("--bottlenecks", type=int, default=1)
+    arg_parser.add_argument("--max-capacity", type=int, default=3)
+    return arg_parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_arguments()
+    MapGenerator(args.hubs, args.drones, args.density, args.seed,
+                 args.restricted, args.priority, args.blocked,
+                 args.dead_ends, args.bottlenecks,
+                 args.max_capacity).generate(args.topology).write(
+                     args.output)
@@ -0,0 +1,59 @@
+from typing import Callable, Dict, TextIO
+import bz2
+import gzip
+import lzma
+import sys
+
+
+# Map path meaning "read the map from standard input"
+STDIN = "-"
+
+OPENERS: Dict[str, Callable[..., TextIO]] = {
+    ".gz": gzip.open,
+    ".xz": lzma.open,
+    ".bz2": bz2.open,
+}
+
+
+def is_stdin(path: str) -> bool:
+    """Checks whether a map path designates standard input."""
+    return path == STDIN
+
+
+def open_map(path: str) -> TextIO:
+    """
+    Opens a map as a text stream read incrementally.
+
+    '-' reads standard input (which is left open when the stream is
+    closed), '.gz', '.xz' and '.bz2' files are decompressed on the fly,
+    and any other path is opened as plain text. Lines are decoded as they
+    are iterated, so neither the whole file nor a decompressed copy of it
+    is ever held in memory or written to disk.
+
+    Args:
+        path (str): Map path, or '-' for standard input.
+
+    Returns:
+        TextIO: The stream to iterate line by line.
+    """
+    if is_stdin(path):
+        return open(sys.stdin.fileno(), "r", closefd=False)
+    for suffix, opener in OPENERS.items():
+        if path.endswith(suffix):
+            return opener(path, "rt")
+    return open(path, "r")
+
+
+def create_map(path: str) -> TextIO:
+    """
+    Opens a map for writing, the counterpart of open_map.
+
+    '-' writes to standard output (left open when the stream is closed),
+    and '.gz', '.xz' and '.bz2' paths are compressed as they are written.
+    """
+    if is_stdin(path):
+        return open(sys.stdout.fileno(), "w", closefd=False)
+    for suffix, opener in OPENERS.items():
+        if path.endswith(suffix):
+            return opener(path, "wt")
+    return open(path, "w")
@@ -0,0 +1,137 @@
+from typing import Iterable, Iterator, List
+from dataclasses import dataclass
+import re
+from src.parser.parsing_errors import FormattingError
+
+
+# Line starters, in the order MapParser used to test them
+LINE_KIND = re.compile(r"nb_drones|start_hub|end_hub|hub|connection")
+
+
+@dataclass
+class MetadataItem:
+    """
+    One 'key=value' entry of a bracketed metadata block.
+
+    Attributes:
+        key (str): Text before the first '='.
+        value (str | None): Text after it, None if there is no '='.
+        malformed (bool): True if the entry holds more than one '='.
+    """
+    key: str
+    value: str | None
+    malformed: bool
+
+
+@dataclass
+class DroneCount:
+    """
+    An 'nb_drones: N' line.
+
+    Attributes:
+        line_no (int): 1-based line number.
+        value (str | None): Text after ':', None if the line does not have
+        exactly one ':'.
+    """
+    line_no: int
+    value: str | None
+
+
+@dataclass
+class HubDecl:
+    """
+    A 'hub:', 'start_hub:' or 'end_hub:' line.
+
+    Attributes:
+        line_no (int): 1-based line number.
+        kind (str): Text before ':' (e.g. 'start_hub').
+        fields (List[str] | None): Space separated [name, x, y] tokens,
+        None if the line does not have exactly one ':'.
+        metadata (List[MetadataItem] | None): Entries of the bracketed
+        block, in file order (duplicates included), None without exactly
+        one block.
+    """
+    line_no: int
+    kind: str
+    fields: List[str] | None
+    metadata: List[MetadataItem] | None
+
+
+@dataclass
+class ConnectionDecl:
+    """
+    A 'connection: a-b [max_link_capacity=N]' line.
+
+    Attributes:
+        line_no (int): 1-based line number.
+        hubs (List[str] | None): '-' separated endpoint tokens (not
+        stripped), None if the line does not have exactly one ':'.
+        metadata (MetadataItem | None): The bracketed block as a single
+        entry, None if there is none.
+    """
+    line_no: int
+    hubs: List[str] | None
+    metadata: MetadataItem | None
+
+
+MapRecord = DroneCount | HubDecl | ConnectionDecl
+
+
+def split_metadata(text: str) -> MetadataItem:
+    """Splits one 'key=value' entry on its '=' signs."""
+    key, sep, value = text.partition("=")
+    if not sep:
+        return MetadataItem(key, None, False)
+    return MetadataItem(key, value, "=" in value)
+
+
+def lex_line(line_no: int, line: str) -> MapRecord | None:
+    """
+    Tokenizes one map line.
+
+    Comments and empty lines give None. Every other line is scanned once:
+    the line starter picks the record type and the remaining text is cut
+    on ':', '[', ' ' and '=' with exactly the rules MapParser validated
+    before, so the parser raises the same errors on the records.
+
+    Raises:
+        FormattingError: If the line starts with an unknown keyword.
+    """
+    if line.startswith("#") or line.startswith("\n"):
+        return None
+    kind = LINE_KIND.match(line)
+    if kind is None:
+        raise FormattingError(line_no, "unknown line starting")
+    head, _, rest = line.rstrip("\n").partition(":")
+    single_colon = ":" in line and ":" not in rest
+
+    if kind.group() == "nb_drones":
+        return DroneCount(line_no, rest if single_colon else None)
+
+    if kind.group() == "connection":
+        if not single_colon:
+            return ConnectionDecl(line_no, None, None)
+        link, bracket, metadata = rest.strip().partition("[")
+        link_metadata = None
+        if bracket and "[" not in metadata:
+            link_metadata = split_metadata(metadata[:-1])
+        return ConnectionDecl(line_no, link.strip().split("-"),
+                              link_metadata)
+
+    if not single_colon:
+        return HubDecl(line_no, head, None, None)
+    blocks = rest.strip().split("[")
+    hub_metadata = None
+    if len(blocks) == 2:
+        hub_metadata = [split_metadata(item)
+                        for item in blocks[1].strip()[:-1].split(" ")]
+    return HubDecl(line_no, head, blocks[0].strip().split(" "),
+                   hub_metadata)
+
+
+def lex_map(lines: Iterable[str]) -> Iterator[MapRecord]:
+    """Streams the records of a map, one line at a time."""
+    for idx, line in enumerate(lines):
+        record = lex_line(idx + 1, line)
+        if record is not None:
+            yield record
@@ -1,7 +1,12 @@
-from typing import List, Dict, Tuple
-from prettytable import PrettyTable
+from typing import List, Dict, Set, Tuple
+import sys
 from src.parser.map_constructor import (
     Zone, StartZone, EndZone, ZoneTypes)
+from src.parser.map_cache import (
+    map_digest, cache_path, load_map_cache, save_map_cache)
+from src.parser.map_input import open_map, is_stdin
+from src.parser.map_lexer import (
+    lex_map, DroneCount, HubDecl, ConnectionDecl, MetadataItem)
 from src.parser.parsing_errors import (
     MapError,
     DroneNumError,
@@ -26,22 +31,39 @@ class MapParser:
     Attributes:
         map_dict (Dict): Core storage for 'drones' (int) and 'hubs'
         (Dict[str, Zone]).
-        zone_connection (List[Tuple]): Tracks established links to prevent
-        duplicates.
+        zone_connection (Set[Tuple]): Established connections, stored as
+        (smaller name, larger name) so both directions of a link are found
+        with one O(1) lookup.
+        error (Exception | None): Error that made the last parse fail.
     """
     def __init__(self) -> None:
         self.map_dict: Dict = {}
-        self.zone_connection: List[Tuple[str, str]] = []
+        self.zone_connection: Set[Tuple[str, str]] = set()
+        self.error: Exception | None = None
 
-    def parse(self, path: str) -> None:
+    def parse(self, path: str, use_cache: bool = False,
+              cache_dir: str | None = None) -> None:
         """
         Main entry point for map ingestion.
 
-        Performs line-by-line parsing and triggers specific extractors.
+        Streams the file line by line (it is never loaded whole) through
+        the map lexer and validates the resulting records. 'path' may be
+        '-' for standard input or a '.gz', '.xz' or '.bz2' file, which
+        is decompressed on the fly.
         Enforces the 'nb_drones first' rule and final graph integrity checks.
 
+        With 'use_cache', a compiled '.flyc' copy of the graph keyed by the
+        SHA-256 of the map file is loaded instead when it is up to date
+        (skipping validation entirely), and written after a successful
+        parse otherwise.
+
         Args:
-            path (str): Filesystem path to the map file.
+            path (str): Filesystem path to the map file, or '-'.
+            use_cache (bool): Read and write the compiled map cache
+            (ignored for standard input, which can not be hashed
+            before being parsed).
+            cache_dir (str | None): Directory of the cache files (next to
+            the map when None).
         Raises:
             MapError: If start/end hubs are missing or data is incomplete.
             FormattingError: If the file syntax is invalid.
@@ -50,33 +72,34 @@ class MapParser:
         drone = 0
         hubs = 0
         connections = 0
+        digest = None
+        self.error = None
         try:
-            with open(path, "r") as fl:
-                for i, line in enumerate(fl.readlines()):
-                    if line.startswith("#") or line.startswith("\n"):
-                        pass
-                    elif line.startswith("nb_drones"):
+            if use_cache and not is_stdin(path):
+                digest = map_digest(path)
+                cached = load_map_cache(
+                    cache_path(path, digest, cache_dir), digest)
+                if cached is not None:
+                    self.map_dict = {"drones": cached[0], "hubs": cached[1]}
+                    return
+            with open_map(path) as fl:
+                for record in lex_map(fl):
+                    if isinstance(record, DroneCount):
                         drone += 1
-                        self._extract_drone_counts(i + 1, line)
-                    elif line.startswith("hub") or\
-                        line.startswith("start_hub") or\
-                            line.startswith("end_hub"):
+                        self._extract_drone_counts(record)
+                    elif isinstance(record, HubDecl):
                         hubs += 1
-                        self._extract_hub_info(i + 1, line)
-                    elif line.startswith("connection"):
+                        self._extract_hub_info(record)
+                    else:
                         connections += 1
                         storage = self.map_dict.get('hubs')
                         if storage is not None:
-                            self._link_the_connections(i + 1, line, storage)
+                            self._link_the_connections(record, storage)
                         else:
                             raise MapError(
                                 -1,
                                 "Hub info should be store"
                                 "before checking the connections.")
-                    else:
-                        raise FormattingError(
-                            -1,
-                            f"({i + 1}) unknown line starting")
             if drone == 1 and hubs > 1 and connections > 0:
                 if self.has_proper_start_end(self.map_dict['hubs']):
                     error_encountered = False
@@ -85,17 +108,23 @@ class MapParser:
                     -1,
                     f"Map '{path}' do not have complete information.")
 
-        except FileNotFoundError:
+        except FileNotFoundError as e:
+            self.error = e
             print(f"Invalid path '{path}'")
-        except PermissionError:
+        except PermissionError as e:
+            self.error = e
             print(f"File '{path}' do not have "
                   "reading permission")
         except MapError as e:
+            self.error = e
             print(f"{e}")
         except Exception as e:
+            self.error = e
             print(f"{e}")
         if error_encountered:
             self.reset_map()
+        elif digest is not None:
+            self._store_cache(cache_path(path, digest, cache_dir), digest)
 
     def get_drone_num(self) -> int | None:
         """Return the drone id/number"""
@@ -108,6 +137,8 @@ class MapParser:
     def show_map(self) -> None:
         """Generates a formatted ASCII table of the loaded graph for
         debugging."""
+        # imported here so parsing does not depend on prettytable
+        from prettytable import PrettyTable
         try:
             hubs = self.map_dict.get("hubs")
             if hubs is not None:
@@ -121,6 +152,16 @@ class MapParser:
         except Exception as e:
             print(f"TableGenerationError: {e}")
 
+    def _store_cache(self, file_path: str, digest: bytes) -> None:
+        """Writes the compiled map cache, warning if it can not be
+        written (the parsed map stays usable)."""
+        try:
+            save_map_cache(file_path, digest, self.map_dict["drones"],
+                           self.map_dict["hubs"])
+        except OSError as e:
+            print(f"Warning: map cache '{file_path}' not written: {e}",
+                  file=sys.stderr)
+
     def reset_map(self) -> None:
         """Rest the map info"""
         self.map_dict = {}
@@ -164,7 +205,7 @@ class MapParser:
             raise MapError(
                 -1, "Map do not have both start and end hub info.")
 
-    def _extract_drone_counts(self, line_no: int, line: str) -> None:
+    def _extract_drone_counts(self, record: DroneCount) -> None:
         """
         Parses the 'nb_drones' directive to set the total agent count.
 
@@ -172,13 +213,12 @@ class MapParser:
         that the count is a positive integer.
 
         Args:
-            line_no: Current line index for error reporting.
-            line: The raw string containing the drone count.
+            record: The lexed drone count line.
         """
-        split_line = line.split("\n")[0].split(":")
-        if len(split_line) == 2:
+        line_no = record.line_no
+        if record.value is not None:
             try:
-                drones_num = int(split_line[1])
+                drones_num = int(record.value)
             except ValueError:
                 raise DroneNumError(
                     line_no, "Drone number has to be integer.")
@@ -192,28 +232,22 @@ class MapParser:
             raise FormattingError(
                 line_no, "Drone count is in wrong format.")
 
-    def _extract_hub_info(self, line_no: int, line: str) -> None:
-        """Parses hub definitions and dispatches metadata for Zone
-        instantiation."""
+    def _extract_hub_info(self, record: HubDecl) -> None:
+        """Validates a lexed hub definition and dispatches metadata for
+        Zone instantiation."""
+        line_no = record.line_no
         if "drones" not in self.map_dict.keys():
             raise FormattingError(
                 line_no,
                 "'nb_drone' should be the first element in the map")
-        split_line = line.split("\n")[0].split(":")
-        if len(split_line) == 2:
+        if record.fields is not None:
             if "hubs" not in self.map_dict.keys():
                 self.map_dict["hubs"] = {}
-            hub_info = split_line[1].strip().split("[")
-            hub_info_list = hub_info[0].strip().split(" ")
-            if len(hub_info) == 2:
-                metadata_list = hub_info[1].strip()[: -1].split(" ")
-            else:
-                metadata_list = None
             try:
-                self._store_hub_info(line_no, hub_info_list,
-                                     split_line[0], self.map_dict["hubs"])
-                self._store_hub_metadata(line_no, metadata_list,
-                                         hub_info_list[0], split_line[0],
+                self._store_hub_info(line_no, record.fields,
+                                     record.kind, self.map_dict["hubs"])
+                self._store_hub_metadata(line_no, record.metadata,
+                                         record.fields[0], record.kind,
                                          self.map_dict["hubs"])
             except HubError as e:
                 raise HubError(line_no, f"{e}")
@@ -278,7 +312,7 @@ class MapParser:
                                   "Do not have require hub infos")
 
     def _store_hub_metadata(
-            self, line_no: int, metadata: List | None,
+            self, line_no: int, metadata: List[MetadataItem] | None,
             hub_name: str, hub_type: str, storage: Dict) -> None:
         """
         Parses optional bracketed metadata (zone type, color, max_drones).
@@ -293,47 +327,48 @@ class MapParser:
         if metadata is not None:
             for info in metadata:
                 try:
-                    key_val = info.split("=")
+                    key = info.key
                     # Look for missing values
-                    if len(key_val) == 1:
+                    if info.value is None:
                         raise MetadataError(
                             line_no,
-                            f"'{key_val[0]}' missing '=' sign.")
-                    elif len(key_val) == 2 and key_val[1].strip() == "":
+                            f"'{key}' missing '=' sign.")
+                    elif not info.malformed and info.value.strip() == "":
                         raise MetadataError(
                             line_no,
-                            f"'{key_val[0]}' is missing the value.")
-                    elif len(key_val) > 2:
+                            f"'{key}' is missing the value.")
+                    elif info.malformed:
                         raise MetadataError(
                             line_no,
-                            f"'{key_val[0]}' value is not "
+                            f"'{key}' value is not "
                             "in proper format.")
+                    value = info.value
 
                     # Check the repetition of the zone metadata
-                    if key_val[0] in keys:
+                    if key in keys:
                         raise MetadataError(
                             line_no,
-                            f"{key_val[0]} has duplicate values.")
+                            f"{key} has duplicate values.")
                     else:
-                        keys.append(key_val[0])
+                        keys.append(key)
 
                     # Extract metadata
-                    if key_val[0] == "zone":
+                    if key == "zone":
                         try:
-                            storage[hub_name].update_zone_type(key_val[1])
+                            storage[hub_name].update_zone_type(value)
                         except Exception:
                             raise MetadataError(
                                 line_no,
-                                f"Unknown zone type '{key_val[1]}'."
+                                f"Unknown zone type '{value}'."
                                 )
-                    elif key_val[0] == "color":
-                        color = key_val[1]
+                    elif key == "color":
+                        color = value
                         storage[hub_name].update_color(color)
-                    elif key_val[0] == "max_drones":
+                    elif key == "max_drones":
                         try:
-                            drones = int(key_val[1])
+                            drones = int(value)
                         except ValueError:
-                            raise MetadataError(line_no, f"'{key_val[0]}' "
+                            raise MetadataError(line_no, f"'{key}' "
                                                 "value has to be integer.")
                         if drones > 0:
                             if (
@@ -349,14 +384,10 @@ class MapParser:
                         else:
                             raise DroneOccupancyError(
                                 line_no,
-                                f"'{key_val[0]}' has to be positive.")
+                                f"'{key}' has to be positive.")
                     else:
-                        raise MetadataError(line_no, f"'{key_val[0]}' "
+                        raise MetadataError(line_no, f"'{key}' "
                                             "is unknown metadata.")
-                except IndexError:
-                    raise MetadataError(line_no,
-                                        f"Hub Metadata {info} is not properly "
-                                        "formatted.")
                 except MetadataError as e:
                     raise MetadataError(line_no, f"{e}")
         # storage[hub_name].update({
@@ -365,17 +396,17 @@ class MapParser:
         #     "max_drones": max_drones,
         # })
 
-    def _link_the_connections(self, line_no: int,
-                              line: str, storage: Dict) -> None:
-        """Validates and creates Link objects between existing Zones."""
-        split_line = line.split(":")
-        if len(split_line) == 2:
-            link_full_data = split_line[1].strip().split("[")
+    def _link_the_connections(self, record: ConnectionDecl,
+                              storage: Dict) -> None:
+        """Validates a lexed connection and creates the Link between
+        existing Zones."""
+        line_no = record.line_no
+        links = record.hubs
+        if links is not None:
             max_link_capacity = 1
-            if len(link_full_data) == 2:
+            if record.metadata is not None:
                 max_link_capacity = self._extract_max_link_capacity(
-                    line_no, link_full_data[1])
-            links = link_full_data[0].strip().split("-")
+                    line_no, record.metadata)
             # Checking for proper linking
             if len(links) == 1:
                 raise LinkingError(
@@ -394,18 +425,14 @@ class MapParser:
 
             hub1 = links[0].strip()
             hub2 = links[1].strip()
-            stored_hubs = list(storage.keys())
-            if hub1 in stored_hubs and hub2 in stored_hubs:
-                # hub1_idx = stored_hubs.index(hub1)
-                # hub2_idx = stored_hubs.index(hub2)
-                # print(hub1_idx, hub2_idx)
-                if ((hub1, hub2) in self.zone_connection or
-                        (hub2, hub1) in self.zone_connection):
+            if hub1 in storage and hub2 in storage:
+                edge = (hub1, hub2) if hub1 <= hub2 else (hub2, hub1)
+                if edge in self.zone_connection:
                     raise LinkingError(
                         line_no,
                         f"Connection '{hub1}-{hub2}' already exists.")
                 else:
-                    self.zone_connection.append((hub1, hub2))
+                    self.zone_connection.add(edge)
                     storage[hub1].add_link(storage[hub2], max_link_capacity)
                     # storage[hub2].add_link(storage[hub1], max_link_capacity)
             else:
@@ -418,38 +445,40 @@ class MapParser:
                 line_no,
                 "Link has improper formatting.")
 
-    def _extract_max_link_capacity(self, line_no: int, metadata: str) -> int:
+    def _extract_max_link_capacity(self, line_no: int,
+                                   metadata: MetadataItem) -> int:
         """
         Parses optional link metadata to determine edge bandwidth.
 
         Args:
-            metadata: The string within brackets (e.g., 'max_link_capacity=2').
+            metadata: The lexed bracket content (e.g.,
+            'max_link_capacity=2').
         Returns:
             The parsed integer capacity, defaulting to 1 if not specified.
         """
-        link_capacity = metadata[: -1].split("=")
-        if len(link_capacity) == 2:
-            if link_capacity[0] != "max_link_capacity":
+        key = metadata.key
+        if metadata.value is not None and not metadata.malformed:
+            if key != "max_link_capacity":
                 raise MaxLinkError(
                     line_no,
-                    f"'{link_capacity[0]}' unknown link capacity info."
+                    f"'{key}' unknown link capacity info."
                 )
             try:
-                max_link = int(link_capacity[1].strip())
+                max_link = int(metadata.value.strip())
                 if max_link > 0:
                     return max_link
                 else:
                     raise MaxLinkError(
                         line_no,
-                        f"{link_capacity[0]} has to be positive.")
+                        f"{key} has to be positive.")
             except ValueError:
                 raise MaxLinkError(
                     line_no,
-                    f"{link_capacity[0]} has to be integer.")
+                    f"{key} has to be integer.")
         else:
             raise MaxLinkError(
                 line_no,
-                f"{link_capacity[0]} has wrong formatting.")
+                f"{key} has wrong formatting.")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,148 @@
+from typing import Any, Dict, Iterable, List, TextIO
+from dataclasses import dataclass, asdict, fields
+from functools import partial
+from multiprocessing import Pool
+import contextlib
+import csv
+import io
+import json
+import os
+import signal
+import time
+from src.parser.map_parser import MapParser
+
+
+MAP_SUFFIXES = (".txt", ".gz", ".xz", ".bz2")
+
+
+class ValidationTimeout(BaseException):
+    """
+    Raised in a worker when a map exceeds its time budget.
+
+    Derives from BaseException so the catch-all handlers of
+    MapParser.parse let it through.
+    """
+    pass
+
+
+@dataclass
+class ValidationResult:
+    """
+    Outcome of the validation of one map.
+
+    Attributes:
+        map (str): Path of the map.
+        status (str): 'valid', 'invalid' or 'timeout'.
+        error (str): Exception class name ('' when valid).
+        line (int): Line at fault, -1 when unknown or valid.
+        message (str): Error message ('' when valid).
+        drones (int): Drone count (0 unless valid).
+        hubs (int): Hub count (0 unless valid).
+        links (int): Link count (0 unless valid).
+        seconds (float): Time spent on the map.
+    """
+    map: str
+    status: str = "valid"
+    error: str = ""
+    line: int = -1
+    message: str = ""
+    drones: int = 0
+    hubs: int = 0
+    links: int = 0
+    seconds: float = 0.0
+
+
+def find_maps(directory: str) -> List[str]:
+    """Returns the map files found under a directory, sorted."""
+    maps = []
+    for root, dirs, files in os.walk(directory):
+        dirs[:] = [name for name in dirs if not name.startswith(".")]
+        for name in files:
+            if name.endswith(MAP_SUFFIXES):
+                maps.append(os.path.join(root, name))
+    return sorted(maps)
+
+
+def _raise_timeout(signum: int, frame: Any) -> None:
+    """SIGALRM handler interrupting the parse of a map."""
+    raise ValidationTimeout()
+
+
+def validate_map(path: str, timeout: float) -> ValidationResult:
+    """
+    Parses one map and reports how it went.
+
+    Runs in a worker process: the parser output is swallowed, and a
+    SIGALRM timer interrupts maps taking longer than 'timeout' seconds.
+    """
+    result = ValidationResult(path)
+    map_parser = MapParser()
+    start = time.perf_counter()
+    previous = signal.signal(signal.SIGALRM, _raise_timeout)
+    signal.setitimer(signal.ITIMER_REAL, timeout)
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            map_parser.parse(path)
+    except ValidationTimeout:
+        result.status = "timeout"
+        result.message = f"Validation took more than {timeout}s."
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+    result.seconds = round(time.perf_counter() - start, 6)
+    if result.status == "timeout":
+        return result
+
+    hubs = map_parser.get_map()
+    drones = map_parser.get_drone_num()
+    if map_parser.error is not None or hubs is None or drones is None:
+        error = map_parser.error
+        result.status = "invalid"
+        result.error = type(error).__name__ if error is not None else ""
+        result.line = getattr(error, "line_no", -1)
+        result.message = str(error) if error is not None else ""
+    else:
+        result.drones = drones
+        result.hubs = len(hubs)
+        result.links = sum(len(zone.links) for zone in hubs.values())
+    return result
+
+
+def validate_maps(paths: Iterable[str], timeout: float,
+                  jobs: int | None = None) -> List[ValidationResult]:
+    """
+    Validates maps over a process pool (one worker per core by default).
+
+    Returns:
+        List[ValidationResult]: One result per map, sorted by path.
+    """
+    with Pool(processes=jobs) as pool:
+        results = list(pool.imap_unordered(
+            partial(validate_map, timeout=timeout), paths))
+    return sorted(results, key=lambda result: result.map)
+
+
+def summarize(results: List[ValidationResult]) -> Dict[str, int]:
+    """Counts the results per status."""
+    summary = {"maps": len(results), "valid": 0, "invalid": 0,
+               "timeout": 0}
+    for result in results:
+        summary[result.status] += 1
+    return summary
+
+
+def write_report(results: List[ValidationResult], output: TextIO,
+                 report_format: str) -> None:
+    """Writes the results as 'json' (with a summary) or 'csv'."""
+    if report_format == "csv":
+        writer = csv.DictWriter(
+            output, fieldnames=[field.name for field in
+                                fields(ValidationResult)])
+        writer.writeheader()
+        for result in results:
+            writer.writerow(asdict(result))
+    else:
+        json.dump({"summary": summarize(results),
+                   "maps": [asdict(result) for result in results]},
+                  output, indent=2)
+        output.write("\n")
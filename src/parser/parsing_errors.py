@@ -1,8 +1,9 @@
 class MapError(Exception):
     """Base class for all exceptions raised during map parsing and
-    validation."""
+    validation. 'line_no' is the 1-based line at fault, or -1."""
     def __init__(self, line_no: int, msg: str) -> None:
         super().__init__(f"Line {line_no}: {msg}" if line_no > 0 else msg)
+        self.line_no = line_no
 
 
 class DroneNumError(MapError):
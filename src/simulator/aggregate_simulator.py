@@ -0,0 +1,229 @@
+from typing import Deque, Dict, List, TextIO, Tuple
+import sys
+from array import array
+from collections import deque
+from src.parser.map_constructor import Zone
+from src.simulator.routing_simulator import CostToGoSimulator, INF
+from src.simulator.simulation_engine import Drone
+from src.simulator.path_finder import Path
+
+
+class AggregateSimulator(CostToGoSimulator):
+    """
+    Simulator tracking drone counts instead of drones.
+
+    Drones of the same hub are interchangeable once the routing only
+    depends on capacities, so this engine only keeps how many drones
+    wait in every hub and how many fly over every link, per landing
+    tick, and moves them in batches: a tick costs O(hubs + links)
+    whatever the swarm size. The hub and link occupancies stay in the
+    Zone and Link objects, like in the other engines.
+
+    The rules are the ones of RoutingSimulator without congestion term
+    (congestion=0): hubs are served by increasing cost-to-go, and the
+    drones waiting in a hub take the next hop with the fewest ticks to
+    the end, one more when it is full, or wait for it. A batch leaves as
+    long as its next hop stays the best one, so every hub sends at most
+    one batch per next hop. Both engines therefore need the same number
+    of turns. These are not the rules of AdvanceSimulator, which can
+    need fewer turns (10 against 13 on default_map.txt).
+
+    When start_simulation is given an output stream, the batches of
+    every tick are also logged and replayed afterwards by reconstruct,
+    which gives the drones their identity by serving every hub first in,
+    first out: the moves written are the ones RoutingSimulator prints.
+
+    Attributes:
+        waiting_count (array): Drones waiting in every hub id.
+        flights (List[array]): Drones flying over every edge index,
+        'flights[k]' holding the ones landing in k ticks (0 = this tick).
+        sources (array): Source hub id of every edge index.
+        log (List[List[Tuple[int, int]]] | None): (edge index, drones) of
+        the batches leaving at every tick, when recorded.
+    """
+    def __init__(self, graph: Dict[str, Zone],
+                 valid_paths: List[Path], drones: int) -> None:
+        super().__init__(graph, valid_paths, drones)
+        compiled = self.compiled
+        self.waiting_count = array("q", [0] * len(compiled))
+        if compiled.start >= 0:
+            self.waiting_count[compiled.start] = drones
+        self.sources = array("i", [0] * len(compiled.targets))
+        for hub in range(len(compiled)):
+            for edge in compiled.neighbours(hub):
+                self.sources[edge] = hub
+        longest = max([compiled.zone_cost[compiled.targets[edge]]
+                       for edge in range(len(compiled.targets))
+                       if self.remaining[edge] < INF] + [1])
+        self.flights: List[array] = [
+            array("q", [0] * len(compiled.targets)) for _ in range(longest)]
+        self.log: List[List[Tuple[int, int]]] | None = None
+
+    def init_drones(self, drones: int) -> List[Drone]:
+        """Only fills the start hub; drones are counts here."""
+        if self.start is not None:
+            self.start.occupancy += drones
+        return []
+
+    def start_simulation(self, valid_map: Dict[str, List],
+                         output: TextIO | None = None) -> int:
+        """
+        Runs ticks until every drone reached (or reserved) the end hub.
+
+        Args:
+            valid_map: Adjacency list mapping hub names to their
+                       prioritized next-step options.
+            output: Optional text stream receiving one line of drone
+                    moves per turn, rebuilt by reconstruct once the run
+                    is over. The 'Total Moves' report is only printed
+                    when no stream is given.
+        Returns:
+            int: The number of turns simulated.
+        """
+        move_counter = 0
+        self.log = [] if output is not None else None
+        if self.end is not None:
+            while self.end.occupancy < self.drone_count:
+                if len(self.next_move(valid_map)) == 0:
+                    print("Error: Simulation is stuck, no drone can move.",
+                          file=sys.stderr)
+                    break
+                move_counter += 1
+            if output is None:
+                print(f"Total Moves: {move_counter}")
+            else:
+                self.reconstruct(output)
+        return move_counter
+
+    def choose_batch(self, edges: List[int]) -> Tuple[int, int]:
+        """
+        Picks the next hop of the drones waiting at a hub, like
+        choose_edge without congestion term.
+
+        Returns:
+            Tuple[int, int]: The best edge index (-1 if there is none)
+            and how many drones it can take now (0 if they must wait).
+        """
+        links = self.compiled.links
+        best = -1
+        best_room = 0
+        best_eta = INF
+        for edge in edges:
+            link = links[edge]
+            room = min(link.free_spaces(), link.target.free_spaces())
+            eta = self.remaining[edge] if room > 0 else \
+                self.remaining[edge] + 1
+            if eta < best_eta:
+                best_eta = eta
+                best = edge
+                best_room = max(room, 0)
+        return best, best_room
+
+    def next_move(self, valid_map: Dict[str, List]) -> str:
+        """
+        Runs one tick on drone counts.
+        1. Sends batches of waiting drones from every hub, closest to
+           the end first, reserving the link and the target hub.
+        2. Lands the drones whose flight ends this tick, which start
+           waiting in their target hub.
+
+        Returns:
+            str: The moves of the tick, with drone counts in place of
+                 drone names ('3xhub' landed, '2xsrc-dst' in flight).
+        """
+        compiled = self.compiled
+        zones = compiled.zones
+        links = compiled.links
+        targets = compiled.targets
+        zone_cost = compiled.zone_cost
+        next_edges = self.get_next_edges(valid_map)
+        departures: List[Tuple[int, int]] = []
+        for hub in self.order:
+            waiting = self.waiting_count[hub]
+            while waiting > 0:
+                edge, room = self.choose_batch(next_edges[hub])
+                if room == 0:
+                    break
+                count = min(waiting, room)
+                waiting -= count
+                links[edge].occupancy += count
+                links[edge].target.occupancy += count
+                self.flights[zone_cost[targets[edge]] - 1][edge] += count
+                departures.append((edge, count))
+            zones[hub].occupancy -= self.waiting_count[hub] - waiting
+            self.waiting_count[hub] = waiting
+        if self.log is not None:
+            self.log.append(departures)
+
+        landing = self.flights.pop(0)
+        drone_move = ""
+        for edge in range(len(targets)):
+            landed = landing[edge]
+            if landed > 0:
+                links[edge].occupancy -= landed
+                self.waiting_count[targets[edge]] += landed
+                landing[edge] = 0
+                drone_move += f"{landed}x{zones[targets[edge]].name} "
+            flying = links[edge].occupancy
+            if flying > 0:
+                drone_move += f"{flying}x{zones[self.sources[edge]].name}"\
+                              f"-{zones[targets[edge]].name} "
+        self.flights.append(landing)
+        return drone_move
+
+    def reconstruct(self, output: TextIO) -> None:
+        """
+        Replays the logged batches with drone identities and writes the
+        moves of every tick, in the format of the per-drone engines.
+
+        Drones leave the start hub in number order, every hub serves
+        the drones it holds first in, first out, and the drones landing
+        in a hub on the same tick queue up in number order. Drone
+        objects are built for the final state, so get_drones then
+        reports every drone's position and total moves. This costs
+        O(drones) per tick, which the simulation itself never pays.
+
+        Args:
+            output (TextIO): Stream receiving one line per tick.
+        """
+        if self.log is None:
+            return
+        compiled = self.compiled
+        names = compiled.names
+        targets = compiled.targets
+        queues: List[Deque[int]] = [deque() for _ in range(len(compiled))]
+        start = compiled.start if compiled.start >= 0 else 0
+        queues[start].extend(range(1, self.drone_count + 1))
+        position = array("i", [start] * (self.drone_count + 1))
+        total_moves = array("i", [0] * (self.drone_count + 1))
+        # drone number -> [edge index, ticks left before landing]
+        flying: Dict[int, List[int]] = {}
+        for departures in self.log:
+            for drone, flight in flying.items():
+                flight[1] -= 1
+                total_moves[drone] += 1
+            for edge, count in departures:
+                queue = queues[self.sources[edge]]
+                for _ in range(count):
+                    drone = queue.popleft()
+                    flying[drone] = [edge, compiled.zone_cost[
+                        targets[edge]] - 1]
+                    total_moves[drone] += 1
+            moves = []
+            for drone in sorted(flying):
+                edge, left = flying[drone]
+                if left == 0:
+                    del flying[drone]
+                    position[drone] = targets[edge]
+                    queues[targets[edge]].append(drone)
+                    moves.append(f"D{drone}-{names[targets[edge]]}")
+                else:
+                    moves.append(f"D{drone}-{names[self.sources[edge]]}"
+                                 f"-{names[targets[edge]]}")
+            output.write(" ".join(moves) + "\n")
+
+        self.drones = []
+        for drone in range(1, self.drone_count + 1):
+            view = Drone(drone, compiled.zones[position[drone]])
+            view.total_moves = total_moves[drone]
+            self.drones.append(view)
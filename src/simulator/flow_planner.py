@@ -0,0 +1,599 @@
+from typing import Dict, List, TextIO, Tuple
+import heapq
+import sys
+from collections import deque
+from src.parser.map_constructor import Zone, Link
+from src.parser.compiled_graph import CompiledGraph, PRIORITY
+from src.simulator.simulation_engine import Simulator, Drone
+from src.simulator.path_finder import Path
+
+
+INF = float("inf")
+# Cost of spending one tick anywhere but in the end hub. Entering a
+# priority hub is one unit cheaper, which only breaks ties.
+TICK_COST = 1000
+
+
+class MinCostFlow:
+    """
+    Successive shortest path min-cost flow solver.
+
+    Edges are stored in flat lists; edge 'e' and its residual twin
+    'e ^ 1' are always allocated together. Shortest paths are found with
+    Dijkstra on reduced costs (Johnson potentials), which is valid as
+    long as the initial costs are non-negative.
+    """
+    def __init__(self, nodes: int = 0) -> None:
+        self.nodes = nodes
+        self.head: List[int] = [-1] * nodes
+        self.next: List[int] = []
+        self.to: List[int] = []
+        self.cap: List[int] = []
+        self.cost: List[int] = []
+
+    def add_node(self) -> int:
+        """Allocates a new node and returns its id."""
+        self.head.append(-1)
+        self.nodes += 1
+        return self.nodes - 1
+
+    def add_edge(self, source: int, target: int,
+                 cap: int, cost: int) -> int:
+        """Adds a directed edge and its residual twin, returns the edge
+        id."""
+        edge = len(self.to)
+        for u, v, c, w in ((source, target, cap, cost),
+                           (target, source, 0, -cost)):
+            self.to.append(v)
+            self.cap.append(c)
+            self.cost.append(w)
+            self.next.append(self.head[u])
+            self.head[u] = len(self.to) - 1
+        return edge
+
+    def flow(self, edge: int) -> int:
+        """Returns the flow currently pushed through an edge."""
+        return self.cap[edge ^ 1]
+
+    def solve(self, source: int, sink: int,
+              max_flow: int) -> Tuple[int, int]:
+        """
+        Pushes up to max_flow units from source to sink at minimum cost.
+
+        Returns:
+            Tuple[int, int]: The (flow, cost) that was sent.
+        """
+        potential = [0] * self.nodes
+        flow = 0
+        total_cost = 0
+        while flow < max_flow:
+            dist = [INF] * self.nodes
+            parent = [-1] * self.nodes
+            dist[source] = 0
+            queue: List[Tuple[float, int]] = [(0, source)]
+            while queue:
+                d, u = heapq.heappop(queue)
+                if d > dist[u]:
+                    continue
+                edge = self.head[u]
+                pot_u = potential[u]
+                while edge != -1:
+                    if self.cap[edge] > 0:
+                        v = self.to[edge]
+                        nd = d + self.cost[edge] + pot_u - potential[v]
+                        if nd < dist[v]:
+                            dist[v] = nd
+                            parent[v] = edge
+                            heapq.heappush(queue, (nd, v))
+                    edge = self.next[edge]
+            if dist[sink] == INF:
+                break
+            for node in range(self.nodes):
+                if dist[node] < INF:
+                    potential[node] += int(dist[node])
+            push = max_flow - flow
+            node = sink
+            while node != source:
+                edge = parent[node]
+                push = min(push, self.cap[edge])
+                node = self.to[edge ^ 1]
+            node = sink
+            while node != source:
+                edge = parent[node]
+                self.cap[edge] -= push
+                self.cap[edge ^ 1] += push
+                total_cost += push * self.cost[edge]
+                node = self.to[edge ^ 1]
+            flow += push
+        return (flow, total_cost)
+
+
+# Solved time-expanded network with the movement and waiting edge ids
+# decoding it (see TimeExpandedPlanner.build)
+Solution = Tuple[MinCostFlow, Dict[int, Tuple[int, int, int]],
+                 Dict[Tuple[int, int], int]]
+
+
+class TimeExpandedPlanner:
+    """
+    Plans every drone at once as a min-cost flow over time.
+
+    For a horizon T the network has one copy of every hub per tick
+    (split in/out so the copy carries the hub's 'max_drones'), waiting
+    arcs between consecutive copies, and one arc per link and departure
+    tick carrying 'max_link_capacity'. Moves into restricted hubs go
+    through an extra in-flight node and take two ticks.
+
+    Such a drone holds its link during both ticks, so the drones leaving
+    over a restricted link on two consecutive ticks share its capacity.
+    A flow cannot express that, so the network only bounds every
+    departure tick on its own and the constraint is enforced by branch
+    and bound: when a flow overloads a restricted link on ticks t and
+    t + 1, it is solved again once per way of splitting the capacity
+    between both ticks (at most k drones on t, at most c - k on t + 1),
+    every split excluding the overloading flow. A horizon is feasible
+    when one branch routes the whole swarm without overload, infeasible
+    when every branch runs out of capacity. Branches are cut early by
+    two relaxations where consecutive departures do share the capacity
+    (see fits), and the alternating split (see alternate), a restriction
+    that usually fits already, is tried before branching.
+
+    Hub capacity counts the drones physically inside a hub at the end of
+    a tick; start and end hubs hold the whole swarm. Copies that cannot
+    be reached from the start in time, or cannot reach the end before T,
+    are never built.
+
+    Attributes:
+        graph (CompiledGraph): Integer-indexed view of the hub graph.
+        drones (int): Number of drones to route.
+        solved (int): Flows solved so far, relaxations included.
+    """
+    def __init__(self, graph: CompiledGraph, drones: int) -> None:
+        self.graph = graph
+        self.drones = drones
+        self.from_start = graph.travel_times(forward=True)
+        self.to_end = graph.travel_times(forward=False)
+        self.solved = 0
+        # last horizon scheduled, reused by plan
+        self._found: Tuple[int, Solution] | None = None
+        # fits result of every horizon checked without limits
+        self._fits: Dict[int, bool] = {}
+
+    def lower_bound(self) -> int:
+        """Returns the travel time of the fastest drone, ignoring
+        capacities."""
+        if self.graph.start < 0:
+            return 0
+        return int(self.to_end[self.graph.start]) \
+            if self.to_end[self.graph.start] < INF else -1
+
+    def build(self, horizon: int,
+              limits: Dict[Tuple[int, int], int] | None = None,
+              pairs: int = -1
+              ) -> Tuple[MinCostFlow, int, int,
+                         Dict[int, Tuple[int, int, int]],
+                         Dict[Tuple[int, int], int]]:
+        """
+        Builds the time-expanded network for a horizon.
+
+        Args:
+            horizon (int): Number of ticks of the network.
+            limits (Dict[Tuple[int, int], int] | None): Tighter capacity
+                of some (link edge index, departure tick) arcs, set by
+                the branch and bound.
+            pairs (int): 0 or 1 to build a relaxation instead: the
+                departures over a restricted link on ticks t and t + 1,
+                t of that parity, share its capacity, but may land on
+                either tick. Such a network only bounds feasibility.
+        Returns:
+            The solver, the source and sink node ids, a map from every
+            movement edge id to its (link edge index, departure tick,
+            ticks of travel) triple, and the waiting edge id of every
+            (hub, tick) copy, both used to decode the schedule.
+        """
+        graph = self.graph
+        net = MinCostFlow(2)
+        source, sink = 0, 1
+        hub_in: Dict[Tuple[int, int], int] = {}
+        hub_out: Dict[Tuple[int, int], int] = {}
+        waits: Dict[Tuple[int, int], int] = {}
+
+        def alive(hub: int, tick: int) -> bool:
+            return self.from_start[hub] <= tick and \
+                tick + self.to_end[hub] <= horizon
+
+        for hub in range(len(graph)):
+            if graph.is_blocked(hub):
+                continue
+            cap = self.drones if hub in (graph.start, graph.end) \
+                else graph.hub_capacity[hub]
+            for tick in range(horizon + 1):
+                if alive(hub, tick):
+                    hub_in[(hub, tick)] = net.add_node()
+                    hub_out[(hub, tick)] = net.add_node()
+                    net.add_edge(hub_in[(hub, tick)], hub_out[(hub, tick)],
+                                 cap, 0)
+            for tick in range(horizon):
+                if (hub, tick) in hub_out and (hub, tick + 1) in hub_in:
+                    waits[(hub, tick)] = net.add_edge(
+                        hub_out[(hub, tick)], hub_in[(hub, tick + 1)],
+                        self.drones, 0 if hub == graph.end else TICK_COST)
+
+        moves: Dict[int, Tuple[int, int, int]] = {}
+        for hub in range(len(graph)):
+            if hub == graph.end:
+                continue
+            for edge in graph.neighbours(hub):
+                target = graph.targets[edge]
+                travel = graph.zone_cost[target]
+                gain = 1 if graph.zone_type[target] == PRIORITY else 0
+                # (in, out) node of every pair of departure ticks
+                shared: Dict[int, Tuple[int, int]] = {}
+                for tick in range(horizon - travel + 1):
+                    begin = (hub, tick)
+                    finish = (target, tick + travel)
+                    if begin not in hub_out or finish not in hub_in:
+                        continue
+                    cap = graph.link_capacity[edge]
+                    if limits is not None:
+                        cap = min(cap, limits.get((edge, tick), cap))
+                    if cap <= 0:
+                        continue
+                    if travel == 1:
+                        arc = net.add_edge(hub_out[begin], hub_in[finish],
+                                           cap, TICK_COST - gain)
+                    elif pairs >= 0:
+                        pair = (tick - pairs) // 2
+                        if pair not in shared:
+                            shared[pair] = (net.add_node(), net.add_node())
+                            net.add_edge(*shared[pair],
+                                         graph.link_capacity[edge], 0)
+                        net.add_edge(hub_out[begin], shared[pair][0], cap,
+                                     TICK_COST)
+                        net.add_edge(shared[pair][1], hub_in[finish], cap,
+                                     TICK_COST * (travel - 1) - gain)
+                        continue
+                    else:
+                        flying = net.add_node()
+                        arc = net.add_edge(hub_out[begin], flying, cap,
+                                           TICK_COST)
+                        net.add_edge(flying, hub_in[finish], cap,
+                                     TICK_COST * (travel - 1) - gain)
+                    moves[arc] = (edge, tick, travel)
+
+        if (graph.start, 0) in hub_in and (graph.end, horizon) in hub_out:
+            net.add_edge(source, hub_in[(graph.start, 0)], self.drones, 0)
+            net.add_edge(hub_out[(graph.end, horizon)], sink,
+                         self.drones, 0)
+        return (net, source, sink, moves, waits)
+
+    def schedule(self, horizon: int) -> Solution | None:
+        """
+        Routes the whole swarm within a horizon without overloading any
+        restricted link (see the class docstring).
+
+        Returns:
+            The solved network with its movement and waiting edge ids
+            (see build), or None if the swarm does not fit.
+        """
+        graph = self.graph
+        if not self.fits(horizon):
+            return None
+        # (limits, whether to refute them with fits first); the
+        # alternating split is only a restriction, tried before the
+        # branch and bound as it usually fits already
+        branches: List[Tuple[Dict[Tuple[int, int], int], bool]] = \
+            [({}, False), (self.alternate(horizon), False)]
+        while branches:
+            limits, check = branches.pop()
+            if check and not self.fits(horizon, limits):
+                continue
+            net, source, sink, moves, waits = self.build(horizon, limits)
+            self.solved += 1
+            flow, _ = net.solve(source, sink, self.drones)
+            if flow < self.drones:
+                continue
+            departures: Dict[Tuple[int, int], int] = {}
+            for arc, (edge, tick, travel) in moves.items():
+                if travel > 1 and net.flow(arc) > 0:
+                    departures[(edge, tick)] = net.flow(arc)
+            overload = None
+            for (edge, tick), first in sorted(departures.items()):
+                second = departures.get((edge, tick + 1), 0)
+                if first + second > graph.link_capacity[edge]:
+                    overload = (edge, tick, first)
+                    break
+            if overload is None:
+                self._found = (horizon, (net, moves, waits))
+                return self._found[1]
+            edge, tick, first = overload
+            cap = graph.link_capacity[edge]
+            # pushed last, so keeping the earlier departures is tried
+            # first, straight away; its siblings are only tried when it
+            # failed, and are worth refuting before
+            for kept in sorted(range(cap + 1), key=lambda k: abs(k - first),
+                               reverse=True):
+                split = dict(limits)
+                for key, bound in (((edge, tick), kept),
+                                   ((edge, tick + 1), cap - kept)):
+                    split[key] = min(split.get(key, cap), bound)
+                branches.append((split, kept != first))
+        return None
+
+    def alternate(self, horizon: int) -> Dict[Tuple[int, int], int]:
+        """
+        Limits splitting the capacity of every restricted link by tick
+        parity: ceil(c/2) departures on the parity of the earliest
+        possible departure, floor(c/2) on the other one. Two consecutive
+        ticks then never exceed it, so any flow within these limits is
+        a schedule, but not always one of the shortest.
+        """
+        graph = self.graph
+        limits: Dict[Tuple[int, int], int] = {}
+        for hub in range(len(graph)):
+            phase = int(self.from_start[hub]) % 2 \
+                if self.from_start[hub] < INF else 0
+            for edge in graph.neighbours(hub):
+                if graph.zone_cost[graph.targets[edge]] < 2:
+                    continue
+                cap = graph.link_capacity[edge]
+                for tick in range(horizon):
+                    limits[(edge, tick)] = (cap + 1) // 2 \
+                        if tick % 2 == phase else cap // 2
+        return limits
+
+    def fits(self, horizon: int,
+             limits: Dict[Tuple[int, int], int] | None = None) -> bool:
+        """
+        Checks whether the swarm fits in both pair relaxations of a
+        horizon (see build): a necessary condition for a schedule within
+        the limits, and a much cheaper one to refute.
+        """
+        if not limits and horizon in self._fits:
+            return self._fits[horizon]
+        fit = True
+        for pairs in (0, 1):
+            net, source, sink, _, _ = self.build(horizon, limits, pairs)
+            self.solved += 1
+            flow, _ = net.solve(source, sink, self.drones)
+            if flow < self.drones:
+                fit = False
+                break
+        if not limits:
+            self._fits[horizon] = fit
+        return fit
+
+    def is_feasible(self, horizon: int) -> bool:
+        """Checks whether every drone can reach the end within horizon
+        ticks."""
+        return self.schedule(horizon) is not None
+
+    def min_horizon(self) -> int:
+        """
+        Finds the minimum feasible turn count. The relaxations (see fits)
+        are cheap, so their minimum is searched first: the horizon is
+        doubled from the travel-time lower bound until the swarm fits,
+        then the last interval is binary searched. The exact check only
+        starts from there, one tick at a time. Returns -1 if the end is
+        unreachable.
+        """
+        low = self.lower_bound()
+        if low < 0:
+            return -1
+        if self.drones <= 0:
+            return 0
+        # one drone every two ticks on the fastest route always fits
+        limit = low + 2 * self.drones + 2
+        if not self.fits(low):
+            high = low + 1
+            while not self.fits(high):
+                low = high
+                if high >= limit:
+                    return -1
+                high = min(high * 2, limit)
+            while high - low > 1:
+                middle = (low + high) // 2
+                if self.fits(middle):
+                    high = middle
+                else:
+                    low = middle
+            low = high
+        while not self.is_feasible(low):
+            if low >= limit:
+                return -1
+            low += 1
+        return low
+
+    def plan(self, horizon: int) -> List[List[Tuple[int, int]]]:
+        """
+        Schedules a horizon (see schedule) and splits the flow into one
+        itinerary per drone.
+
+        Returns:
+            For every drone, its (hub id, link edge index) state at the
+            end of every tick 0..horizon; the edge index is -1 unless the
+            drone is still travelling towards a restricted hub. The list
+            is empty when the swarm does not fit in the horizon.
+        """
+        graph = self.graph
+        solved: Solution | None = None
+        if self._found is not None and self._found[0] == horizon:
+            solved = self._found[1]
+        else:
+            solved = self.schedule(horizon)
+        if solved is None:
+            return []
+        net, moves, waits = solved
+        departures: Dict[Tuple[int, int], deque] = {}
+        for arc, (edge, tick, travel) in moves.items():
+            used = net.flow(arc)
+            if used > 0:
+                hub = self._edge_source(edge)
+                departures.setdefault((hub, tick), deque()).extend(
+                    [(edge, travel)] * used)
+        waiting = {key: net.flow(arc) for key, arc in waits.items()}
+
+        # standard flow decomposition: every drone follows arcs that
+        # still carry flow, consuming one unit of each
+        itineraries: List[List[Tuple[int, int]]] = []
+        for _ in range(self.drones):
+            states = [(graph.start, -1)]
+            hub = graph.start
+            tick = 0
+            while tick < horizon:
+                leaving = departures.get((hub, tick))
+                if hub != graph.end and waiting.get((hub, tick), 0) > 0:
+                    waiting[(hub, tick)] -= 1
+                    states.append((hub, -1))
+                    tick += 1
+                elif leaving and hub != graph.end:
+                    edge, travel = leaving.popleft()
+                    target = graph.targets[edge]
+                    for _ in range(travel - 1):
+                        states.append((hub, edge))
+                    states.append((target, -1))
+                    hub = target
+                    tick += travel
+                else:
+                    states.append((hub, -1))
+                    tick += 1
+            itineraries.append(states)
+        return itineraries
+
+    def _edge_source(self, edge: int) -> int:
+        """Returns the hub id an edge index leaves from."""
+        offsets = self.graph.offsets
+        low, high = 0, len(self.graph) - 1
+        while low < high:
+            middle = (low + high + 1) // 2
+            if offsets[middle] <= edge:
+                low = middle
+            else:
+                high = middle - 1
+        return low
+
+
+class PlannedSimulator(Simulator):
+    """
+    Simulator playing back itineraries planned ahead of time.
+
+    Subclasses fill 'itineraries' and 'horizon' at construction;
+    next_move then only plays the plan back, tick by tick, with the same
+    telemetry as the other simulators. The valid_map argument is
+    ignored: the planners route over the full graph.
+
+    Attributes:
+        horizon (int): Turn count of the plan (-1 if the end hub cannot
+        be reached).
+        itineraries (List[List[Tuple[int, int]]]): Planned state of every
+        drone at the end of every tick 0..horizon: (hub id, -1) when the
+        drone is in a hub, (hub id it left, edge index) while it is still
+        travelling towards a restricted hub.
+        tick (int): Number of ticks played back.
+    """
+    def __init__(self, graph: Dict[str, Zone],
+                 valid_paths: List[Path], drones: int) -> None:
+        super().__init__(graph, valid_paths, drones)
+        self.horizon = -1
+        self.itineraries: List[List[Tuple[int, int]]] = []
+        self.tick = 0
+
+    def start_simulation(self, valid_map: Dict[str, List],
+                         output: TextIO | None = None) -> int:
+        """
+        Plays the whole schedule back.
+
+        Returns:
+            int: The number of turns simulated.
+        """
+        move_counter = 0
+        if self.horizon < 0:
+            print("Error: Drones can not reach the end hub.",
+                  file=sys.stderr)
+            return move_counter
+        while self.tick < self.horizon:
+            drone_move = self.next_move(valid_map)
+            move_counter += 1
+            if output is not None:
+                output.write(f"{drone_move.rstrip()}\n")
+        if output is None:
+            print(f"Total Moves: {move_counter}")
+        return move_counter
+
+    def next_move(self, valid_map: Dict[str, List]) -> str:
+        """
+        Applies the planned moves of the next tick.
+
+        Returns:
+            str: The drone movements of the tick (empty once the schedule
+                 is over).
+        """
+        if self.tick >= self.horizon:
+            for drone in self.drones:
+                drone.txt = ""
+            return ""
+        self.tick += 1
+        zones = self.compiled.zones
+        links = self.compiled.links
+        drone_move = ""
+        for drone, states in zip(self.drones, self.itineraries):
+            drone.txt = ""
+            prev_hub, prev_edge = states[self.tick - 1]
+            hub, edge = states[self.tick]
+            if edge >= 0:
+                link = links[edge]
+                if prev_edge < 0:
+                    self._set_drone_params(drone, zones[prev_hub], link)
+                else:
+                    drone.increase_move()
+                    drone.total_moves += 1
+                drone.interpolate_target(link)
+                drone.txt = f"{drone.name}-{drone.pos.name}"\
+                            f"-{link.target.name}"
+            elif hub != prev_hub:
+                if prev_edge < 0:
+                    edge = self.compiled.edge_index(prev_hub, hub)
+                    self._set_drone_params(drone, zones[prev_hub],
+                                           links[edge])
+                else:
+                    drone.increase_move()
+                    drone.total_moves += 1
+                link = links[edge] if prev_edge < 0 else links[prev_edge]
+                link.free()
+                drone.reset_move()
+                drone.set_link(None)
+                drone.update_pos(zones[hub])
+                drone.set_target_pos(drone.pos.coordinates)
+                drone.txt = f"{drone.name}-{drone.pos.name}"
+            if len(drone.txt) > 0:
+                drone_move += f"{drone.txt} "
+        return drone_move
+
+    def _set_drone_params(self, drone: Drone, source: Zone,
+                          link: Link) -> None:
+        """Moves a drone from its hub onto a link, reserving the target
+        hub like AdvanceSimulator does."""
+        link.populate()
+        drone.set_last_pos(source.coordinates)
+        source.free()
+        drone.increase_move()
+        drone.set_link(link)
+        drone.total_moves += 1
+        link.target.populate()
+
+
+class FlowSimulator(PlannedSimulator):
+    """
+    Simulator replaying a min-cost-flow plan.
+
+    At construction the TimeExpandedPlanner finds the minimum number of
+    turns for the whole swarm and a schedule reaching it, the cheapest
+    one of the first branch that does not overload a restricted link.
+    """
+    def __init__(self, graph: Dict[str, Zone],
+                 valid_paths: List[Path], drones: int) -> None:
+        super().__init__(graph, valid_paths, drones)
+        planner = TimeExpandedPlanner(self.compiled, len(self.drones))
+        self.horizon = planner.min_horizon()
+        if self.horizon >= 0:
+            self.itineraries = planner.plan(self.horizon)
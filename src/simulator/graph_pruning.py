@@ -0,0 +1,135 @@
+from typing import Dict, Tuple
+from collections import deque
+from dataclasses import dataclass
+import copy
+from src.parser.map_constructor import Zone
+from src.parser.compiled_graph import CompiledGraph
+
+
+@dataclass
+class PruningReport:
+    """
+    How much of a graph prune_graph removed.
+
+    Attributes:
+        hubs (int): Hubs of the original graph.
+        links (int): Links of the original graph.
+        blocked (int): Blocked hubs removed.
+        unreachable (int): Hubs removed because the start cannot reach
+        them.
+        dead_ends (int): Reachable hubs removed because they cannot
+        reach the end.
+        pruned_links (int): Links removed.
+    """
+    hubs: int
+    links: int
+    blocked: int = 0
+    unreachable: int = 0
+    dead_ends: int = 0
+    pruned_links: int = 0
+
+    @property
+    def pruned_hubs(self) -> int:
+        return self.blocked + self.unreachable + self.dead_ends
+
+    def __str__(self) -> str:
+        return f"Pruned {self.pruned_hubs}/{self.hubs} hubs " \
+               f"({self.blocked} blocked, {self.unreachable} unreachable, " \
+               f"{self.dead_ends} dead ends) and " \
+               f"{self.pruned_links}/{self.links} links"
+
+
+def route_hubs(graph: CompiledGraph) -> Tuple[bytearray, bytearray]:
+    """
+    Runs a forward BFS from the start and a reverse BFS from the end.
+
+    Blocked hubs are never entered, and neither search goes through the
+    end hub: drones stop there, so its outgoing links lead nowhere.
+
+    Returns:
+        Tuple[bytearray, bytearray]: 1 per hub id reachable from the
+        start, and 1 per hub id from which the end is reachable.
+    """
+    size = len(graph)
+    reached = bytearray(size)
+    reaching = bytearray(size)
+    if graph.start < 0 or graph.end < 0:
+        return reached, reaching
+    reached[graph.start] = 1
+    queue = deque([graph.start])
+    while queue:
+        hub = queue.popleft()
+        if hub == graph.end:
+            continue
+        for edge in graph.neighbours(hub):
+            target = graph.targets[edge]
+            if not reached[target] and not graph.is_blocked(target):
+                reached[target] = 1
+                queue.append(target)
+
+    reaching[graph.end] = 1
+    queue = deque([graph.end])
+    while queue:
+        hub = queue.popleft()
+        for name in graph.zones[hub].incoming:
+            source = graph.ids[name]
+            if not reaching[source] and not graph.is_blocked(source) \
+                    and source != graph.end:
+                reaching[source] = 1
+                queue.append(source)
+    return reached, reaching
+
+
+def prune_graph(graph: Dict[str, Zone]
+                ) -> Tuple[Dict[str, Zone], PruningReport]:
+    """
+    Strips every hub and link that no start->end route can use.
+
+    A hub is kept when the start reaches it and it reaches the end (see
+    route_hubs); a link is kept when it joins two kept hubs, neither
+    leaves the end nor enters the start. The start and end hubs are always
+    kept. The result holds copies of the kept zones in map order, with
+    their own links, so the original graph (used by the simulators and
+    the visualizer) is left untouched, and the paths found on it name the
+    same hubs as on the original graph.
+
+    Args:
+        graph (Dict[str, Zone]): The parsed hub graph.
+
+    Returns:
+        Tuple[Dict[str, Zone], PruningReport]: The pruned graph and what
+        was removed.
+    """
+    compiled = CompiledGraph(graph)
+    reached, reaching = route_hubs(compiled)
+    report = PruningReport(len(compiled), len(compiled.targets))
+    keep = bytearray(len(compiled))
+    for hub in range(len(compiled)):
+        if hub in (compiled.start, compiled.end) or \
+                (reached[hub] and reaching[hub]):
+            keep[hub] = 1
+        elif compiled.is_blocked(hub):
+            report.blocked += 1
+        elif not reached[hub]:
+            report.unreachable += 1
+        else:
+            report.dead_ends += 1
+
+    pruned: Dict[str, Zone] = {}
+    for hub, zone in enumerate(compiled.zones):
+        if keep[hub]:
+            clone = copy.copy(zone)
+            clone.links = []
+            clone.link_index = {}
+            clone.incoming = {}
+            pruned[zone.name] = clone
+    for hub, zone in enumerate(compiled.zones):
+        for edge in compiled.neighbours(hub):
+            target = compiled.targets[edge]
+            if keep[hub] and keep[target] and hub != compiled.end \
+                    and target != compiled.start:
+                pruned[zone.name].add_link(pruned[compiled.names[target]],
+                                           compiled.link_capacity[edge])
+            else:
+                report.pruned_links += 1
+    return pruned, report
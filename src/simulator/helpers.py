@@ -1,6 +1,7 @@
 from __future__ import annotations
-from typing import Dict, List, Tuple, TYPE_CHECKING
+from typing import Dict, List, Set, Tuple, TYPE_CHECKING
 from src.parser.map_constructor import Zone
+from src.simulator.path_finder import Path
 if TYPE_CHECKING:
     from src.visualizer.map_visualizer import ConstantParameters
 
@@ -23,70 +24,67 @@ def get_pos_obj(graph: Dict[str, Zone],
     return None
 
 
-def format_valid_paths_into_list(paths: List[str]) -> List[List[str]]:
-    """
-    Converts raw comma-separated path strings into a nested list structure.
-
-    This prepares the DFS output for easier indexing and sorting.
-    """
-    new_paths = []
-    for path in paths:
-        path_list = path.split(", ")
-        # path_list[-1] = float(path_list[-1])
-        new_paths.append(path_list)
-    return new_paths
-
-
 def create_valid_graph(hubs_name: List[str],
-                       paths: List[List]) -> Dict[str, List[str]]:
+                       paths: List[Path],
+                       map: Dict[str, Zone] | None = None
+                       ) -> Dict[str, List[str]]:
     """
     Generates an adjacency-style 'Priority Map'.
 
     For every hub, it identifies all possible next steps found in valid paths.
-    Paths are sorted by cost (last element of path list) to ensure that
-    higher-efficiency options appear earlier in the adjacency list.
+    Paths are sorted by cost to ensure that higher-efficiency options
+    appear earlier in the adjacency list.
+    The paths are walked once, remembering the next hops already seen per
+    hub id, instead of searching every path for every hub. When 'map' is
+    given, next hops without a matching link in 'Zone.link_index' are
+    dropped.
+
+    Args:
+        hubs_name: Hub names in map order; Path hub ids index this list.
+        paths: Routes found by a PathFinder.
+        map: Optional graph used to drop next hops without a link.
     """
-    priority_paths: Dict[str, List[str]] = {}
-    sorted_paths = sorted(paths, key=lambda path: float(path[-1]))
-    # print(sorted_paths)
-    for hub in hubs_name:
-        priority_paths[hub] = []
-        for path in sorted_paths:
-            try:
-                idx = path.index(hub)
-                if len(path) > idx + 2:
-                    if path[idx + 1] not in priority_paths[hub]:
-                        priority_paths[hub].append(path[idx + 1])
-            except ValueError:
-                pass
-    # print(priority_paths)
+    priority_paths: Dict[str, List[str]] = {hub: [] for hub in hubs_name}
+    seen: List[Set[int]] = [set() for _ in hubs_name]
+    for path in sorted(paths, key=lambda path: path.cost):
+        hubs = path.hubs
+        visited: Set[int] = set()
+        for idx in range(len(hubs) - 1):
+            hub, next_hub = hubs[idx], hubs[idx + 1]
+            if hub in visited:
+                continue
+            visited.add(hub)
+            if next_hub in seen[hub]:
+                continue
+            name, next_name = hubs_name[hub], hubs_name[next_hub]
+            if map is not None and map[name].get_link(next_name) is None:
+                continue
+            seen[hub].add(next_hub)
+            priority_paths[name].append(next_name)
     return priority_paths
 
 
 def create_reverse_valid_graph(hubs_name: List[str],
-                               paths: List[List],
+                               paths: List[Path],
                                map: Dict[str, Zone]) -> Dict[str, List[str]]:
     """
     It create a map in reverse order starting from the goal to the start.
     It generates connections that leads to the next hub.
+
+    Single pass over the paths sorted by cost: every hub of a path records
+    its predecessor once, through a per-hub id set, instead of looking
+    every hub up in every path.
     """
-    priority_paths: Dict[str, List[str]] = {}
-    sorted_paths = sorted(paths, key=lambda path: float(path[-1]))
-    # print(sorted_paths)
-    for hub in reversed(hubs_name):
-        priority_paths[hub] = []
-
-    for hub in reversed(hubs_name):
-        priority_paths[hub] = []
-        for path in sorted_paths:
-            try:
-                hub_idx = path.index(hub)
-                if (hub_idx > 0 and
-                   path[hub_idx - 1] not in priority_paths[hub]):
-                    priority_paths[hub].append(path[hub_idx - 1])
-            except ValueError:
-                pass
-    # print(priority_paths)
+    priority_paths: Dict[str, List[str]] = {
+        hub: [] for hub in reversed(hubs_name)}
+    seen: List[Set[int]] = [set() for _ in hubs_name]
+    for path in sorted(paths, key=lambda path: path.cost):
+        hubs = path.hubs
+        for idx in range(1, len(hubs)):
+            hub, last_hub = hubs[idx], hubs[idx - 1]
+            if last_hub not in seen[hub]:
+                seen[hub].add(last_hub)
+                priority_paths[hubs_name[hub]].append(hubs_name[last_hub])
     return priority_paths
 
 # def create_reverse_valid_graph(
@@ -1,43 +1,156 @@
-from typing import List, Dict
+from typing import Dict, Iterator, List, NamedTuple, Set, Tuple
 from abc import ABC, abstractmethod
+import heapq
+import time
 from src.parser.map_constructor import Zone
-from src.simulator.helpers import get_pos_obj
+from src.parser.compiled_graph import CompiledGraph
+from src.simulator.graph_pruning import PruningReport, prune_graph
+
+
+def link_weights(graph: CompiledGraph) -> List[float]:
+    """
+    Pre-computes the weighted cost of every edge: the zone cost of the
+    target divided by the link capacity when both hubs can hold that
+    capacity, the plain zone cost otherwise.
+    """
+    weights: List[float] = []
+    for hub in range(len(graph)):
+        for edge in graph.neighbours(hub):
+            target = graph.targets[edge]
+            cap = graph.link_capacity[edge]
+            if (graph.hub_capacity[hub] >= cap and
+                    graph.hub_capacity[target] >= cap):
+                weights.append(graph.zone_cost[target] / cap)
+            else:
+                weights.append(graph.zone_cost[target])
+    return weights
+
+
+class Path(NamedTuple):
+    """
+    One start->end route found by a PathFinder.
+
+    Hub ids follow the map order of the graph given to the finder
+    ('list(graph.keys())', which is also the id order of its
+    CompiledGraph), even when the search ran on a pruned copy.
+
+    Attributes:
+        hubs (Tuple[int, ...]): Hub ids of the route, start and end
+        included.
+        cost (float): Weighted cost of the route (see link_weights).
+        bottleneck (int): Smallest link or hub capacity along the route,
+        i.e. how many drones can use it side by side.
+    """
+    hubs: Tuple[int, ...]
+    cost: float
+    bottleneck: int
 
 
 class PathFinder(ABC):
     """
     An abstract base class for graph traversal and path discovery.
 
-    Provides foundational utilities for validating movement constraints
-    and identifying terminal states in the drone network.
+    Provides foundational utilities for identifying terminal states in
+    the drone network. With 'prune' the graph is first stripped of the
+    hubs and links no start->end route can use (see prune_graph), so
+    subclasses only search the useful part.
+
+    Subclasses implement '_search' as a generator, so routes are produced
+    lazily: 'iter_paths' stops it as soon as the caller has enough of them
+    (count, cost or time budget), and 'find_valid_paths' collects every
+    route.
 
     Attributes:
+        names (List[str]): Hub name of every Path id (the map order).
         graph (Dict[str, Zone]): The pre-processed graph of hubs to explore.
+        pruning (PruningReport | None): What pruning removed, None when
+        the graph was not pruned.
+        compiled (CompiledGraph): Integer-indexed view of the graph.
+        weights (List[float]): Cost of travelling along every edge.
+        ordered (bool): True when routes come by increasing cost.
+        stop_reason (str | None): 'max_paths' or 'time_budget' when the
+        last iter_paths run stopped before exhausting the search.
     """
-    def __init__(self, graph: Dict[str, Zone]) -> None:
+    ordered = False
+
+    def __init__(self, graph: Dict[str, Zone], prune: bool = False,
+                 compiled: CompiledGraph | None = None) -> None:
+        self.names: List[str] = list(graph.keys())
         self.graph = graph
+        self.pruning: PruningReport | None = None
+        # map order id of every pruned graph id, None without pruning
+        self._map_ids: List[int] | None = None
+        if prune:
+            self.graph, self.pruning = prune_graph(graph)
+            map_ids = {name: idx for idx, name in enumerate(self.names)}
+            self._map_ids = [map_ids[name] for name in self.graph]
+        self.compiled = compiled if compiled is not None and not prune \
+            else CompiledGraph(self.graph)
+        self.weights = link_weights(self.compiled)
+        self.stop_reason: str | None = None
 
     @abstractmethod
-    def find_valid_paths(self) -> List[str]:
-        """Discovers all viable routes from Start to End."""
+    def _search(self, max_cost: float, deadline: float) -> Iterator[Path]:
+        """
+        Yields routes from Start to End.
+
+        Routes costing more than 'max_cost' may be skipped, and the search
+        returns once time.perf_counter() passes 'deadline'.
+        """
         pass
 
-    def can_move_forward(self, curr_pos: Zone, path: str) -> bool:
+    def iter_paths(self, max_paths: int | None = None,
+                   max_cost: float | None = None,
+                   time_budget: float | None = None) -> Iterator[Path]:
         """
-        Validates if a move is permissible based on link availability,
-        cycle prevention (visited nodes), and zone type constraints.
+        Lazily yields routes from Start to End.
+
+        Args:
+            max_paths (int | None): Stop after this many routes.
+            max_cost (float | None): Skip routes costing more (an ordered
+            finder stops at the first one).
+            time_budget (float | None): Stop searching after this many
+            seconds.
+
+        Yields:
+            Path: The routes, by increasing cost when 'ordered'.
         """
-        if len(curr_pos.links) == 0 or\
-                curr_pos.name in path or\
-                curr_pos.zone_type.value == "blocked":
-            return False
-        return True
+        self.stop_reason = None
+        if max_paths is not None and max_paths <= 0:
+            self.stop_reason = "max_paths"
+            return
+        cost_cap = max_cost if max_cost is not None else float("inf")
+        deadline = time.perf_counter() + time_budget \
+            if time_budget is not None else float("inf")
+        count = 0
+        map_ids = self._map_ids
+        for path in self._search(cost_cap, deadline):
+            if path.cost > cost_cap:
+                if self.ordered:
+                    return
+                continue
+            if map_ids is not None:
+                path = path._replace(
+                    hubs=tuple(map_ids[hub] for hub in path.hubs))
+            yield path
+            count += 1
+            if max_paths is not None and count >= max_paths:
+                self.stop_reason = "max_paths"
+                return
+        if time.perf_counter() > deadline:
+            self.stop_reason = "time_budget"
+
+    def find_valid_paths(self) -> List[Path]:
+        """Discovers all viable routes from Start to End."""
+        return list(self.iter_paths())
+
+    def format_path(self, path: Path) -> str:
+        """Renders a route as 'hub, ..., cost' for display."""
+        names = ", ".join(self.names[hub] for hub in path.hubs)
+        return f"{names}, {path.cost}"
 
     def is_end(self, curr_pos: Zone) -> bool:
-        """
-        Validates if a move is permissible based on link availability,
-        cycle prevention (visited nodes), and zone type constraints.
-        """
+        """Checks whether a hub is the 'end' hub of the map."""
         if curr_pos.hub_type.value == "end":
             return True
         return False
@@ -45,58 +158,219 @@ class PathFinder(ABC):
 
 class DepthFirstSearch(PathFinder):
     """
-    Implements a recursive Depth-First Search to find all non-cyclic paths.
+    Enumerates every simple path from Start to End with an iterative DFS.
+
+    The search runs on the integer ids of a CompiledGraph with an explicit
+    stack, so maps thousands of hubs deep never reach Python's recursion
+    limit. The ancestors of the current hub double as the stack: every
+    frame holds a hub id, its accumulated cost and the next outgoing edge
+    to try, and popping a frame backtracks. Cycles are detected with a
+    boolean array indexed by hub id, which also makes hub names that are
+    prefixes of each other ('gate' vs 'gate2') distinct.
 
     Calculates a weighted cost for each discovered path based on zone type
-    penalties and bottleneck capacities.
+    penalties and bottleneck capacities. Routes come in DFS order, and
+    branches already above the cost cap are not explored.
     """
-    def find_valid_paths(self) -> List:
+    def _search(self, max_cost: float, deadline: float) -> Iterator[Path]:
         """
-        Initiates the recursive search starting from the 'start' hub.
+        Runs the search from the 'start' hub.
 
-        Returns:
-            List[str]: A list of strings, each representing a full path
-                       and its associated total cost.
+        The end hub is terminal: reaching it yields the path instead of
+        exploring its outgoing links. Blocked hubs and hubs without
+        outgoing links are never entered. The deadline is checked every
+        1024 backtracks.
         """
-        valid_paths: List = []
-        path = ""
-        cost = -1
-        link_cap = 1
-        curr_pos = get_pos_obj(self.graph, "start")
-        if curr_pos is not None:
-            self._use_recursion(curr_pos, path, cost, valid_paths,
-                                link_cap, curr_pos)
-        return valid_paths
-
-    def _use_recursion(self, curr_pos: Zone, path: str,
-                       cost: (int | float), valid_paths: List,
-                       link_cap: int, last_pos: Zone) -> None:
+        graph = self.compiled
+        start, end = graph.start, graph.end
+        if start < 0:
+            return
+        offsets, targets, weights = graph.offsets, graph.targets, \
+            self.weights
+        link_capacity, hub_capacity = graph.link_capacity, \
+            graph.hub_capacity
+        # 1 for the hubs of the current path and for the hubs that can
+        # never be entered (blocked, or a dead end without links)
+        closed = bytearray(len(graph))
+        for idx in range(len(graph)):
+            if graph.is_blocked(idx) or offsets[idx] == offsets[idx + 1]:
+                closed[idx] = 1
+        closed[start] = 1
+        hubs = [start]
+        # (hub, next edge, cost, bottleneck) of every ancestor
+        frames: List[Tuple[int, int, float, int]] = []
+        hub, edge = start, offsets[start]
+        cost = graph.zone_cost[start] - 1.0
+        neck = hub_capacity[start]
+        # the deadline is checked each time 'budget' drops to 0
+        timed = deadline != float("inf")
+        budget = 1024
+        while True:
+            if edge == offsets[hub + 1]:
+                closed[hub] = 0
+                if len(frames) == 0:
+                    break
+                hubs.pop()
+                hub, edge, cost, neck = frames.pop()
+                if timed:
+                    budget -= 1
+                    if budget == 0:
+                        if time.perf_counter() > deadline:
+                            return
+                        budget = 1024
+                continue
+            target = targets[edge]
+            next_cost = cost + weights[edge]
+            edge += 1
+            if next_cost > max_cost:
+                continue
+            if target == end:
+                yield Path(tuple(hubs) + (end,), next_cost,
+                           min(neck, link_capacity[edge - 1],
+                               hub_capacity[end]))
+            elif not closed[target]:
+                frames.append((hub, edge, cost, neck))
+                closed[target] = 1
+                hubs.append(target)
+                capacity = link_capacity[edge - 1]
+                if capacity < neck:
+                    neck = capacity
+                if hub_capacity[target] < neck:
+                    neck = hub_capacity[target]
+                hub, cost = target, next_cost
+                edge = offsets[target]
+
+
+class KShortestPaths(PathFinder):
+    """
+    Implements Yen's algorithm to find the K cheapest loopless paths.
+
+    Unlike DepthFirstSearch, which enumerates every simple path and grows
+    exponentially with the number of branches, this finder only explores
+    the graph K times with Dijkstra. Link weights follow the same cost
+    model as the DFS (zone cost divided by the link capacity when both
+    hubs can hold the link's capacity), so the returned routes are a
+    drop-in replacement for the DFS output. The search runs on the
+    integer ids of a CompiledGraph and yields every route as soon as it
+    is known to be the next cheapest one.
+
+    Attributes:
+        k (int | None): Maximum number of paths to return (None for no
+        limit).
+    """
+    ordered = True
+
+    def __init__(self, graph: Dict[str, Zone], prune: bool = False,
+                 compiled: CompiledGraph | None = None,
+                 k: int | None = 10) -> None:
+        super().__init__(graph, prune, compiled)
+        if k is not None and k <= 0:
+            raise ValueError("Number of paths (k) has to be positive.")
+        self.k = k
+
+    def _search(self, max_cost: float, deadline: float) -> Iterator[Path]:
         """
-        Internal recursive worker for path exploration.
+        Runs Yen's k-shortest loopless paths search from start to end.
 
-        Handles:
-        - Path string concatenation.
-        - Dynamic cost calculation based on Zone cost and Link capacity.
-        - Base-case termination at the 'end' hub or dead-ends.
-        - Implicit backtracking via the call stack.
+        Yields:
+            Path: Up to K routes ordered by increasing cost.
         """
-        if not self.can_move_forward(curr_pos, path):
-            path += f"{curr_pos.name}, "
-            if last_pos.capacity >= link_cap and curr_pos.capacity >= link_cap:
-                cost += curr_pos.cost / link_cap
-            else:
-                cost += curr_pos.cost
-            path += str(cost)
-            if self.is_end(curr_pos):
-                valid_paths.append(path)
+        start = self.compiled.start
+        end = self.compiled.end
+        if start < 0 or end < 0:
             return
-        # print(curr_pos.name, last_pos.name)
-        path += f"{curr_pos.name}, "
-        if last_pos.capacity >= link_cap and curr_pos.capacity >= link_cap:
-            cost += curr_pos.cost / link_cap
-        else:
-            cost += curr_pos.cost
-        for link in curr_pos.links:
-            link_cap = link.capacity
-            self._use_recursion(link.target, path, cost, valid_paths,
-                                link_cap, curr_pos)
+        first = self._shortest_path(start, end, set(), set())
+        if first is None:
+            return
+        shortest: List[Tuple[float, List[int]]] = [first]
+        yield self._to_path(first[1])
+        candidates: List[Tuple[float, int, List[int]]] = []
+        seen = {tuple(first[1])}
+        counter = 0
+        while self.k is None or len(shortest) < self.k:
+            _, last_path = shortest[-1]
+            for i in range(len(last_path) - 1):
+                if time.perf_counter() > deadline:
+                    return
+                root = last_path[: i + 1]
+                removed_edges: Set[int] = set()
+                for _, path in shortest:
+                    if len(path) > i and path[: i + 1] == root:
+                        removed_edges.add(
+                            self.compiled.edge_index(path[i], path[i + 1]))
+                spur_path = self._shortest_path(
+                    last_path[i], end, set(root[:-1]), removed_edges)
+                if spur_path is None:
+                    continue
+                full_path = root[:-1] + spur_path[1]
+                key = tuple(full_path)
+                if key not in seen:
+                    seen.add(key)
+                    counter += 1
+                    heapq.heappush(candidates, (self.path_cost(full_path),
+                                                counter, full_path))
+            if len(candidates) == 0:
+                break
+            cost, _, path = heapq.heappop(candidates)
+            if cost > max_cost:
+                return
+            shortest.append((cost, path))
+            yield self._to_path(path)
+
+    def _to_path(self, path: List[int]) -> Path:
+        """Builds the Path record of a hub id sequence."""
+        graph = self.compiled
+        neck = graph.hub_capacity[path[0]]
+        for last_pos, curr_pos in zip(path, path[1:]):
+            edge = graph.edge_index(last_pos, curr_pos)
+            neck = min(neck, graph.link_capacity[edge],
+                       graph.hub_capacity[curr_pos])
+        return Path(tuple(path), self.path_cost(path), neck)
+
+    def path_cost(self, path: List[int]) -> float:
+        """Computes the total weighted cost of a sequence of hub ids."""
+        cost = self.compiled.zone_cost[path[0]] - 1.0
+        for last_pos, curr_pos in zip(path, path[1:]):
+            cost += self.weights[self.compiled.edge_index(last_pos,
+                                                          curr_pos)]
+        return cost
+
+    def _shortest_path(self, source: int, end: int,
+                       removed_hubs: Set[int],
+                       removed_edges: Set[int]
+                       ) -> Tuple[float, List[int]] | None:
+        """
+        Dijkstra search from source to end that skips blocked hubs,
+        removed hubs and removed edges.
+
+        Returns:
+            The (cost, hub ids) pair of the cheapest route, or None when
+            the end hub cannot be reached.
+        """
+        graph = self.compiled
+        dist: Dict[int, float] = {source: 0.0}
+        parent: Dict[int, int] = {}
+        visited: Set[int] = set()
+        queue: List[Tuple[float, int]] = [(0.0, source)]
+        while queue:
+            cost, curr_pos = heapq.heappop(queue)
+            if curr_pos in visited:
+                continue
+            visited.add(curr_pos)
+            if curr_pos == end:
+                path = [end]
+                while path[-1] != source:
+                    path.append(parent[path[-1]])
+                path.reverse()
+                return (cost, path)
+            for edge in graph.neighbours(curr_pos):
+                target = graph.targets[edge]
+                if (target in visited or target in removed_hubs or
+                        edge in removed_edges or graph.is_blocked(target)):
+                    continue
+                new_cost = cost + self.weights[edge]
+                if new_cost < dist.get(target, float("inf")):
+                    dist[target] = new_cost
+                    parent[target] = curr_pos
+                    heapq.heappush(queue, (new_cost, target))
+        return None
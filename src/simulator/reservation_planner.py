@@ -0,0 +1,285 @@
+from typing import Dict, List, Tuple
+import heapq
+from src.parser.map_constructor import Zone
+from src.parser.compiled_graph import CompiledGraph
+from src.simulator.flow_planner import PlannedSimulator
+from src.simulator.path_finder import Path
+
+
+INF = float("inf")
+# Itinerary state: (hub id, -1) in a hub, (hub id left, edge index) while
+# still flying towards a restricted hub
+State = Tuple[int, int]
+
+
+class ReservationTable:
+    """
+    Space-time reservation table: capacity used per (hub, tick) and per
+    (link, tick).
+
+    A hub entry counts the drones inside the hub at the end of the tick
+    (drones flying towards a restricted hub are in no hub); a link entry
+    counts the drones moving over the link during the tick, so a drone
+    entering a restricted hub holds its link for two ticks. The start
+    and end hubs hold the whole swarm and are never tracked.
+
+    Attributes:
+        graph (CompiledGraph): Integer-indexed view of the hub graph.
+        hubs (Dict[int, int]): Used capacity per 'tick * hubs + hub id'.
+        links (Dict[int, int]): Used capacity per 'tick * edges + edge'.
+    """
+    def __init__(self, graph: CompiledGraph) -> None:
+        self.graph = graph
+        self.hubs: Dict[int, int] = {}
+        self.links: Dict[int, int] = {}
+        self._size = len(graph)
+        self._edges = len(graph.targets)
+
+    def hub_free(self, hub: int, tick: int) -> bool:
+        """Checks whether one more drone fits in a hub at a tick."""
+        if hub == self.graph.start or hub == self.graph.end:
+            return True
+        return self.hubs.get(tick * self._size + hub, 0) < \
+            self.graph.hub_capacity[hub]
+
+    def link_free(self, edge: int, tick: int) -> bool:
+        """Checks whether one more drone fits on a link at a tick."""
+        return self.links.get(tick * self._edges + edge, 0) < \
+            self.graph.link_capacity[edge]
+
+    def reserve_hub(self, hub: int, tick: int, count: int = 1) -> None:
+        """Adds (or with a negative count, releases) drones in a hub."""
+        if hub == self.graph.start or hub == self.graph.end:
+            return
+        key = tick * self._size + hub
+        self.hubs[key] = self.hubs.get(key, 0) + count
+
+    def reserve_link(self, edge: int, tick: int) -> None:
+        """Adds a drone on a link."""
+        key = tick * self._edges + edge
+        self.links[key] = self.links.get(key, 0) + 1
+
+
+class ReservationPlanner:
+    """
+    Cooperative space-time A* with a sliding window (WHCA*).
+
+    Drones are planned one after the other, closest to the end first,
+    through a ReservationTable: each one runs an A* over (hub, tick)
+    states that only uses the capacity the drones planned before it
+    left, with the travel time to the end hub (capacities ignored) as
+    heuristic. Reservations only cover the next 'window' ticks; a search
+    reaching the window edge stops there, trusting the heuristic for the
+    rest. The first 'window' // 2 ticks of every plan are kept, then
+    everybody is planned again from where they stand.
+
+    Drones not planned yet keep their place in the table for the whole
+    window, and release it when their turn comes, so a drone can always
+    at least wait where it is and no search ever fails.
+
+    Attributes:
+        graph (CompiledGraph): Integer-indexed view of the hub graph.
+        drones (int): Number of drones to route.
+        window (int): Ticks covered by the reservations of a round.
+        to_end (List[float]): Travel time from every hub id to the end.
+        expanded (int): A* states expanded so far.
+    """
+    def __init__(self, graph: CompiledGraph, drones: int,
+                 window: int = 8) -> None:
+        if window < 2:
+            raise ValueError("The window must cover at least 2 ticks")
+        self.graph = graph
+        self.drones = drones
+        self.window = window
+        self.to_end = graph.travel_times(forward=False)
+        self.expanded = 0
+
+    def search(self, table: ReservationTable, hub: int, tick: int,
+               limit: int, boundary: int) -> List[State]:
+        """
+        Finds the fastest route of one drone through the free capacity.
+
+        Args:
+            table (ReservationTable): Capacity used by the other drones.
+            hub (int): Hub id the drone is in at 'tick'.
+            tick (int): Tick the search starts from.
+            limit (int): Window edge: states from this tick on end the
+                         search.
+            boundary (int): Last tick kept from the plan (see _reserve).
+
+        Returns:
+            List[State]: The drone's state at the end of every tick after
+            'tick', up to the end hub or the window edge.
+        """
+        graph = self.graph
+        to_end = self.to_end
+        size = len(graph)
+        origin = tick * size + hub
+        parents: Dict[int, Tuple[int, int]] = {origin: (-1, -1)}
+        queue: List[Tuple[float, float, int, int]] = \
+            [(to_end[hub], to_end[hub], tick, hub)]
+        while queue:
+            _, _, now, current = heapq.heappop(queue)
+            key = now * size + current
+            if current == graph.end or now >= limit:
+                return self._states(parents, key, origin)
+            self.expanded += 1
+            steps = [(current, -1, 1)] if table.hub_free(
+                current, now + 1) else []
+            for edge in graph.neighbours(current):
+                target = graph.targets[edge]
+                if to_end[target] < INF:
+                    steps.append((target, edge, graph.zone_cost[target]))
+            for target, edge, cost in steps:
+                arrival = now + cost
+                child = arrival * size + target
+                if child in parents:
+                    continue
+                if edge >= 0 and not (
+                        table.hub_free(target, arrival) and
+                        all(table.link_free(edge, now + step)
+                            for step in range(1, cost + 1))):
+                    continue
+                if now < boundary < arrival and \
+                        not table.hub_free(target, boundary):
+                    continue
+                parents[child] = (key, edge)
+                heapq.heappush(queue, (arrival - tick + to_end[target],
+                                       to_end[target], arrival, target))
+        return []
+
+    def _states(self, parents: Dict[int, Tuple[int, int]], key: int,
+                origin: int) -> List[State]:
+        """Rebuilds the per-tick states of a route found by search."""
+        size = len(self.graph)
+        states: List[State] = []
+        while key != origin:
+            parent, edge = parents[key]
+            hub, tick = key % size, key // size
+            states.append((hub, -1))
+            for _ in range(tick - parent // size - 1):
+                states.append((parent % size, edge))
+            key = parent
+        states.reverse()
+        return states
+
+    def _reserve(self, table: ReservationTable, states: List[State],
+                 hub: int, tick: int, boundary: int) -> None:
+        """
+        Books the states a drone occupies after 'tick', leaving 'hub'.
+
+        A drone still flying at the 'boundary' tick lands right after
+        it, whatever the next round plans, so it also books a place in
+        its target hub at the boundary: the drones of that hub planned
+        to leave on the landing tick may stay instead, and must fit.
+        """
+        graph = self.graph
+        previous = (hub, -1)
+        for offset, (hub, edge) in enumerate(states, tick + 1):
+            if edge < 0:
+                table.reserve_hub(hub, offset)
+                if previous[1] >= 0:
+                    table.reserve_link(previous[1], offset)
+                elif previous[0] != hub:
+                    table.reserve_link(
+                        graph.edge_index(previous[0], hub), offset)
+            else:
+                table.reserve_link(edge, offset)
+                if offset == boundary:
+                    table.reserve_hub(graph.targets[edge], offset)
+            previous = (hub, edge)
+
+    def plan(self, limit: int = -1) -> List[List[State]]:
+        """
+        Plans every drone until the whole swarm is in the end hub.
+
+        Args:
+            limit (int): Maximum turn count (by default, one drone every
+                         two ticks over the longest route).
+
+        Returns:
+            List[List[State]]: For every drone, its state at the end of
+            every tick 0..horizon, or an empty list when the end hub
+            cannot be reached within the limit.
+        """
+        graph = self.graph
+        if graph.start < 0 or graph.end < 0 or \
+                self.to_end[graph.start] == INF:
+            return []
+        if limit < 0:
+            limit = int(self.to_end[graph.start] + 2) * (self.drones + 1)
+        itineraries: List[List[State]] = \
+            [[(graph.start, -1)] for _ in range(self.drones)]
+        step = self.window // 2
+        tick = 0
+        while any(states[-1] != (graph.end, -1) for states in itineraries):
+            if tick >= limit:
+                return []
+            table = ReservationTable(graph)
+            edge_of = self.window + tick
+            boundary = tick + step
+            current: List[Tuple[int, int]] = []
+            for states in itineraries:
+                hub, edge = states[-1]
+                arrival = tick
+                if edge >= 0:
+                    # still flying: lands next tick, whatever happens
+                    hub = graph.targets[edge]
+                    table.reserve_link(edge, tick + 1)
+                    arrival += 1
+                current.append((hub, arrival))
+                for held in range(tick + 1, edge_of + 1):
+                    table.reserve_hub(hub, held)
+
+            order = sorted(range(self.drones),
+                           key=lambda drone: (self.to_end[current[drone][0]],
+                                              drone))
+            plans: List[List[State]] = [[] for _ in range(self.drones)]
+            for drone in order:
+                hub, arrival = current[drone]
+                for held in range(tick + 1, edge_of + 1):
+                    table.reserve_hub(hub, held, -1)
+                route = self.search(table, hub, arrival, edge_of, boundary)
+                self._reserve(table, route, hub, arrival, boundary)
+                if arrival > tick:
+                    table.reserve_hub(hub, arrival)
+                    route.insert(0, (hub, -1))
+                # the search only stops early in the end hub
+                last = route[-1][0] if len(route) > 0 else hub
+                route += [(last, -1)] * (edge_of - tick - len(route))
+                plans[drone] = route
+
+            for states, route in zip(itineraries, plans):
+                states.extend(route[:step])
+            tick += step
+
+        horizon = max(len(states) for states in itineraries)
+        while all(len(states) == horizon and
+                  states[-2:] == [(graph.end, -1)] * 2
+                  for states in itineraries) and horizon > 1:
+            for states in itineraries:
+                states.pop()
+            horizon -= 1
+        return itineraries
+
+
+class ReservationSimulator(PlannedSimulator):
+    """
+    Simulator replaying a windowed cooperative A* (WHCA*) plan.
+
+    At construction the ReservationPlanner routes the drones one by one
+    through a space-time reservation table, window after window, until
+    the swarm reaches the end hub.
+
+    Attributes:
+        planner (ReservationPlanner): The planner that built the plan.
+    """
+    def __init__(self, graph: Dict[str, Zone],
+                 valid_paths: List[Path], drones: int,
+                 window: int = 8) -> None:
+        super().__init__(graph, valid_paths, drones)
+        self.planner = ReservationPlanner(self.compiled, len(self.drones),
+                                          window)
+        self.itineraries = self.planner.plan()
+        if len(self.itineraries) > 0:
+            self.horizon = len(self.itineraries[0]) - 1
@@ -0,0 +1,274 @@
+from typing import Deque, Dict, List, Set, TextIO, Tuple
+import sys
+from array import array
+from collections import deque
+from src.parser.map_constructor import Zone, Link
+from src.simulator.simulation_engine import Simulator, Drone
+from src.simulator.path_finder import Path
+
+
+INF = float("inf")
+
+
+class CostToGoSimulator(Simulator):
+    """
+    Base of the engines choosing every next hop at run time from the
+    ticks left to the end hub.
+
+    Every hub id gets its cost-to-go (minimum ticks to the end hub, from
+    a reverse Dijkstra) and every edge the ticks to the end through it.
+    Hubs are served by increasing cost-to-go, so a drone leaving a hub
+    frees its place before the drones upstream look at it.
+
+    Attributes:
+        drone_count (int): Number of drones of the simulation.
+        cost_to_go (List[float]): Ticks from every hub id to the end hub
+        (inf when the end cannot be reached).
+        remaining (List[float]): Ticks to the end through every edge
+        (target zone cost plus its cost-to-go).
+        order (List[int]): Hub ids by increasing cost-to-go, end hub and
+        unreachable hubs excluded.
+    """
+    def __init__(self, graph: Dict[str, Zone],
+                 valid_paths: List[Path], drones: int) -> None:
+        super().__init__(graph, valid_paths, drones)
+        compiled = self.compiled
+        self.drone_count = drones
+        self.cost_to_go = compiled.travel_times(forward=False)
+        self.remaining: List[float] = [INF] * len(compiled.targets)
+        for hub in range(len(compiled)):
+            for edge in compiled.neighbours(hub):
+                target = compiled.targets[edge]
+                if hub != compiled.end and self.cost_to_go[target] < INF:
+                    self.remaining[edge] = compiled.zone_cost[target] + \
+                        self.cost_to_go[target]
+        self.order = sorted((hub for hub in range(len(compiled))
+                             if hub != compiled.end and
+                             self.cost_to_go[hub] < INF),
+                            key=lambda hub: self.cost_to_go[hub])
+        self._edge_source: Dict[str, List] | None = None
+        self._edges: List[List[int]] = []
+
+    def get_next_edges(self, valid_map: Dict[str, List]) -> List[List[int]]:
+        """
+        Returns the next-hop edge indices of every hub id, in the
+        valid_map priority order, leaving out links to hubs the end
+        cannot be reached from. Resolved once per valid_map object, like
+        get_next_links.
+        """
+        if valid_map is not self._edge_source:
+            self._edges = []
+            for hub, links in enumerate(self.get_next_links(valid_map)):
+                edges = (self.compiled.edge_index(hub, link.target.idx)
+                         for link in links)
+                self._edges.append([edge for edge in edges
+                                    if self.remaining[edge] < INF])
+            self._edge_source = valid_map
+        return self._edges
+
+    def start_simulation(self, valid_map: Dict[str, List],
+                         output: TextIO | None = None) -> int:
+        """
+        Runs ticks until every drone reached (or reserved) the end hub.
+
+        Args:
+            valid_map: Adjacency list mapping hub names to their
+                       prioritized next-step options.
+            output: Optional text stream receiving one line of drone
+                    moves per turn. The 'Total Moves' report is only
+                    printed when no stream is given.
+        Returns:
+            int: The number of turns simulated.
+        """
+        move_counter = 0
+        if self.end is not None:
+            while self.end.occupancy < self.drone_count:
+                drone_move = self.next_move(valid_map)
+                if len(drone_move) == 0:
+                    print("Error: Simulation is stuck, no drone can move.",
+                          file=sys.stderr)
+                    break
+                move_counter += 1
+                if output is not None:
+                    output.write(f"{drone_move.rstrip()}\n")
+            if output is None:
+                print(f"Total Moves: {move_counter}")
+        return move_counter
+
+
+class RoutingSimulator(CostToGoSimulator):
+    """
+    Simulator choosing every next hop at run time.
+
+    AdvanceSimulator always tries the valid_map next hops in the same
+    order, so drones keep queueing for a saturated first choice, or take
+    the first free detour however long it is. Here each tick a drone
+    waiting at a hub estimates, for each of its next hops, the ticks to
+    the end through it: the zone cost plus the target's cost-to-go (see
+    CostToGoSimulator), plus a live congestion term, plus one tick when
+    the link or the target hub is full. It takes the best next hop if it
+    is free and waits for it otherwise; the valid_map order only breaks
+    ties.
+
+    The congestion term of a hub is the number of drones ahead of a
+    newcomer, over its drain rate (drones per tick it can send on,
+    bounded by its 'max_drones' since a drone stays at least one tick):
+    its 'Zone.occupancy', which counts the drones inside and the ones on
+    their way in (every 'Link.occupancy' pointing at it), plus the
+    drones waiting elsewhere for it. Drones wait in a FIFO queue per
+    hub, remembering the hub they wait for, so the pending counters and
+    queues are updated as drones move and decide, never recomputed.
+
+    A tick only visits the drones waiting in these queues and the
+    drones in transit; drones landing in the end hub are never visited
+    again.
+
+    Attributes:
+        congestion (float): Weight of the congestion term (0 routes on
+        static costs only).
+        drain (List[float]): Drones per tick leaving every hub id.
+        queues (List[Deque[Tuple[int, int]]]): Indices of the drones
+        waiting at every hub id in arrival order, with the hub id they
+        wait for (-1 when they have not decided yet).
+        pending (array): Drones waiting for every hub id.
+        in_transit (Set[int]): Indices of drones currently on a link.
+    """
+    def __init__(self, graph: Dict[str, Zone],
+                 valid_paths: List[Path], drones: int,
+                 congestion: float = 2.0) -> None:
+        super().__init__(graph, valid_paths, drones)
+        compiled = self.compiled
+        self.congestion = congestion
+        self.drain: List[float] = [0.0] * len(compiled)
+        for hub in range(len(compiled)):
+            for edge in compiled.neighbours(hub):
+                if self.remaining[edge] < INF:
+                    target = compiled.targets[edge]
+                    self.drain[hub] += min(
+                        compiled.link_capacity[edge],
+                        compiled.hub_capacity[target]) / \
+                        compiled.zone_cost[target]
+            # a drone stays at least one tick in a hub
+            self.drain[hub] = min(self.drain[hub],
+                                  compiled.hub_capacity[hub])
+        self.queues: List[Deque[Tuple[int, int]]] = [
+            deque() for _ in range(len(compiled))]
+        if compiled.start >= 0:
+            self.queues[compiled.start].extend(
+                (drone_idx, -1) for drone_idx in range(len(self.drones)))
+        self.pending = array("i", [0] * len(compiled))
+        self.in_transit: Set[int] = set()
+        self._labelled: List[Drone] = []
+
+    def delay(self, hub: int) -> float:
+        """Estimated ticks a drone entering a hub queues there: the
+        drones inside, on their way in or waiting for it, over its drain
+        rate."""
+        if hub == self.compiled.end or self.drain[hub] == 0:
+            return 0.0
+        return (self.compiled.zones[hub].occupancy + self.pending[hub]) \
+            / self.drain[hub]
+
+    def choose_edge(self, edges: List[int]) -> Tuple[int, bool]:
+        """
+        Picks the next hop of a drone waiting at a hub.
+
+        Args:
+            edges (List[int]): Next-hop edge indices of the hub, by
+                               priority (which breaks ties).
+
+        Returns:
+            Tuple[int, bool]: The best edge index (-1 if there is none)
+            and whether it can be taken now (else the drone waits for
+            it).
+        """
+        links = self.compiled.links
+        best = -1
+        best_free = False
+        best_eta = INF
+        for edge in edges:
+            link = links[edge]
+            eta = self.remaining[edge] + \
+                self.congestion * self.delay(link.target.idx)
+            free = link.free_spaces() > 0 and link.target.free_spaces() > 0
+            if not free:
+                eta += 1
+            if eta < best_eta:
+                best_eta = eta
+                best = edge
+                best_free = free
+        return best, best_free
+
+    def next_move(self, valid_map: Dict[str, List]) -> str:
+        """
+        Runs one tick.
+        1. Advances the drones in transit.
+        2. Lets the drones waiting at every hub, closest to the end
+           first, take their best next hop or wait for it.
+        3. Lands the drones reaching their target hub, which join its
+           queue, and builds the telemetry string in drone order.
+        """
+        for drone_idx in self.in_transit:
+            drone = self.drones[drone_idx]
+            drone.increase_move()
+            drone.total_moves += 1
+
+        next_edges = self.get_next_edges(valid_map)
+        links = self.compiled.links
+        pending = self.pending
+        for hub in self.order:
+            queue = self.queues[hub]
+            for _ in range(len(queue)):
+                drone_idx, wanted = queue.popleft()
+                if wanted >= 0:
+                    pending[wanted] -= 1
+                edge, free = self.choose_edge(next_edges[hub])
+                if free:
+                    self._depart(links[edge], drone_idx)
+                    continue
+                wanted = self.compiled.targets[edge] if edge >= 0 else -1
+                if wanted >= 0:
+                    pending[wanted] += 1
+                queue.append((drone_idx, wanted))
+
+        for drone in self._labelled:
+            drone.txt = ""
+        self._labelled = []
+        drone_move = ""
+        for drone_idx in sorted(self.in_transit):
+            drone = self.drones[drone_idx]
+            temp_link = drone.get_link()
+            if temp_link is None:
+                continue
+            if temp_link.target.cost == drone.moves:
+                drone.reset_move()
+                temp_link.free()
+                drone.set_link(None)
+                drone.update_pos(temp_link.target)
+                drone.set_target_pos(drone.pos.coordinates)
+                self.in_transit.discard(drone_idx)
+                if drone.pos.idx != self.compiled.end:
+                    self.queues[drone.pos.idx].append((drone_idx, -1))
+                drone_move += f"{drone.name}-{drone.pos.name} "
+                drone.txt = f"{drone.name}-{drone.pos.name}"
+            else:
+                drone.interpolate_target(temp_link)
+                drone_move += f"{drone.name}-{drone.pos.name}"\
+                              f"-{temp_link.target.name} "
+                drone.txt = f"{drone.name}-{drone.pos.name}"\
+                            f"-{temp_link.target.name}"
+            self._labelled.append(drone)
+        return drone_move
+
+    def _depart(self, link: Link, drone_idx: int) -> None:
+        """Puts a waiting drone on a link, reserving the link and its
+        target hub."""
+        drone = self.drones[drone_idx]
+        link.populate()
+        drone.set_last_pos(drone.pos.coordinates)
+        drone.pos.free()
+        drone.increase_move()
+        drone.set_link(link)
+        drone.total_moves += 1
+        link.target.populate()
+        self.in_transit.add(drone_idx)
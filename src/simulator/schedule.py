@@ -0,0 +1,379 @@
+from typing import BinaryIO, Dict, List, Set, TextIO, Tuple
+from array import array
+import io
+import struct
+import sys
+from src.parser.map_constructor import Zone, Link
+from src.parser.compiled_graph import CompiledGraph, RESTRICTED
+from src.simulator.simulation_engine import Simulator, Drone
+from src.simulator.path_finder import Path
+
+
+MAGIC = b"FLYS"
+VERSION = 1
+# magic, version, hubs, drones, ticks, moves
+HEADER = struct.Struct("<4sHIIII")
+
+
+class Schedule:
+    """
+    Compact per-tick move table of a finished simulation.
+
+    Every move printed by a simulator ('D1-hub' or 'D1-src-dst') becomes
+    one row of four packed integer columns: drone number, source hub id,
+    target hub id and an arrival flag (0 while the drone is still flying
+    over a restricted link). The rows are stored in tick order, and the
+    rows of tick 't' (1-based) are 'tick_offsets[t - 1]' to
+    'tick_offsets[t]', so the moves of any tick are found in O(1).
+
+    Attributes:
+        names (List[str]): Hub name of every hub id.
+        drones (int): Number of drones of the simulation.
+        drone (array): Drone number (1-based) of every move.
+        source (array): Hub id the drone left.
+        target (array): Hub id the drone is heading to.
+        arrived (array): 1 if the drone reached 'target' on that tick.
+        tick_offsets (array): Row offsets, one more entry than ticks.
+    """
+    def __init__(self, names: List[str], drones: int) -> None:
+        self.names = names
+        self.drones = drones
+        self.drone = array("i")
+        self.source = array("i")
+        self.target = array("i")
+        self.arrived = array("b")
+        self.tick_offsets = array("i", [0])
+
+    @property
+    def ticks(self) -> int:
+        """Number of turns stored in the schedule."""
+        return len(self.tick_offsets) - 1
+
+    def __len__(self) -> int:
+        """Returns the number of moves."""
+        return len(self.drone)
+
+    def moves(self, tick: int) -> range:
+        """Returns the row indices of the moves of a tick (1-based)."""
+        return range(self.tick_offsets[tick - 1], self.tick_offsets[tick])
+
+    def add_tick(self, line: str, ids: Dict[str, int]) -> None:
+        """
+        Appends the moves of one simulator output line.
+
+        Hub names can not contain '-', so every token splits into the
+        drone name and one (arrival) or two (in flight) hub names. The
+        source of an arrival is left at -1 until 'resolve' is called.
+        """
+        for token in line.split():
+            parts = token.split("-")
+            drone = int(parts[0][1:])
+            if len(parts) == 3:
+                source, target = ids[parts[1]], ids[parts[2]]
+                self.arrived.append(0)
+            else:
+                target = ids[parts[1]]
+                source = -1
+                self.arrived.append(1)
+            self.drone.append(drone)
+            self.source.append(source)
+            self.target.append(target)
+        self.tick_offsets.append(len(self.drone))
+
+    @classmethod
+    def record(cls, sim: Simulator, valid_map: Dict[str, List],
+               drones: int) -> "Schedule":
+        """
+        Runs a simulator to completion and stores its moves.
+
+        Arrival rows do not carry their source hub in the output, so it
+        is resolved afterwards from the drone position (see 'resolve').
+
+        Args:
+            sim (Simulator): A freshly built simulator.
+            valid_map (Dict[str, List]): Prioritized next-hop map.
+            drones (int): Number of drones of the simulation.
+
+        Returns:
+            Schedule: The recorded move table.
+        """
+        graph = sim.compiled
+        schedule = cls(list(graph.names), drones)
+        output = io.StringIO()
+        sim.start_simulation(valid_map, output)
+        for line in output.getvalue().splitlines():
+            schedule.add_tick(line, graph.ids)
+        schedule.resolve(graph.start)
+        return schedule
+
+    def resolve(self, start: int) -> None:
+        """Fills the source hub of arrivals that were not announced by a
+        flying move, replaying drone positions from the start hub."""
+        position = [start] * (self.drones + 1)
+        for row in range(len(self.drone)):
+            drone = self.drone[row]
+            if self.source[row] < 0:
+                self.source[row] = position[drone]
+            if self.arrived[row]:
+                position[drone] = self.target[row]
+
+    def check(self, graph: CompiledGraph) -> List[str]:
+        """
+        Replays the schedule against the rules of the map.
+
+        On every tick a drone moves at most once, over a link leaving
+        the hub it is in, into a hub that is not blocked; it enters a
+        restricted hub in exactly two ticks (flying, then landing) and
+        any other hub in one. A link carries at most 'max_link_capacity'
+        drones per tick, a drone flying to a restricted hub counting on
+        both of its ticks, and once a tick is over every hub but the
+        start and end ones holds at most 'max_drones' drones. After the
+        last tick every drone is in the end hub.
+
+        Args:
+            graph (CompiledGraph): The map the schedule was recorded on.
+
+        Returns:
+            List[str]: The violations found, empty if the schedule is
+            valid.
+        """
+        errors: List[str] = []
+        position = [graph.start] * (self.drones + 1)
+        occupancy = array("i", [0] * len(graph))
+        occupancy[graph.start] = self.drones
+        # drone number -> (target hub id, tick the flight started)
+        flying: Dict[int, Tuple[int, int]] = {}
+        for tick in range(1, self.ticks + 1):
+            moved: Set[int] = set()
+            entered: Set[int] = set()
+            # (source hub id, edge index) -> drones on the link
+            load: Dict[Tuple[int, int], int] = {}
+            for row in self.moves(tick):
+                drone, target = self.drone[row], self.target[row]
+                move = f"turn {tick}: D{drone}-{self.names[target]}"
+                if drone in moved:
+                    errors.append(f"{move}: the drone already moved")
+                    continue
+                moved.add(drone)
+                edge = graph.edge_index(position[drone], target)
+                if edge < 0:
+                    errors.append(f"{move}: no link from "
+                                  f"{self.names[position[drone]]}")
+                    continue
+                key = (position[drone], edge)
+                load[key] = load.get(key, 0) + 1
+                if drone in flying:
+                    if flying.pop(drone)[0] != target or \
+                            not self.arrived[row]:
+                        errors.append(f"{move}: the drone does not land "
+                                      "where its flight is heading")
+                else:
+                    if graph.is_blocked(target):
+                        errors.append(f"{move}: the hub is blocked")
+                    if (graph.zone_type[target] == RESTRICTED) != \
+                            (not self.arrived[row]):
+                        errors.append(f"{move}: the hub takes "
+                                      f"{graph.zone_cost[target]} turns")
+                    occupancy[position[drone]] -= 1
+                    if not self.arrived[row]:
+                        flying[drone] = (target, tick)
+                if self.arrived[row]:
+                    position[drone] = target
+                    occupancy[target] += 1
+                    entered.add(target)
+            for drone, (target, started) in list(flying.items()):
+                if started < tick and drone not in moved:
+                    errors.append(f"turn {tick}: D{drone} stops on the "
+                                  f"way to {self.names[target]}")
+                    del flying[drone]
+            for (source, edge), count in load.items():
+                if count > graph.link_capacity[edge]:
+                    errors.append(
+                        f"turn {tick}: {count} drones on "
+                        f"{self.names[source]}-"
+                        f"{self.names[graph.targets[edge]]} "
+                        f"(max_link_capacity {graph.link_capacity[edge]})")
+            for hub in entered:
+                if hub not in (graph.start, graph.end) and \
+                        occupancy[hub] > graph.hub_capacity[hub]:
+                    errors.append(f"turn {tick}: {occupancy[hub]} drones "
+                                  f"in {self.names[hub]} (max_drones "
+                                  f"{graph.hub_capacity[hub]})")
+        missing = self.drones - occupancy[graph.end]
+        if missing > 0:
+            errors.append(f"{missing} drones never reach the end hub")
+        return errors
+
+    def save(self, file_path: str) -> None:
+        """Writes the schedule to a binary file."""
+        with open(file_path, "wb") as file:
+            self.write(file)
+
+    def write(self, file: BinaryIO) -> None:
+        """Writes the header, the hub names and the packed columns."""
+        names = "\n".join(self.names).encode("utf-8")
+        file.write(HEADER.pack(MAGIC, VERSION, len(self.names),
+                               self.drones, self.ticks, len(self)))
+        file.write(struct.pack("<I", len(names)))
+        file.write(names)
+        for column in (self.drone, self.source, self.target,
+                       self.tick_offsets, self.arrived):
+            data = array(column.typecode, column)
+            if sys.byteorder != "little":
+                data.byteswap()
+            file.write(data.tobytes())
+
+    @classmethod
+    def load(cls, file_path: str) -> "Schedule":
+        """
+        Reads a schedule written by 'save'.
+
+        Raises:
+            ValueError: If the file is not a schedule or is truncated.
+        """
+        with open(file_path, "rb") as file:
+            return cls.read(file)
+
+    @classmethod
+    def read(cls, file: BinaryIO) -> "Schedule":
+        """Reads a schedule from an open binary file."""
+        header = file.read(HEADER.size)
+        if len(header) != HEADER.size:
+            raise ValueError("Schedule file is truncated")
+        magic, version, hubs, drones, ticks, moves = HEADER.unpack(header)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError("Not a flyin schedule file (or unsupported "
+                             "version)")
+        size = struct.unpack("<I", file.read(4))[0]
+        names = file.read(size).decode("utf-8").split("\n")
+        if len(names) != hubs:
+            raise ValueError("Schedule file is truncated")
+        schedule = cls(names, drones)
+        schedule.tick_offsets = array("i")
+        for column, count in ((schedule.drone, moves),
+                              (schedule.source, moves),
+                              (schedule.target, moves),
+                              (schedule.tick_offsets, ticks + 1),
+                              (schedule.arrived, moves)):
+            data = file.read(count * column.itemsize)
+            if len(data) != count * column.itemsize:
+                raise ValueError("Schedule file is truncated")
+            column.frombytes(data)
+            if sys.byteorder != "little":
+                column.byteswap()
+        return schedule
+
+
+class ScheduledSimulator(Simulator):
+    """
+    Simulator replaying a recorded Schedule.
+
+    No routing decision is taken anymore: next_move looks up the rows of
+    the next tick and applies them to the drones and the occupancy
+    counters, so a tick costs O(moves of the tick). This is what the
+    visualizer animates, and it also replays schedules loaded from disk.
+    The occupancy counters of the graph are reset at construction since
+    recording a schedule leaves every drone in the end hub.
+
+    Attributes:
+        schedule (Schedule): The move table being replayed.
+        tick (int): Number of ticks played back.
+    """
+    def __init__(self, graph: Dict[str, Zone], valid_paths: List[Path],
+                 drones: int, schedule: Schedule) -> None:
+        for zone in graph.values():
+            zone.occupancy = 0
+            for link in zone.links:
+                link.occupancy = 0
+        super().__init__(graph, valid_paths, drones)
+        if schedule.names != self.compiled.names or \
+                schedule.drones != len(self.drones):
+            raise ValueError("Schedule does not match the map")
+        self.schedule = schedule
+        self.tick = 0
+        self._labelled: List[Drone] = []
+
+    def start_simulation(self, valid_map: Dict[str, List],
+                         output: TextIO | None = None) -> int:
+        """
+        Plays the remaining ticks of the schedule back.
+
+        Returns:
+            int: The number of turns simulated.
+        """
+        move_counter = 0
+        while self.tick < self.schedule.ticks:
+            drone_move = self.next_move(valid_map)
+            move_counter += 1
+            if output is not None:
+                output.write(f"{drone_move.rstrip()}\n")
+        if output is None:
+            print(f"Total Moves: {move_counter}")
+        return move_counter
+
+    def next_move(self, valid_map: Dict[str, List]) -> str:
+        """
+        Applies the recorded moves of the next tick.
+
+        Returns:
+            str: The drone movements of the tick (empty once the schedule
+                 is over).
+        """
+        for drone in self._labelled:
+            drone.txt = ""
+        self._labelled = []
+        if self.tick >= self.schedule.ticks:
+            return ""
+        self.tick += 1
+        schedule = self.schedule
+        zones = self.compiled.zones
+        drone_move = ""
+        for row in schedule.moves(self.tick):
+            drone = self.drones[schedule.drone[row] - 1]
+            link = drone.get_link()
+            if link is None:
+                link = self._enter(drone, schedule.source[row],
+                                   schedule.target[row])
+            else:
+                drone.increase_move()
+                drone.total_moves += 1
+            if schedule.arrived[row]:
+                link.free()
+                drone.reset_move()
+                drone.set_link(None)
+                drone.update_pos(zones[schedule.target[row]])
+                drone.set_target_pos(drone.pos.coordinates)
+                drone.txt = f"{drone.name}-{drone.pos.name}"
+            else:
+                drone.interpolate_target(link)
+                drone.txt = f"{drone.name}-{drone.pos.name}"\
+                            f"-{link.target.name}"
+            drone_move += f"{drone.txt} "
+            self._labelled.append(drone)
+        return drone_move
+
+    def _enter(self, drone: Drone, source: int, target: int) -> Link:
+        """Moves a drone from its hub onto the source->target link,
+        reserving the target hub like AdvanceSimulator does."""
+        graph: CompiledGraph = self.compiled
+        link = graph.links[graph.edge_index(source, target)]
+        link.populate()
+        drone.set_last_pos(drone.pos.coordinates)
+        drone.pos.free()
+        drone.increase_move()
+        drone.set_link(link)
+        drone.total_moves += 1
+        link.target.populate()
+        return link
+
+
+def compile_schedule(sim: Simulator, valid_map: Dict[str, List],
+                     drones: int) -> Tuple[Schedule, ScheduledSimulator]:
+    """
+    Records a simulator and returns the schedule with a simulator ready
+    to replay it from the first tick.
+    """
+    schedule = Schedule.record(sim, valid_map, drones)
+    player = ScheduledSimulator(sim.graph, sim.valid_paths, drones,
+                                schedule)
+    return schedule, player
@@ -1,8 +1,14 @@
-from typing import Dict, List
+from typing import Dict, List, Sequence, Set, TextIO, Tuple
+from bisect import bisect_left, bisect_right, insort
+import heapq
+import sys
+from array import array
 from abc import ABC, abstractmethod
 # from pydantic import BaseModel
 from src.parser.map_constructor import Zone, Link
+from src.parser.compiled_graph import CompiledGraph
 from src.simulator.helpers import get_pos_obj
+from src.simulator.path_finder import Path
 
 
 class Drone:
@@ -16,20 +22,29 @@ class Drone:
         name (str): Unique identifier (e.g., "D1").
         pos (Zone): The current Hub object where the drone is located or
         originated.
-        last_pos (List[float]): Coordinates of the hub the drone just vacated.
-        target_pos (List[float]): Projected coordinates for visual
+        last_pos (Tuple[float, float]): Coordinates of the hub the drone
+        just vacated.
+        current_pos (Tuple[float, float]): Coordinates currently drawn by
+        the visualizer.
+        target_pos (Tuple[float, float]): Projected coordinates for visual
         LERP interpolation.
         moves (int): Number of ticks spent on the current link.
         link (Link | None): The active connection the drone is
         currently traversing.
+
+    The class is slotted and the three positions live in one buffer of
+    six doubles allocated once and overwritten in place (through the
+    set_* methods), so a drone has a fixed, small footprint and a move
+    allocates nothing.
     """
+    __slots__ = ("name", "pos", "_positions", "moves",
+                 "total_moves", "txt", "link", "moving")
+
     def __init__(self, drone_id: int, start_pos: Zone) -> None:
         self.name = f"D{drone_id}"
         self.pos = start_pos
-        self.last_pos: List[float] = list(start_pos.coordinates)
-        self.current_pos: List[float] = list(start_pos.coordinates)
-        self.target_pos: List[float] = list(start_pos.coordinates)
-        self.waiting_time = 0
+        # last, current and target (x, y) pairs
+        self._positions = array("d", start_pos.coordinates * 3)
         self.moves = 0
         self.total_moves = 0
         self.txt: str = ""
@@ -52,6 +67,43 @@ class Drone:
     def get_link(self) -> Link | None:
         return self.link
 
+    @property
+    def last_pos(self) -> Tuple[float, float]:
+        return (self._positions[0], self._positions[1])
+
+    @property
+    def current_pos(self) -> Tuple[float, float]:
+        return (self._positions[2], self._positions[3])
+
+    @property
+    def target_pos(self) -> Tuple[float, float]:
+        return (self._positions[4], self._positions[5])
+
+    def set_last_pos(self, coordinates: Sequence[float]) -> None:
+        """Overwrites the last position in place."""
+        self._positions[0] = coordinates[0]
+        self._positions[1] = coordinates[1]
+
+    def set_current_pos(self, coordinates: Sequence[float]) -> None:
+        """Overwrites the drawn position in place."""
+        self._positions[2] = coordinates[0]
+        self._positions[3] = coordinates[1]
+
+    def set_target_pos(self, coordinates: Sequence[float]) -> None:
+        """Overwrites the LERP target in place."""
+        self._positions[4] = coordinates[0]
+        self._positions[5] = coordinates[1]
+
+    def interpolate_target(self, link: Link) -> None:
+        """Moves the LERP target to the fraction of 'link' travelled so
+        far ('moves' out of the target zone cost)."""
+        ratio = self.moves / link.target.cost
+        source = self.pos.coordinates
+        target = link.target.coordinates
+        positions = self._positions
+        positions[4] = positions[0] + (target[0] - source[0]) * ratio
+        positions[5] = positions[1] + (target[1] - source[1]) * ratio
+
     def remaining_moves(self) -> int:
         """Calculates the ticks required to reach the target hub based
         on zone cost."""
@@ -70,13 +122,17 @@ class Simulator(ABC):
         simulation.
         start (Zone): The designated source hub.
         end (Zone): The designated sink (goal) hub.
+        compiled (CompiledGraph): Integer-indexed view of the graph.
     """
     def __init__(self, graph: Dict[str, Zone],
-                 valid_paths: List[str], drones: int) -> None:
+                 valid_paths: List[Path], drones: int) -> None:
         self.graph = graph
         self.valid_paths = valid_paths
         self.start = get_pos_obj(graph, "start")
         self.end = get_pos_obj(graph, "end")
+        self.compiled = CompiledGraph(graph)
+        self._hop_source: Dict[str, List] | None = None
+        self._hops: List[List[Link]] = []
         self.drones = self.init_drones(drones)
 
     def init_drones(self, drones: int) -> List[Drone]:
@@ -98,15 +154,30 @@ class Simulator(ABC):
             zone_state += f"{zone.name}({zone.free_spaces()}:{zone.capacity}) "
         print(f"\n{zone_state}")
 
-    def get_link_obj(self, link_name: str, links: List[Link]) -> Link | None:
-        for link in links:
-            if link.target.name == link_name:
-                return link
-        return None
+    def get_link_obj(self, link_name: str, zone: Zone) -> Link | None:
+        """Returns the link from a zone to a hub name, through the
+        zone's link index."""
+        return zone.get_link(link_name)
+
+    def get_next_links(self, valid_map: Dict[str, List]) -> List[List[Link]]:
+        """
+        Returns the prioritized next-hop Links of every hub, indexed by
+        'Zone.idx'.
+
+        The table is resolved once per valid_map object, so the per-tick
+        loops no longer search 'Zone.links' by name. A valid_map that is
+        modified in place after the first tick is not picked up.
+        """
+        if valid_map is not self._hop_source:
+            self._hops = self.compiled.next_hop_links(valid_map)
+            self._hop_source = valid_map
+        return self._hops
 
     @abstractmethod
-    def start_simulation(self, valid_map: Dict[str, List]) -> None:
-        """Core loop that runs until all drones reach the end zone."""
+    def start_simulation(self, valid_map: Dict[str, List],
+                         output: TextIO | None = None) -> int:
+        """Core loop that runs until all drones reach the end zone.
+        Returns the number of turns."""
         pass
 
     @abstractmethod
@@ -121,8 +192,63 @@ class SimpleSimulator(Simulator):
     This simulator follows a deterministic, first-available-path logic.
     It processes drones sequentially and only allows movement if both
     the link and the target hub have immediate free capacity.
+
+    Drones are kept in three groups, so a tick only visits the ones that
+    can act: drones in transit, waiting drones bucketed per hub (sorted
+    by drone number), and drones parked in hubs without next hop (the
+    end hub in practice), which are never visited again. Waiting drones
+    are visited in drone order by merging the buckets of the hubs that
+    still have outbound link capacity; a hub whose drone cannot move is
+    skipped until one of its next-hop hubs is vacated.
+
+    Attributes:
+        waiting (List[List[int]]): Sorted drone indices waiting at each
+        hub, indexed by 'Zone.idx'.
+        occupied_hubs (Set[int]): Hub ids holding waiting drones.
+        in_transit (Set[int]): Indices of drones currently on a link.
+        arrived (Set[int]): Indices of drones parked in a hub without
+        next hop.
     """
-    def start_simulation(self, valid_map: Dict[str, List]) -> None:
+    def __init__(self, graph: Dict[str, Zone],
+                 valid_paths: List[Path], drones: int) -> None:
+        super().__init__(graph, valid_paths, drones)
+        self.waiting: List[List[int]] = [[] for _ in self.compiled.names]
+        self.occupied_hubs: Set[int] = set()
+        self.in_transit: Set[int] = set()
+        self.arrived: Set[int] = set()
+        self._labelled: List[Drone] = []
+        self._target_source: List[List[Link]] | None = None
+        self._targets: List[List[int]] = []
+        self._feeders: List[List[int]] = []
+        if self.start is not None and len(self.drones) > 0:
+            self.waiting[self.start.idx] = list(range(len(self.drones)))
+            self.occupied_hubs.add(self.start.idx)
+
+    def get_next_targets(self,
+                         next_links: List[List[Link]]) -> List[List[int]]:
+        """
+        Returns the distinct next-hop hub ids of every hub id (itself
+        excluded), resolved once per next-hop table along with
+        get_feeders.
+        """
+        if next_links is not self._target_source:
+            self._targets = []
+            self._feeders = [[] for _ in self.compiled.names]
+            for hub, links in enumerate(next_links):
+                targets = sorted({link.target.idx for link in links} - {hub})
+                self._targets.append(targets)
+                for target in targets:
+                    self._feeders[target].append(hub)
+            self._target_source = next_links
+        return self._targets
+
+    def get_feeders(self, next_links: List[List[Link]]) -> List[List[int]]:
+        """Returns the hub ids listing every hub id as a next hop."""
+        self.get_next_targets(next_links)
+        return self._feeders
+
+    def start_simulation(self, valid_map: Dict[str, List],
+                         output: TextIO | None = None) -> int:
         """
         Executes the main simulation loop.
 
@@ -133,213 +259,315 @@ class SimpleSimulator(Simulator):
         Args:
             valid_map: Adjacency list mapping hub names to their
                        prioritized next-step options.
+            output: Optional text stream receiving one line of drone
+                    moves per turn. The 'Total Moves' report is only
+                    printed when no stream is given.
+        Returns:
+            int: The number of turns simulated.
         """
         move_counter = 0
         if self.end is not None:
             while (self.end.occupancy < len(self.drones)):
                 drone_move = self.next_move(valid_map)
+                if len(drone_move) == 0:
+                    print("Error: Simulation is stuck, no drone can move.",
+                          file=sys.stderr)
+                    break
                 move_counter += 1
-                drone_move += f"Move No: {move_counter}"
-            print(f"Total Moves: {move_counter}")
+                if output is not None:
+                    output.write(f"{drone_move.rstrip()}\n")
+            if output is None:
+                print(f"Total Moves: {move_counter}")
+        return move_counter
 
     def next_move(self, valid_map: Dict[str, List]) -> str:
         """
         Calculates the state transition for a single simulation tick.
 
         Phase 1: Entry Logic
-        Iterates through all drones. If a drone is at a hub, it attempts
-        to enter the first available link from the valid_map.
+        Advances the drones in transit, then lets the waiting drones, in
+        drone order, enter the first available link from the valid_map.
 
         Phase 2: Transit Logic
-        Iterates through all drones. If a drone is currently in a link,
-        it advances its 'moves' counter. If the movement cost is met,
-        the drone is 'committed' to the target hub.
+        Iterates through the drones in transit. If the movement cost is
+        met, the drone is 'committed' to the target hub.
 
         Returns:
             str: A formatted string containing the movement telemetry
                  for the current tick (used for logging or GUI display).
         """
-        drone_move = ""
-        for drone in self.drones:
-            # print(valid_map[drone.pos.name])
-            for hub_name in valid_map[drone.pos.name]:
-                link = self.get_link_obj(hub_name, drone.pos.links)
-                # print(drone.name, link.occupancy, link.target.name)
-                if link is not None:
-                    if drone.get_link() is not None:
-                        # print(f"{drone.name} is in transit")
+        next_links = self.get_next_links(valid_map)
+        self._advance_moves()
+        feeders = self.get_feeders(next_links)
+        queue: List[Tuple[int, int]] = []
+        for hub in self.occupied_hubs:
+            if self._has_outbound_space(next_links[hub]):
+                queue.append((self.waiting[hub][0], hub))
+        heapq.heapify(queue)
+        stalled: Set[int] = set()
+        while queue:
+            drone_idx, hub = heapq.heappop(queue)
+            drone = self.drones[drone_idx]
+            for link in next_links[hub]:
+                if link.free_spaces() > 0:
+                    if link.free_spaces() <= link.target.free_spaces():
+                        link.populate()
+                        drone.set_last_pos(drone.pos.coordinates)
+                        drone.pos.free()
                         drone.increase_move()
+                        drone.set_link(link)
                         drone.total_moves += 1
                         break
-                    elif link.free_spaces() > 0:
-                        if link.free_spaces() <= link.target.free_spaces():
-                            link.populate()
-                            drone.last_pos = list(drone.pos.coordinates)
-                            drone.pos.free()
-                            drone.increase_move()
-                            drone.set_link(link)
-                            drone.total_moves += 1
-                            break
-
-        for drone in self.drones:
+            else:
+                # the next drones of this hub fail too until a next-hop
+                # hub is vacated
+                stalled.add(hub)
+                continue
+            self._leave_hub(hub, drone_idx)
+            for feeder in feeders[hub]:
+                if feeder in stalled:
+                    stalled.discard(feeder)
+                    self._resume(queue, next_links, feeder, drone_idx)
+            self._resume(queue, next_links, hub, drone_idx)
+        return self._advance_transit(next_links)
+
+    def _advance_moves(self) -> None:
+        """Advances the move counter of the drones in transit."""
+        for drone_idx in self.in_transit:
+            drone = self.drones[drone_idx]
+            drone.increase_move()
+            drone.total_moves += 1
+
+    def _has_outbound_space(self, links: List[Link]) -> bool:
+        """Checks whether at least one next-hop link can take a drone."""
+        for link in links:
+            if link.free_spaces() > 0:
+                return True
+        return False
+
+    def _resume(self, queue: List[Tuple[int, int]],
+                next_links: List[List[Link]],
+                hub: int, after: int) -> None:
+        """Schedules the first drone of a hub numbered after 'after'."""
+        drones = self.waiting[hub]
+        nxt = bisect_right(drones, after)
+        if nxt < len(drones) and self._has_outbound_space(next_links[hub]):
+            heapq.heappush(queue, (drones[nxt], hub))
+
+    def _leave_hub(self, hub: int, drone_idx: int) -> None:
+        """Moves a drone that entered a link from its hub bucket to the
+        drones in transit."""
+        drones = self.waiting[hub]
+        del drones[bisect_left(drones, drone_idx)]
+        if len(drones) == 0:
+            self.occupied_hubs.discard(hub)
+        self.in_transit.add(drone_idx)
+
+    def _lands(self, drone_idx: int, link: Link) -> bool:
+        """Checks whether a drone in transit reaches its target hub."""
+        return link.target.cost == self.drones[drone_idx].moves
+
+    def _land(self, link: Link) -> None:
+        """Counts a drone landing in the target hub of a link."""
+        link.target.populate()
+
+    def _advance_transit(self, next_links: List[List[Link]]) -> str:
+        """
+        Commits the drones reaching their target hub, which join its
+        bucket (or the arrived drones if it has no next hop), and builds
+        the telemetry string in drone order.
+        """
+        for drone in self._labelled:
             drone.txt = ""
-            for link in drone.pos.links:
-                temp_link = drone.get_link()
-                if link.occupancy > 0 and temp_link is not None:
-                    if link.target.name == temp_link.target.name:
-                        # print(f"{drone.name}, {link.target.name},
-                        #       Cost: {link.target.cost}, Move: {drone.moves}")
-                        if (link.target.cost - drone.moves) == 0:
-                            drone.reset_move()
-                            # print(f"{drone.name} is in restricted zone")
-                            link.free()
-                            link.target.populate()
-                            drone.set_link(None)
-                            drone.update_pos(link.target)
-                            drone.target_pos = list(drone.pos.coordinates)
-                            drone_move += f"{drone.name}-{drone.pos.name} "
-                            drone.txt = f"{drone.name}-{drone.pos.name}"
-                        # break
-                        else:
-                            # print(f"{drone.name} is in restricted zone,"
-                            #       f"{drone.link.target.name}")
-                            drone.target_pos = [drone.last_pos[i] +
-                                                (link.target.coordinates[i] -
-                                                drone.pos.coordinates[i]) *
-                                                (drone.moves /
-                                                link.target.cost)
-                                                for i in range(2)]
-                            drone_move += f"{drone.name}-{drone.pos.name}"\
-                                          f"-{link.target.name} "
-                            drone.txt = f"{drone.name}-{drone.pos.name}"\
-                                        f"-{link.target.name}"
+        self._labelled = []
+        drone_move = ""
+        for drone_idx in sorted(self.in_transit):
+            drone = self.drones[drone_idx]
+            temp_link = drone.get_link()
+            if temp_link is None:
+                continue
+            if self._lands(drone_idx, temp_link):
+                drone.reset_move()
+                temp_link.free()
+                self._land(temp_link)
+                drone.set_link(None)
+                drone.update_pos(temp_link.target)
+                drone.set_target_pos(drone.pos.coordinates)
+                drone_move += f"{drone.name}-{drone.pos.name} "
+                drone.txt = f"{drone.name}-{drone.pos.name}"
+                self.in_transit.discard(drone_idx)
+                if len(next_links[drone.pos.idx]) > 0:
+                    insort(self.waiting[drone.pos.idx], drone_idx)
+                    self.occupied_hubs.add(drone.pos.idx)
+                else:
+                    self.arrived.add(drone_idx)
+            else:
+                drone.interpolate_target(temp_link)
+                drone_move += f"{drone.name}-{drone.pos.name}"\
+                              f"-{temp_link.target.name} "
+                drone.txt = f"{drone.name}-{drone.pos.name}"\
+                            f"-{temp_link.target.name}"
+            self._labelled.append(drone)
         return drone_move
 
 
-class AdvanceSimulator(Simulator):
+def plan_departures(zones: Sequence[Zone], next_links: List[List[Link]],
+                    next_targets: List[List[int]],
+                    waiting: Dict[int, int]) -> Dict[int, List[int]]:
+    """
+    Look-ahead: decides how many drones leave every hub this tick,
+    and over which of its next-hop links.
+
+    Every hub is visited once, after the hubs it sends drones to, so
+    the places a hub frees (its vacancy) are known before the hubs
+    feeding it are visited: a chain of full hubs moves in lockstep
+    within one tick. Among the hubs ready to be visited, the one
+    holding the lowest numbered drone goes first, and on a cycle the
+    first hub left is visited without the vacancy of the others.
+    A hub can take its free spaces plus its vacancy minus the drones
+    already sent to it, a link its free spaces; the drones waiting
+    at a hub fill its next-hop links in priority order. A vacancy is
+    only counted once its drones are sure to leave, so every planned
+    move can be made.
+
+    Args:
+        zones: Zone of every hub id.
+        next_links: Prioritized next-hop Links of every hub id.
+        next_targets: Distinct next-hop hub ids of every hub id, itself
+                      excluded.
+        waiting: Number of drones waiting at every hub id holding
+                 some, in the order of their lowest drone number.
+    Returns:
+        Dict[int, List[int]]: For every hub sending drones, the
+        number sent over each of its next-hop links.
+    """
+    hubs = list(waiting)
+    rank = {hub: position for position, hub in enumerate(hubs)}
+    # waiting targets still to visit, and waiting feeders, per hub id
+    blockers: Dict[int, int] = {}
+    feeders: Dict[int, List[int]] = {}
+    for hub in hubs:
+        count = 0
+        for target in next_targets[hub]:
+            if target in rank:
+                count += 1
+                feeders.setdefault(target, []).append(hub)
+        blockers[hub] = count
+    ready = [rank[hub] for hub in hubs if blockers[hub] == 0]
+    heapq.heapify(ready)
+    # free spaces plus vacancy, minus the drones sent in, per hub id
+    room: Dict[int, int] = {}
+    plan: Dict[int, List[int]] = {}
+    visited = 0
+    cycle = 0
+    while visited < len(hubs):
+        if ready:
+            hub = hubs[heapq.heappop(ready)]
+        else:
+            while blockers[hubs[cycle]] < 0:
+                cycle += 1
+            hub = hubs[cycle]
+        if blockers[hub] < 0:
+            continue
+        blockers[hub] = -1
+        visited += 1
+        left = waiting[hub]
+        sent = [0] * len(next_links[hub])
+        for slot, link in enumerate(next_links[hub]):
+            target = link.target.idx
+            free = room.get(target, link.target.free_spaces())
+            count = min(left, link.free_spaces(), free)
+            if count > 0:
+                sent[slot] = count
+                room[target] = free - count
+                left -= count
+                if left == 0:
+                    break
+        if left < waiting[hub]:
+            plan[hub] = sent
+            room[hub] = room.get(hub, zones[hub].free_spaces()) + \
+                waiting[hub] - left
+        for feeder in feeders.get(hub, []):
+            blockers[feeder] -= 1
+            if blockers[feeder] == 0:
+                heapq.heappush(ready, rank[feeder])
+    return plan
+
+
+class AdvanceSimulator(SimpleSimulator):
     """
     An optimized simulation engine utilizing back pressure and look-ahead
     logic.
 
     This simulator improves throughput by allowing drones to move into zones
     simultaneously as they are being vacated by other agents.
-    """
-    def start_simulation(self, valid_map: Dict[str, List]) -> None:
-        """
-        Executes the main simulation loop.
-
-        Continues iterating until the number of drones that have reached
-        the 'end' hub equals the total swarm size. Increments a global
-        move counter for each simulation tick.
-
-        Args:
-            valid_map: Adjacency list mapping hub names to their
-                       prioritized next-step options.
-        """
-        move_counter = 0
-        if self.end is not None:
-            while (self.end.occupancy < len(self.drones)):
-                drone_move = self.next_move(valid_map)
-                move_counter += 1
-                drone_move += f"Move No: {move_counter}"
-            print(f"Total Moves: {move_counter}")
 
+    It keeps the drone groups of SimpleSimulator: the look-ahead only
+    reads the bucket sizes, and only the drones it sends on are visited.
+    """
     def _set_drone_params(self, link: Link, drone: Drone) -> None:
         """
         Internal helper to atomically update drone telemetry and reserve
         capacity in both the link and the target hub.
         """
         link.populate()
-        drone.last_pos = list(drone.pos.coordinates)
+        drone.set_last_pos(drone.pos.coordinates)
         drone.pos.free()
         drone.increase_move()
         drone.set_link(link)
         drone.total_moves += 1
-        drone.waiting_time = 0
         link.target.populate()
 
+    def plan_departures(self, next_links: List[List[Link]],
+                        waiting: Dict[int, int]) -> Dict[int, List[int]]:
+        """Look-ahead of the tick, see the plan_departures function."""
+        return plan_departures(self.compiled.zones, next_links,
+                               self.get_next_targets(next_links), waiting)
+
     def next_move(self, valid_map: Dict[str, List]) -> str:
         """
         Orchestrates the 'Look-Ahead' turn logic.
-        1. Identifies zones to be freed this tick via 'zone_to_be_freed'.
+        1. Counts the drones waiting at every hub and plans the
+           departures of the tick (see plan_departures).
         2. Executes movements for drones in transit.
-        3. Assigns new links to stationary drones based on immediate
-           availability or predicted vacancies.
+        3. Sends the waiting drones, in drone order, over the links
+           planned for their hub.
         """
-        drone_move = ""
-        # looking ahead and deciding which nodes going to be free
-        zone_to_be_freed = set()
-        for drone in self.drones:
-            for hub_name in valid_map[drone.pos.name]:
-                link = self.get_link_obj(hub_name, drone.pos.links)
-                # print(drone.name, link.occupancy, link.target.name)
-                if link is not None:
-                    if drone.get_link() is not None:
-                        break
-                    elif link.free_spaces() > 0 or \
-                            hub_name in zone_to_be_freed:
-                        if link.free_spaces() <= link.target.free_spaces():
-                            zone_to_be_freed.add(drone.pos.name)
-                            break
-        # print(zone_to_be_freed)
-
-        for drone in self.drones:
-            drone.waiting_time += 1
-            for hub_name in valid_map[drone.pos.name]:
-                link = self.get_link_obj(hub_name, drone.pos.links)
-                # print(drone.name, link.free_spaces(), link.target.name)
-                if link is not None:
-                    if drone.get_link() is not None:
-                        # print(f"{drone.name} is in transit")
-                        drone.increase_move()
-                        drone.total_moves += 1
-                        drone.waiting_time = 0
-                        break
-                    elif link.free_spaces() > 0:
-                        if min(link.free_spaces(),
-                               link.target.free_spaces()) > 0:
-                            if link.target.name in zone_to_be_freed:
-                                zone_to_be_freed.remove(link.target.name)
-                            self._set_drone_params(link, drone)
-                            break
-                        elif link.target.name in zone_to_be_freed:
-                            if link.target.name in zone_to_be_freed:
-                                zone_to_be_freed.remove(link.target.name)
-                            self._set_drone_params(link, drone)
-                            break
-
-        for drone in self.drones:
-            drone.txt = ""
-            for link in drone.pos.links:
-                temp_link = drone.get_link()
-                if link.occupancy > 0 and temp_link is not None:
-                    if link.target.name == temp_link.target.name:
-                        # print(f"{drone.name}, {link.target.name}, Cost:"
-                        #       f" {link.target.cost}, Move: {drone.moves}")
-                        if (link.target.cost - drone.moves) == 0:
-                            drone.reset_move()
-                            # print(f"{drone.name} is in restricted zone")
-                            link.free()
-                            # link.target.populate()
-                            drone.set_link(None)
-                            drone.update_pos(link.target)
-                            drone.target_pos = list(drone.pos.coordinates)
-                            drone_move += f"{drone.name}-{drone.pos.name} "
-                            drone.txt = f"{drone.name}-{drone.pos.name}"
-                        # break
-                        else:
-                            # print(f"{drone.name} is in restricted zone,"
-                            #       f"{drone.link.target.name}")
-                            drone.target_pos = [drone.last_pos[i] +
-                                                (link.target.coordinates[i] -
-                                                drone.pos.coordinates[i]) *
-                                                (drone.moves /
-                                                link.target.cost)
-                                                for i in range(2)]
-                            drone_move += f"{drone.name}-{drone.pos.name}"\
-                                          f"-{link.target.name} "
-                            drone.txt = f"{drone.name}-{drone.pos.name}"\
-                                        f"-{link.target.name}"
-                # else:
-                #     print(f"Error: {drone.name} is waiting")
-        return drone_move
+        next_links = self.get_next_links(valid_map)
+        hubs = sorted(self.occupied_hubs, key=lambda hub: self.waiting[hub][0])
+        plan = self.plan_departures(
+            next_links, {hub: len(self.waiting[hub]) for hub in hubs
+                         if len(next_links[hub]) > 0})
+        self._advance_moves()
+        self._admit(next_links, plan)
+        return self._advance_transit(next_links)
+
+    def _admit(self, next_links: List[List[Link]],
+               plan: Dict[int, List[int]]) -> None:
+        """
+        Sends the planned drones of every hub over their links.
+
+        The planned links of a hub go to its waiting drones in drone
+        order, so the lowest numbered drones of the hub leave, the first
+        ones over the first planned link; only those are visited.
+        """
+        for hub, sent in plan.items():
+            drones = self.waiting[hub]
+            leaving = drones[:sum(sent)]
+            del drones[:len(leaving)]
+            if len(drones) == 0:
+                self.occupied_hubs.discard(hub)
+            slot = 0
+            for drone_idx in leaving:
+                while sent[slot] == 0:
+                    slot += 1
+                sent[slot] -= 1
+                self._depart(next_links[hub][slot], drone_idx)
+
+    def _depart(self, link: Link, drone_idx: int) -> None:
+        """Puts a waiting drone on a link, among the drones in transit."""
+        self._set_drone_params(link, self.drones[drone_idx])
+        self.in_transit.add(drone_idx)
+
+    def _land(self, link: Link) -> None:
+        """The target hub was already reserved at departure."""
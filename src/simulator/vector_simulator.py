@@ -0,0 +1,282 @@
+from typing import Dict, List, TextIO
+import sys
+import numpy as np
+import numpy.typing as npt
+from src.parser.map_constructor import Zone, Link
+from src.simulator.simulation_engine import (
+    Simulator, Drone, plan_departures)
+from src.simulator.path_finder import Path
+
+
+IntArray = npt.NDArray[np.int64]
+
+
+def group_rank(keys: IntArray) -> IntArray:
+    """
+    Returns the position of every element inside its run of equal keys.
+
+    'keys' has to be sorted, e.g. [4, 4, 7, 9, 9, 9] -> [0, 1, 0, 0, 1, 2].
+    """
+    size = len(keys)
+    if size == 0:
+        return np.zeros(0, dtype=np.int64)
+    starts = np.flatnonzero(np.diff(keys)) + 1
+    starts = np.concatenate(([0], starts))
+    lengths = np.diff(np.concatenate((starts, [size])))
+    return np.arange(size) - np.repeat(starts, lengths)
+
+
+class VectorSimulator(Simulator):
+    """
+    Swarm simulator storing the drones as NumPy arrays.
+
+    Instead of one Drone object per agent, the state lives in flat arrays
+    (hub id, active edge, move counter and total moves per drone) and
+    every tick is computed with batched operations:
+
+    1. Drones in transit advance their move counter.
+    2. The waiting drones are counted per hub (grouped counts) and the
+       look-ahead of AdvanceSimulator (plan_departures) decides how many
+       leave every hub, over which link. Only this step loops in Python,
+       over the hubs holding drones. The lowest numbered drones of every
+       hub leave, ranked within their hub and matched to the planned
+       links by cumulative sums.
+    3. Drones whose move counter reached the target zone cost arrive.
+
+    The moves are therefore the ones of AdvanceSimulator, tick for tick.
+    Hub and link occupancies stay in the Zone and Link objects, which
+    the look-ahead reads; a tick only updates the ones drones entered or
+    left. Drone objects are only built when get_drones() is called (for
+    the visualizer) and are then synced after every tick.
+
+    Attributes:
+        pos (ndarray): Hub id of every drone (source hub while in transit).
+        link (ndarray): Edge index travelled by every drone, -1 if waiting.
+        moves (ndarray): Ticks spent on the current link.
+        total_moves (ndarray): Ticks spent travelling since the start.
+    """
+    def __init__(self, graph: Dict[str, Zone],
+                 valid_paths: List[Path], drones: int) -> None:
+        self.drone_count = drones
+        super().__init__(graph, valid_paths, drones)
+        graph_c = self.compiled
+        start = graph_c.start if graph_c.start >= 0 else 0
+        self.pos: IntArray = np.full(drones, start, dtype=np.int64)
+        self.link: IntArray = np.full(drones, -1, dtype=np.int64)
+        self.moves: IntArray = np.zeros(drones, dtype=np.int64)
+        self.total_moves: IntArray = np.zeros(drones, dtype=np.int64)
+
+        self.coords = np.array([zone.coordinates for zone in graph_c.zones],
+                               dtype=np.float64).reshape(-1, 2)
+        self.last_pos = self.coords[self.pos].copy()
+        self.target_pos = self.coords[self.pos].copy()
+        self.zone_cost: IntArray = np.array(graph_c.zone_cost,
+                                            dtype=np.int64)
+        self.edge_target: IntArray = np.array(graph_c.targets,
+                                              dtype=np.int64)
+        self.names = np.array([f"D{i}" for i in range(1, drones + 1)],
+                              dtype=object)
+
+        self._hop_table_source: List[List[Link]] | None = None
+        self.hop_edges: IntArray = np.zeros((0, 0), dtype=np.int64)
+        self.hop_count: IntArray = np.zeros(0, dtype=np.int64)
+        self.next_targets: List[List[int]] = []
+        # plan row of every hub id sending drones this tick, else -1
+        self._plan_row: IntArray = np.full(len(graph_c), -1,
+                                           dtype=np.int64)
+        self._views: List[Drone] | None = None
+
+    def init_drones(self, drones: int) -> List[Drone]:
+        """Only reserves the start hub; drones live in arrays."""
+        if self.start is not None:
+            self.start.occupancy += drones
+        return []
+
+    def get_drones(self) -> List[Drone]:
+        """
+        Returns Drone objects mirroring the array state.
+
+        They are created on the first call and kept in sync after every
+        tick, which costs O(drones) per tick: only meant for small maps
+        rendered by the visualizer.
+        """
+        if self._views is None:
+            self._views = []
+            if self.start is not None:
+                self._views = [Drone(i, self.start)
+                               for i in range(1, self.drone_count + 1)]
+            self._sync_views(np.zeros(0, dtype=np.int64), [])
+        return self._views
+
+    def start_simulation(self, valid_map: Dict[str, List],
+                         output: TextIO | None = None) -> int:
+        """
+        Runs ticks until every drone reached (or reserved) the end hub.
+
+        Returns:
+            int: The number of turns simulated.
+        """
+        move_counter = 0
+        if self.end is not None:
+            while self.end.occupancy < self.drone_count:
+                drone_move = self.next_move(valid_map)
+                if len(drone_move) == 0:
+                    print("Error: Simulation is stuck, no drone can move.",
+                          file=sys.stderr)
+                    break
+                move_counter += 1
+                if output is not None:
+                    output.write(f"{drone_move.rstrip()}\n")
+            if output is None:
+                print(f"Total Moves: {move_counter}")
+        return move_counter
+
+    def next_move(self, valid_map: Dict[str, List]) -> str:
+        """
+        Computes one tick for the whole swarm with batched operations.
+
+        Returns:
+            str: The drone movements of the tick, in drone order.
+        """
+        next_links = self.get_next_links(valid_map)
+        self._build_hop_table(next_links)
+        in_transit = self.link >= 0
+        self.moves[in_transit] += 1
+        self.total_moves[in_transit] += 1
+        self._admit(next_links, np.flatnonzero(
+            ~in_transit & (self.hop_count[self.pos] > 0)))
+
+        travelling = np.flatnonzero(self.link >= 0)
+        edges = self.link[travelling]
+        targets = self.edge_target[edges]
+        arrived = self.moves[travelling] == self.zone_cost[targets]
+        texts = self._describe(travelling, targets, arrived)
+
+        done = travelling[arrived]
+        links = self.compiled.links
+        landed, counts = np.unique(edges[arrived], return_counts=True)
+        for edge, count in zip(landed.tolist(), counts.tolist()):
+            links[edge].occupancy -= count
+        self.pos[done] = targets[arrived]
+        self.link[done] = -1
+        self.moves[done] = 0
+        self.target_pos[done] = self.coords[targets[arrived]]
+
+        flying = travelling[~arrived]
+        if len(flying) > 0:
+            ratio = (self.moves[flying] /
+                     self.zone_cost[targets[~arrived]])[:, None]
+            self.target_pos[flying] = self.last_pos[flying] + \
+                (self.coords[targets[~arrived]] -
+                 self.coords[self.pos[flying]]) * ratio
+
+        if self._views is not None:
+            self._sync_views(travelling, texts)
+        return "".join(f"{text} " for text in texts)
+
+    def _build_hop_table(self, next_links: List[List[Link]]) -> None:
+        """Packs the next-hop links into a padded (hub, level) edge
+        matrix, and lists the distinct next-hop hubs of every hub, once
+        per next-hop table."""
+        if next_links is self._hop_table_source:
+            return
+        graph = self.compiled
+        width = max([len(links) for links in next_links] + [1])
+        self.hop_edges = np.full((len(graph), width), -1, dtype=np.int64)
+        self.hop_count = np.zeros(len(graph), dtype=np.int64)
+        self.next_targets = []
+        for hub, links in enumerate(next_links):
+            self.hop_count[hub] = len(links)
+            for level, link in enumerate(links):
+                self.hop_edges[hub, level] = graph.edge_index(
+                    hub, link.target.idx)
+            self.next_targets.append(
+                sorted({link.target.idx for link in links} - {hub}))
+        self._hop_table_source = next_links
+
+    def _admit(self, next_links: List[List[Link]],
+               waiting: IntArray) -> None:
+        """
+        Sends the waiting drones planned by the look-ahead.
+
+        Args:
+            next_links: Prioritized next-hop Links of every hub id.
+            waiting: Indices of the drones waiting in a hub with next
+                     hops, in drone order.
+        """
+        if len(waiting) == 0:
+            return
+        hubs, first, counts = np.unique(self.pos[waiting],
+                                        return_index=True,
+                                        return_counts=True)
+        order = np.argsort(first)
+        plan = plan_departures(
+            self.compiled.zones, next_links, self.next_targets,
+            dict(zip(hubs[order].tolist(), counts[order].tolist())))
+        if len(plan) == 0:
+            return
+
+        zones = self.compiled.zones
+        rows = self._plan_row
+        sent = np.zeros((len(plan), self.hop_edges.shape[1]),
+                        dtype=np.int64)
+        for row, (hub, counts_sent) in enumerate(plan.items()):
+            rows[hub] = row
+            sent[row, :len(counts_sent)] = counts_sent
+            zones[hub].occupancy -= sum(counts_sent)
+            for link, count in zip(next_links[hub], counts_sent):
+                link.occupancy += count
+                link.target.occupancy += count
+        # rank of every waiting drone in its hub, by drone number
+        order = np.lexsort((waiting, self.pos[waiting]))
+        drones = waiting[order]
+        sources = self.pos[drones]
+        rank = group_rank(sources)
+        drone_rows = rows[sources]
+        planned = drone_rows >= 0
+        drones, sources, rank, drone_rows = drones[planned], \
+            sources[planned], rank[planned], drone_rows[planned]
+        bounds = np.cumsum(sent, axis=1)[drone_rows]
+        leaving = rank < bounds[:, -1]
+        drones, sources = drones[leaving], sources[leaving]
+        levels = (bounds[leaving] <= rank[leaving][:, None]).sum(axis=1)
+        rows[np.fromiter(plan, dtype=np.int64, count=len(plan))] = -1
+
+        self.link[drones] = self.hop_edges[sources, levels]
+        self.moves[drones] = 1
+        self.total_moves[drones] += 1
+        self.last_pos[drones] = self.coords[sources]
+
+    def _describe(self, travelling: IntArray, targets: IntArray,
+                  arrived: npt.NDArray[np.bool_]) -> List[str]:
+        """Builds the 'D1-hub' / 'D2-hub-hub' telemetry of the drones in
+        transit."""
+        names = self.compiled.names
+        texts = []
+        for drone, source, target, done in zip(
+                self.names[travelling], self.pos[travelling].tolist(),
+                targets.tolist(), arrived.tolist()):
+            if done:
+                texts.append(f"{drone}-{names[target]}")
+            else:
+                texts.append(f"{drone}-{names[source]}-{names[target]}")
+        return texts
+
+    def _sync_views(self, travelling: IntArray, texts: List[str]) -> None:
+        """Copies the array state into the Drone objects; 'texts' is the
+        telemetry of the 'travelling' drones."""
+        if self._views is None:
+            return
+        zones = self.compiled.zones
+        links = self.compiled.links
+        for i, drone in enumerate(self._views):
+            drone.pos = zones[int(self.pos[i])]
+            edge = int(self.link[i])
+            drone.link = links[edge] if edge >= 0 else None
+            drone.moves = int(self.moves[i])
+            drone.total_moves = int(self.total_moves[i])
+            drone.set_last_pos(self.last_pos[i].tolist())
+            drone.set_target_pos(self.target_pos[i].tolist())
+            drone.txt = ""
+        for i, text in zip(travelling.tolist(), texts):
+            self._views[i].txt = text
@@ -66,7 +66,7 @@ def drone_animation_translation(
             xc, yc = float(xf), float(yf)
         if len(drone.txt) > 0:
             drone_info += f"{drone.txt} "
-        drone.current_pos = [xc, yc]
+        drone.set_current_pos((xc, yc))
         xc_scaled = int(xc * const.mul + const.x_offset)
         yc_scaled = int(yc * const.mul + const.y_cent +
                         5 * math.sin(no + 3.14 * counter / 180))
@@ -44,7 +44,9 @@ class GraphVisualizer(MyMLX):
 
     Attributes:
         graph (Dict): The logical hub network.
-        simulator (Simulator): The engine providing the next_move logic.
+        simulator (Simulator): The engine providing the next_move logic
+        (a ScheduledSimulator when started from flyin.py, so rendering
+        only replays precomputed moves).
         throughput (List): History of drone arrivals used to draw the
         bar chart.
         auto_animate (bool): Toggle for continuous vs. step-by-step mode.
@@ -375,6 +377,8 @@ class GraphVisualizer(MyMLX):
 
         Requests a new 'next_move' from the simulator only when all current
         drone animations are complete, ensuring visual-logical synchronization.
+        With a ScheduledSimulator this is a lookup of the recorded moves of
+        the next turn, no routing is computed while rendering.
         """
         # self.mlx.mlx.mlx_clear_window(self.mlx.mlx_ptr, self.mlx.win_ptr)\
         drones_moving = [drone.moving for drone in self.drones]
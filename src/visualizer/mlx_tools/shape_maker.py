@@ -1,9 +1,11 @@
-from typing import Tuple
-from .base_mlx import MlxVar
+from __future__ import annotations
+from typing import Tuple, TYPE_CHECKING
 from .mlx_errors import (
     ParametersError, ImgError
 )
 from .image_operations import ImageOperations, ImgData
+if TYPE_CHECKING:
+    from .base_mlx import MlxVar
 
 
 class ShapeGenerator: